@@ -0,0 +1,22 @@
+# -*- coding: iso-8859-1 -*-
+# this file is automatically created by setup.py
+config_dir = '/root/package/config'
+install_data = '/root/package'
+install_scripts = '/root/package'
+name = u'LinkChecker'
+version = u'8.6'
+author = u'Bastian Kleineidam'
+author_email = u'bastian.kleineidam@web.de'
+maintainer = u'Bastian Kleineidam'
+maintainer_email = u'bastian.kleineidam@web.de'
+url = u'http://wummel.github.io/linkchecker/'
+license = u'GPL'
+description = u'check links in web documents or full websites'
+long_description = u'Linkchecker features:\n\no recursive and multithreaded checking and site crawling\no output in colored or normal text, HTML, SQL, CSV, XML or a sitemap graph in different formats\no HTTP/1.1, HTTPS, FTP, mailto:, news:, nntp:, Telnet and local file links support\no restrict link checking with regular expression filters for URLs\no proxy support\no username/password authorization for HTTP, FTP and Telnet\no honors robots.txt exclusion protocol\no Cookie support\no HTML5 support\no HTML and CSS syntax check\no Antivirus check\no a command line, GUI and web interface\n\n'
+keywords = ['link', 'url', 'site', 'checking', 'crawling', 'verification', 'validation']
+platforms = ['UNKNOWN']
+fullname = u'LinkChecker-8.6'
+contact = u'Bastian Kleineidam'
+contact_email = u'bastian.kleineidam@web.de'
+release_date = "8.1.2014"
+portable = 0
@@ -71,6 +71,8 @@ class ConnectionPool (object):
         self.wait = wait
         # {connection type -> max number of connections to one host}
         self.limits = limits
+        # number of new and reused connections returned by get()
+        self.created = self.reused = 0
 
     @synchronized(_wait_lock)
     def host_wait (self, host, wait):
@@ -109,6 +111,7 @@ class ConnectionPool (object):
         """
         self.wait_for_host(host)
         connection = create_connection(type, host, port)
+        self.created += 1
         cid = get_connection_id(connection)
         expiration = None
         conn_data = [connection, 'busy', expiration]
@@ -117,7 +120,7 @@ class ConnectionPool (object):
             lock, entries = self.connections[key]
             entries[cid] = conn_data
         else:
-            lock = get_semaphore("%s:%d" % (host, port), self.limits[type])
+            lock = get_semaphore("connection_limit", self.limits[type])
             lock.acquire()
             log.debug(LOG_CACHE, "Acquired lock for %s://%s:%d" % key)
             entries = {cid: conn_data}
@@ -159,6 +162,7 @@ class ConnectionPool (object):
                         delete_entries.append(id)
                     else:
                         conn_data[1] = ConnectionState.busy
+                        self.reused += 1
                         log.debug(LOG_CACHE,
                           "reusing connection %s timing out in %.01f seconds",
                            key, (conn_data[2] - t))
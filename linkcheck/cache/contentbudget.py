@@ -0,0 +1,108 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Limit the number of content bytes held in memory by all checker threads.
+"""
+import threading
+from .. import log, LOG_CACHE
+
+
+class ContentBudget (object):
+    """Thread-safe counter of buffered URL content bytes. Threads wanting
+    to download content wait until enough bytes are available.
+    A single download is always allowed when no other content is
+    buffered, so pages larger than the budget cannot block forever."""
+
+    def __init__ (self, maxbytes):
+        """Initialize the budget.
+        @param maxbytes: maximum number of buffered bytes, zero or None
+          means no limit
+        @ptype maxbytes: int or None
+        """
+        self.maxbytes = maxbytes
+        self.current = 0
+        self.peak = 0
+        self.cond = threading.Condition()
+
+    def is_exhausted (self, nbytes):
+        """Check if nbytes do not fit into the budget. Not thread-safe!"""
+        return (self.maxbytes and self.current > 0 and
+                self.current + nbytes > self.maxbytes)
+
+    def get_reservation (self, size, maxsize):
+        """Get the number of bytes to reserve for a download.
+        @param size: content size, negative if unknown
+        @ptype size: int
+        @param maxsize: maximum number of downloaded bytes
+        @ptype maxsize: int
+        @return: size if known, else the maximum download size limited
+          to the budget
+        @rtype: int
+        """
+        if size >= 0:
+            return size
+        if not self.maxbytes:
+            return 0
+        return min(maxsize, self.maxbytes)
+
+    def acquire (self, nbytes):
+        """Wait until nbytes fit into the budget and reserve them.
+        @param nbytes: estimated content size, zero if unknown
+        @ptype nbytes: int
+        @return: number of reserved bytes
+        @rtype: int
+        """
+        with self.cond:
+            if self.is_exhausted(nbytes):
+                log.debug(LOG_CACHE, "waiting for %d content bytes", nbytes)
+                while self.is_exhausted(nbytes):
+                    self.cond.wait()
+            self._add(nbytes)
+        return nbytes
+
+    def resize (self, reserved, nbytes):
+        """Change a reservation to the real content size. This never
+        blocks since the content is already in memory.
+        @return: number of reserved bytes
+        @rtype: int
+        """
+        with self.cond:
+            self._add(nbytes - reserved)
+            if nbytes < reserved:
+                self.cond.notifyAll()
+        return nbytes
+
+    def release (self, nbytes):
+        """Release reserved bytes and wake up waiting threads."""
+        with self.cond:
+            self._add(-nbytes)
+            self.cond.notifyAll()
+
+    def _add (self, nbytes):
+        """Add to the buffered bytes and update the peak value.
+        Not thread-safe!"""
+        self.current += nbytes
+        if self.current > self.peak:
+            self.peak = self.current
+
+    def status (self):
+        """Get current and peak number of buffered bytes.
+        @return: (current, peak)
+        @rtype: tuple (int, int)
+        """
+        with self.cond:
+            return self.current, self.peak
@@ -0,0 +1,73 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Detect parsed pages with identical content.
+"""
+from .. import log, LOG_CACHE, url as urlutil
+from ..decorators import synchronized
+from ..lock import get_lock
+
+
+_lock = get_lock("duplicates")
+
+
+class DuplicateContent (object):
+    """Thread-safe map from content digests to the first parsed URL with
+    that content, used to skip parsing of duplicate pages like session
+    ID variants."""
+
+    def __init__ (self):
+        """Initialize the empty map."""
+        # mapping {digest -> (content cache key, recursion level)}
+        self.digests = {}
+        self.hits = 0
+
+    @synchronized(_lock)
+    def get_original (self, digest, key, recursion_level):
+        """Get an already parsed URL with the same content whose relative
+        links resolve to the same URLs, and whose links were queued with
+        a recursion level not higher than for the given URL. If no URL
+        with this content was parsed, the given URL is registered.
+        @param digest: content digest
+        @ptype digest: string
+        @param key: content cache key of the URL
+        @ptype key: unicode
+        @param recursion_level: recursion level of the URL
+        @ptype recursion_level: int
+        @return: content cache key of the original URL, or None if the
+          content must be parsed
+        @rtype: unicode or None
+        """
+        entry = self.digests.get(digest)
+        if entry is None:
+            self.digests[digest] = (key, recursion_level)
+            return None
+        original, original_level = entry
+        if original == key:
+            # URLs with another anchor are parsed again as before
+            return None
+        if original_level <= recursion_level and \
+           urlutil.is_same_link_base(original, key):
+            log.debug(LOG_CACHE, "%s has the same content as %s", key,
+                      original)
+            self.hits += 1
+            return original
+        return None
+
+    def __len__ (self):
+        """Number of stored digests."""
+        return len(self.digests)
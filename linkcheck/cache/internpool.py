@@ -0,0 +1,58 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Share equal strings between URL objects of one check run.
+"""
+from ..decorators import synchronized
+from ..lock import get_lock
+
+
+_lock = get_lock("internpool")
+
+
+class InternPool (object):
+    """Thread-safe pool storing one copy of each distinct value.
+    Unlike the builtin intern() this works for unicode strings and
+    tuples, and the pool is freed together with the check run."""
+
+    def __init__ (self):
+        """Initialize the empty pool."""
+        # mapping {value -> value}
+        self.pool = {}
+        self.hits = self.misses = 0
+
+    @synchronized(_lock)
+    def intern (self, value):
+        """Return the pooled copy of value. None is returned unchanged.
+        @param value: a hashable value, usually a unicode string
+        @ptype value: unicode, tuple or None
+        @return: an equal value shared with other callers
+        @rtype: unicode, tuple or None
+        """
+        if value is None:
+            return None
+        pooled = self.pool.get(value)
+        if pooled is None:
+            self.misses += 1
+            self.pool[value] = pooled = value
+        else:
+            self.hits += 1
+        return pooled
+
+    def __len__ (self):
+        """Number of pooled values."""
+        return len(self.pool)
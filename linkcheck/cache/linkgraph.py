@@ -0,0 +1,115 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Store content digests and extracted links of parsed pages for
+incremental checking.
+"""
+import os
+import time
+try:
+    import sqlite3
+    has_sqlite = True
+except ImportError:
+    has_sqlite = False
+from .. import log, LOG_CACHE
+from ..decorators import synchronized
+from ..lock import get_lock
+
+_lock = get_lock("linkgraph")
+
+
+class LinkGraph (object):
+    """
+    Thread-safe store of parsed pages in a sqlite database. For each
+    page the content digest, an optional content validator (like the
+    HTTP ETag) and the links found in the content are stored.
+    """
+
+    def __init__ (self, filename):
+        """Open or create the database.
+        @param filename: database file name
+        @ptype filename: string
+        """
+        path = os.path.dirname(filename)
+        if path and not os.path.isdir(path):
+            os.makedirs(path)
+        self.hits = self.misses = 0
+        self.conn = sqlite3.connect(filename, timeout=60,
+            check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS page "
+            "(url TEXT PRIMARY KEY, digest TEXT, validator TEXT, "
+            "checked REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS link "
+            "(page TEXT, url TEXT, line INTEGER, col INTEGER, name TEXT, "
+            "base TEXT, lastmod TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS link_page "
+            "ON link (page)")
+        self.conn.commit()
+
+    @synchronized(_lock)
+    def get_page (self, key):
+        """Get stored page data.
+        @param key: the content cache key of the page
+        @ptype key: unicode
+        @return: tuple (digest, validator) or None if not stored
+        @rtype: tuple (unicode, unicode or None) or None
+        """
+        return self.conn.execute("SELECT digest, validator FROM page "
+            "WHERE url=?", (key,)).fetchone()
+
+    @synchronized(_lock)
+    def get_links (self, key):
+        """Get stored links of a page and count an unchanged page.
+        @return: list of (url, line, column, name, base, lastmod)
+        @rtype: list of tuples
+        """
+        self.hits += 1
+        return self.conn.execute("SELECT url, line, col, name, base, "
+            "lastmod FROM link WHERE page=? ORDER BY rowid", (key,)).fetchall()
+
+    @synchronized(_lock)
+    def store_page (self, key, digest, validator, links):
+        """Replace the stored data of a page.
+        @param links: list of (url, line, column, name, base, lastmod)
+        @ptype links: list of tuples
+        """
+        self.misses += 1
+        log.debug(LOG_CACHE, "storing %d links of %s", len(links), key)
+        with self.conn:
+            self.conn.execute("DELETE FROM link WHERE page=?", (key,))
+            self.conn.execute("INSERT OR REPLACE INTO page VALUES (?,?,?,?)",
+                              (key, digest, validator, time.time()))
+            self.conn.executemany("INSERT INTO link VALUES (?,?,?,?,?,?,?)",
+                [(key,) + tuple(link) for link in links])
+
+    @synchronized(_lock)
+    def close (self):
+        """Close the database."""
+        self.conn.close()
+
+
+def get_link_graph (config):
+    """Return a link graph store if incremental checking is configured,
+    else None."""
+    filename = config["incremental"]
+    if not filename:
+        return None
+    if not has_sqlite:
+        log.warn(LOG_CACHE, _("Incremental checking needs the sqlite3 Python module."))
+        return None
+    return LinkGraph(os.path.expanduser(filename))
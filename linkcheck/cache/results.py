@@ -0,0 +1,187 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Persistent cache of URL check results shared between check runs.
+"""
+import os
+import time
+import json
+try:
+    import sqlite3
+    has_sqlite = True
+except ImportError:
+    has_sqlite = False
+from .. import log, LOG_CACHE
+from ..decorators import synchronized
+from ..lock import get_lock
+
+# increase when the format of UrlBase.get_cache_data() changes
+CacheVersion = 1
+
+_lock = get_lock("resultcache")
+# held while writing results to the database
+_write_lock = get_lock("resultcache_write")
+
+
+class ResultCache (object):
+    """
+    Thread-safe cache of check results in a sqlite database, keyed by
+    the URL cache key. Several processes can use the same database file
+    at the same time.
+
+    Stored results are written in batches by one thread at a time, with
+    a separate database connection. Waiting for other processes locking
+    the database only blocks the writing thread.
+    """
+
+    # number of stored results written in one transaction
+    BatchSize = 100
+    # maximum seconds stored results are kept before writing
+    FlushSeconds = 5
+
+    def __init__ (self, filename, ttls):
+        """Open or create the cache database and remove expired entries.
+        @param filename: database file name
+        @ptype filename: string
+        @param ttls: mapping of "valid", "invalid", "SCHEME.valid" or
+          "SCHEME.invalid" to the number of seconds results are kept
+        @ptype ttls: dict
+        """
+        self.ttls = ttls
+        self.hits = self.misses = 0
+        path = os.path.dirname(filename)
+        if path and not os.path.isdir(path):
+            os.makedirs(path)
+        # wait for other processes locking the database
+        self.writer = sqlite3.connect(filename, timeout=60,
+            isolation_level=None, check_same_thread=False)
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        version = self.writer.execute("PRAGMA user_version").fetchone()[0]
+        if version != CacheVersion:
+            self.writer.execute("DROP TABLE IF EXISTS result")
+            self.writer.execute("PRAGMA user_version=%d" % CacheVersion)
+        self.writer.execute("CREATE TABLE IF NOT EXISTS result "
+            "(url TEXT PRIMARY KEY, expires REAL NOT NULL, data TEXT NOT NULL)")
+        self.writer.execute("DELETE FROM result WHERE expires<?", (time.time(),))
+        # readers are not blocked by writers in WAL mode
+        self.conn = sqlite3.connect(filename, timeout=60,
+            isolation_level=None, check_same_thread=False)
+        # mapping {URL cache key -> (expires, data)} of results to write
+        self.pending = {}
+        self.next_flush = time.time() + self.FlushSeconds
+
+    def get_ttl (self, url_data):
+        """Return number of seconds the result of given URL is kept."""
+        validity = "valid" if url_data.valid else "invalid"
+        key = "%s.%s" % (url_data.scheme, validity)
+        return self.ttls.get(key, self.ttls.get(validity, 0))
+
+    def is_cacheable (self, url_data):
+        """Only results of extern URLs are cached, since the content of
+        intern URLs must be parsed for recursion."""
+        return url_data.extern[0] and url_data.cache_url_key is not None
+
+    @synchronized(_lock)
+    def load (self, url_data):
+        """Copy a cached and not expired result into given URL.
+        @return: True if a cached result was found
+        @rtype: bool
+        """
+        if not self.is_cacheable(url_data):
+            return False
+        row = self.pending.get(url_data.cache_url_key)
+        if row is not None and row[0] >= time.time():
+            row = row[1:]
+        else:
+            row = self.conn.execute("SELECT data FROM result WHERE url=? "
+                "AND expires>=?", (url_data.cache_url_key, time.time())).fetchone()
+        if row is None:
+            self.misses += 1
+            return False
+        self.hits += 1
+        log.debug(LOG_CACHE, "result cache hit for %s", url_data)
+        url_data.copy_from_cache(json.loads(row[0]))
+        return True
+
+    def store (self, url_data):
+        """Store the check result of given URL if it should be cached.
+        The result is written with the next batch."""
+        if not (url_data.caching and self.is_cacheable(url_data)):
+            return
+        ttl = self.get_ttl(url_data)
+        if ttl <= 0:
+            return
+        data = json.dumps(url_data.get_cache_data())
+        with _lock:
+            now = time.time()
+            self.pending[url_data.cache_url_key] = (now + ttl, data)
+            flush = (len(self.pending) >= self.BatchSize or
+                     now >= self.next_flush)
+        if flush:
+            self.flush(blocking=False)
+
+    def flush (self, blocking=True):
+        """Write the pending results in one transaction.
+        @param blocking: if False, return without writing when another
+          thread is already writing
+        @ptype blocking: bool
+        """
+        if not _write_lock.acquire(blocking):
+            return
+        try:
+            with _lock:
+                rows = [(key, expires, data) for key, (expires, data)
+                        in self.pending.iteritems()]
+                self.pending = {}
+                self.next_flush = time.time() + self.FlushSeconds
+            if not rows:
+                return
+            try:
+                self.writer.execute("BEGIN")
+                self.writer.executemany(
+                    "INSERT OR REPLACE INTO result VALUES (?,?,?)", rows)
+                self.writer.execute("COMMIT")
+            except sqlite3.Error as msg:
+                log.warn(LOG_CACHE, _("Could not write %(num)d results to"
+                    " the result cache: %(msg)s") %
+                    {"num": len(rows), "msg": msg})
+                try:
+                    self.writer.execute("ROLLBACK")
+                except sqlite3.Error:
+                    # no transaction was started
+                    pass
+        finally:
+            _write_lock.release()
+
+    def close (self):
+        """Write pending results and close the database."""
+        self.flush()
+        with _lock:
+            self.conn.close()
+        with _write_lock:
+            self.writer.close()
+
+
+def get_result_cache (config):
+    """Return a result cache if configured, else None."""
+    filename = config["resultcache"]
+    if not filename:
+        return None
+    if not has_sqlite:
+        log.warn(LOG_CACHE, _("The result cache needs the sqlite3 Python module."))
+        return None
+    return ResultCache(filename, config["resultcachettl"])
@@ -17,7 +17,15 @@
 """
 Cache robots.txt contents.
 """
-from .. import robotparser2, configuration, url as urlutil
+import os
+import time
+import json
+try:
+    import sqlite3
+    has_sqlite = True
+except ImportError:
+    has_sqlite = False
+from .. import robotparser2, configuration, url as urlutil, log, LOG_CACHE
 from ..containers import LFUCache
 from ..decorators import synchronized
 from ..lock import get_lock
@@ -26,6 +34,7 @@ from ..lock import get_lock
 # lock objects
 cache_lock = get_lock("robots.txt_cache_lock")
 robot_lock = get_lock("robots.txt_robot_lock")
+store_lock = get_lock("robots.txt_store_lock")
 
 
 class RobotsTxt (object):
@@ -35,41 +44,177 @@ class RobotsTxt (object):
     """
     useragent = str(configuration.UserAgent)
 
-    def __init__ (self):
-        """Initialize per-URL robots.txt cache."""
+    def __init__ (self, size=10000, maxage=60*60*24, store=None):
+        """Initialize per-URL robots.txt cache.
+        @param size: maximum number of cached robots.txt files
+        @ptype size: int
+        @param maxage: number of seconds before robots.txt files are
+          fetched again
+        @ptype maxage: int
+        @param store: optional persistent store of parsed robots.txt files
+        @ptype store: RobotsTxtStore or None
+        """
         # mapping {URL -> parsed robots.txt}
-        self.cache = LFUCache(size=100)
-        self.hits = self.misses = 0
+        self.cache = LFUCache(size=size)
+        self.maxage = maxage
+        self.store = store
+        self.hits = self.misses = self.stored_hits = 0
         self.roboturl_locks = {}
 
-    def allows_url (self, roboturl, url, proxy, user, password, callback=None):
-        """Ask robots.txt allowance."""
+    def allows_url (self, roboturl, url, proxy, user, password, callback=None,
+                    sitemap_callback=None):
+        """Ask robots.txt allowance. If given, sitemap_callback is called
+        with the robots.txt URL and the list of (sitemap URL, line number)
+        tuples when the robots.txt file is first read."""
         with self.get_lock(roboturl):
-            return self._allows_url(roboturl, url, proxy, user, password, callback)
+            return self._allows_url(roboturl, url, proxy, user, password,
+                                    callback, sitemap_callback)
 
-    def _allows_url (self, roboturl, url, proxy, user, password, callback):
+    def _allows_url (self, roboturl, url, proxy, user, password, callback,
+                     sitemap_callback):
         """Ask robots.txt allowance. Assumes only single thread per robots.txt
         URL calls this function."""
         with cache_lock:
             if roboturl in self.cache:
-                self.hits += 1
                 rp = self.cache[roboturl]
-                return rp.can_fetch(self.useragent, url)
-            self.misses += 1
+                if rp.mtime() + self.maxage > time.time():
+                    self.hits += 1
+                    return rp.can_fetch(self.useragent, url)
         rp = robotparser2.RobotFileParser(proxy=proxy, user=user,
             password=password)
         rp.set_url(roboturl)
-        rp.read()
+        if self.store is not None and self.store.load(rp):
+            with cache_lock:
+                self.stored_hits += 1
+        else:
+            with cache_lock:
+                self.misses += 1
+            rp.read()
+            if self.store is not None and rp.fetched:
+                maxage = self.maxage
+                if rp.max_age is not None:
+                    maxage = min(maxage, rp.max_age)
+                self.store.save(rp, rp.mtime() + maxage)
         if hasattr(callback, '__call__'):
             parts = urlutil.url_split(rp.url)
             host = "%s:%d" % (parts[1], parts[2])
             wait = rp.get_crawldelay(self.useragent)
             callback(host, wait)
+        if hasattr(sitemap_callback, '__call__') and rp.sitemap_urls:
+            sitemap_callback(roboturl, rp.sitemap_urls)
         with cache_lock:
             self.cache[roboturl] = rp
         return rp.can_fetch(self.useragent, url)
 
+    def get_items (self):
+        """Get cached robots.txt data for checkpoints.
+        @return: list of (robots.txt URL, parsed robots.txt)
+        @rtype: list of tuples (string, RobotFileParser)
+        """
+        with cache_lock:
+            return self.cache.items()
+
+    def add_items (self, items, callback=None):
+        """Add robots.txt data of a checkpoint to the cache. If given,
+        callback is called with the host and crawl delay of each entry.
+        @param items: list of (robots.txt URL, parsed robots.txt)
+        @ptype items: list of tuples (string, RobotFileParser)
+        """
+        for roboturl, rp in items:
+            if hasattr(callback, '__call__'):
+                parts = urlutil.url_split(rp.url)
+                host = "%s:%d" % (parts[1], parts[2])
+                callback(host, rp.get_crawldelay(self.useragent))
+            with cache_lock:
+                self.cache[roboturl] = rp
+
     @synchronized(robot_lock)
     def get_lock(self, roboturl):
         """Return lock for robots.txt url."""
-        return self.roboturl_locks.setdefault(roboturl, get_lock(roboturl))
+        # all URL locks share one name for the lock statistics
+        return self.roboturl_locks.setdefault(roboturl,
+            get_lock("robots.txt_url_lock"))
+
+    def close (self):
+        """Close the persistent store."""
+        if self.store is not None:
+            self.store.close()
+
+
+class RobotsTxtStore (object):
+    """
+    Thread-safe persistent store of parsed robots.txt files in a sqlite
+    database, keyed by the robots.txt URL. Entries expire according to
+    the HTTP caching headers of the robots.txt response, and after the
+    configured maximum age.
+    """
+
+    def __init__ (self, filename):
+        """Open or create the database and remove expired entries.
+        @param filename: database file name
+        @ptype filename: string
+        """
+        path = os.path.dirname(filename)
+        if path and not os.path.isdir(path):
+            os.makedirs(path)
+        # autocommit mode; wait for other processes locking the database
+        self.conn = sqlite3.connect(filename, timeout=60,
+            isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS robots "
+            "(url TEXT PRIMARY KEY, fetched REAL NOT NULL, "
+            "expires REAL NOT NULL, data TEXT NOT NULL)")
+        self.conn.execute("DELETE FROM robots WHERE expires<?", (time.time(),))
+
+    @synchronized(store_lock)
+    def load (self, rp):
+        """Load stored rules of the robots.txt URL of given parser.
+        @param rp: robots.txt parser with URL set
+        @ptype rp: RobotFileParser
+        @return: True if not expired rules were found
+        @rtype: bool
+        """
+        row = self.conn.execute("SELECT fetched, data FROM robots WHERE "
+            "url=? AND expires>=?", (rp.url, time.time())).fetchone()
+        if row is None:
+            return False
+        fetched, data = row
+        data = json.loads(data)
+        rp.parse(data["rules"].encode("latin-1").splitlines())
+        rp.allow_all = data["allow_all"]
+        rp.disallow_all = data["disallow_all"]
+        rp.sitemap_urls = [(url.encode("latin-1"), line) for url, line in
+                           data["sitemaps"]]
+        rp.last_checked = fetched
+        log.debug(LOG_CACHE, "loaded stored robots.txt %s", rp.url)
+        return True
+
+    @synchronized(store_lock)
+    def save (self, rp, expires):
+        """Store rules of given parser until the given expiration time."""
+        if expires <= time.time():
+            return
+        data = dict(rules=str(rp), allow_all=rp.allow_all,
+            disallow_all=rp.disallow_all, sitemaps=rp.sitemap_urls)
+        self.conn.execute("INSERT OR REPLACE INTO robots VALUES (?,?,?,?)",
+            (rp.url, rp.mtime(), expires,
+             json.dumps(data, encoding="latin-1")))
+
+    @synchronized(store_lock)
+    def close (self):
+        """Close the database."""
+        self.conn.close()
+
+
+def get_robots_txt (config):
+    """Return robots.txt cache with the configured size, maximum age and
+    optional persistent store."""
+    store = None
+    filename = config["robotstxtcache"]
+    if filename:
+        if has_sqlite:
+            store = RobotsTxtStore(os.path.expanduser(filename))
+        else:
+            log.warn(LOG_CACHE, _("The robots.txt store needs the sqlite3 Python module."))
+    return RobotsTxt(size=config["robotstxtcachesize"],
+                     maxage=config["robotstxtmaxage"], store=store)
@@ -21,6 +21,7 @@ import threading
 import collections
 from time import time as _time
 from .. import log, LOG_CACHE
+from ..lock import get_lock
 
 
 LARGE_QUEUE_THRESHOLD = 1000
@@ -48,15 +49,24 @@ class UrlQueue (object):
         # that acquire mutex must release it before returning.  mutex
         # is shared between the two conditions, so acquiring and
         # releasing the conditions also acquires and releases mutex.
-        self.mutex = threading.Lock()
+        self.mutex = get_lock("urlqueue")
         # Notify not_empty whenever an item is added to the queue; a
         # thread waiting to get is notified then.
         self.not_empty = threading.Condition(self.mutex)
         self.all_tasks_done = threading.Condition(self.mutex)
         self.unfinished_tasks = 0
         self.finished_tasks = 0
+        # number of threads still putting input URLs into the queue
+        self.producers = 0
         self.in_progress = {}
         self.seen = {}
+        # keys of self.seen in insertion order; checkpoints copy a prefix
+        # of this list without holding the mutex
+        self.seen_keys = []
+        # position in self.seen_keys of keys first seen as aliases
+        self.alias_positions = {}
+        # cache keys of already queued pending URLs
+        self.pending_seen = set()
         self.shutdown = False
         # Each put() decreases the number of allowed puts.
         # This way we can restrict the number of URLs that are checked.
@@ -84,9 +94,28 @@ class UrlQueue (object):
     def get (self, timeout=None):
         """Get first not-in-progress url from the queue and
         return it. If no such url is available return None.
+        Pending URLs are turned into URL check objects outside of
+        the queue lock. If the resulting URL is a duplicate or should
+        not be checked, or creating it fails, the next URL is taken
+        from the queue.
         """
-        with self.not_empty:
-            return self._get(timeout)
+        while True:
+            with self.not_empty:
+                url_data = self._get(timeout)
+            if not url_data.pending:
+                return url_data
+            position = url_data.seen_position
+            try:
+                url_data = url_data.get_url_data()
+            except Exception:
+                log.exception(LOG_CACHE, "internal error creating URL %r",
+                              url_data.base_url)
+                with self.mutex:
+                    self._finish_unchecked()
+                continue
+            with self.mutex:
+                if self._add_in_progress(url_data, position):
+                    return url_data
 
     def _get (self, timeout):
         """Non thread-safe utility function of self.get() doing the real
@@ -104,8 +133,9 @@ class UrlQueue (object):
                     raise Empty()
                 self.not_empty.wait(remaining)
         url_data = self.queue.popleft()
-        if url_data.has_result:
-            # Already checked and copied from cache.
+        if url_data.pending or url_data.has_result:
+            # Pending URLs are added with _add_in_progress(), and
+            # URLs with results are already checked or copied from cache.
             pass
         else:
             key = url_data.cache_url_key
@@ -113,6 +143,52 @@ class UrlQueue (object):
             self.in_progress[key] = url_data
         return url_data
 
+    def _add_in_progress (self, url_data, position):
+        """Add URL created from a pending URL to the in-progress list.
+        Duplicate URLs and strict extern URLs are finished immediately.
+        Like for other URLs, aliases seen after the URL was queued do
+        not make it a duplicate. Not thread-safe!
+        @param position: number of seen keys when the URL was queued
+        @ptype position: int
+        @return: True if the URL should be checked
+        @rtype: bool
+        """
+        if url_data.has_result:
+            return True
+        if url_data.extern[1]:
+            # strict extern URLs are not checked
+            log.debug(LOG_CACHE, "skip strict extern %s", url_data)
+            self._finish_unchecked()
+            return False
+        key = url_data.cache_url_key
+        if key in self.seen:
+            self.seen[key] += 1
+            if self.alias_positions.get(key, -1) < position:
+                log.debug(LOG_CACHE, "skip duplicate %s", url_data)
+                self._finish_unchecked()
+                return False
+            # the alias was added after queueing, the URL is checked and
+            # now is a duplicate for the other URLs with this key
+            del self.alias_positions[key]
+        else:
+            self._add_seen(key)
+        self.in_progress[key] = url_data
+        return True
+
+    def _add_seen (self, key):
+        """Add a new seen cache key. Not thread-safe!"""
+        self.seen[key] = 0
+        self.seen_keys.append(key)
+
+    def _finish_unchecked (self):
+        """Finish a task without checking it. The URL does not count
+        as allowed put. Not thread-safe!"""
+        if self.allowed_puts is not None:
+            self.allowed_puts += 1
+        self.unfinished_tasks -= 1
+        if self.unfinished_tasks <= 0:
+            self.all_tasks_done.notifyAll()
+
     def put (self, item):
         """Put an item into the queue.
         Block if necessary until a free slot is available.
@@ -126,25 +202,69 @@ class UrlQueue (object):
         if self.shutdown:
             # don't accept more URLs
             return
-        if self.allowed_puts is not None:
-            if self.allowed_puts == 0:
-                # no more puts allowed
-                return
-            self.allowed_puts -= 1
+        if self.allowed_puts == 0:
+            # no more puts allowed
+            return
         log.debug(LOG_CACHE, "queueing %s", url_data)
-        key = url_data.cache_url_key
-        # cache key is None for URLs with invalid syntax
-        assert key is not None or url_data.has_result, "invalid cache key in %s" % url_data
-        if key in self.seen:
-            self.seen[key] += 1
-            if key is not None:
-                # do not check duplicate URLs
+        if url_data.pending:
+            key = url_data.cache_key
+            if key in self.pending_seen:
                 return
+            self.pending_seen.add(key)
+            url_data.seen_position = len(self.seen_keys)
         else:
-            self.seen[key] = 0
+            key = url_data.cache_url_key
+            # cache key is None for URLs with invalid syntax
+            assert key is not None or url_data.has_result, "invalid cache key in %s" % url_data
+            if key in self.seen:
+                self.seen[key] += 1
+                if key is not None:
+                    # do not check duplicate URLs
+                    return
+            else:
+                self._add_seen(key)
+        if self.allowed_puts is not None:
+            self.allowed_puts -= 1
         self.queue.append(url_data)
         self.unfinished_tasks += 1
 
+    def requeue (self, url_data):
+        """Put an URL taken with get() back to the front of the queue,
+        for example when its check has been abandoned. The task stays
+        unfinished."""
+        with self.mutex:
+            self.in_progress.pop(url_data.cache_url_key, None)
+            if self.shutdown:
+                self._finish_unchecked()
+                return
+            self.queue.appendleft(url_data)
+            self.not_empty.notify()
+
+    def add_producer (self):
+        """Register a producer that will put more URLs into the queue.
+        The producer counts as unfinished task, so join() does not return
+        before producer_done() is called."""
+        with self.mutex:
+            self.producers += 1
+            self.unfinished_tasks += 1
+
+    def producer_done (self):
+        """Indicate that a producer will not put more URLs in the queue."""
+        with self.all_tasks_done:
+            if self.producers <= 0:
+                # already removed by do_shutdown()
+                return
+            self.producers -= 1
+            self.unfinished_tasks -= 1
+            if self.unfinished_tasks <= 0:
+                self.all_tasks_done.notifyAll()
+
+    def has_producers (self):
+        """Return True if there are producers putting URLs into the
+        queue."""
+        with self.mutex:
+            return self.producers > 0
+
     def task_done (self, url_data):
         """
         Indicate that a formerly enqueued task is complete.
@@ -168,7 +288,8 @@ class UrlQueue (object):
                     if key in self.seen:
                         self.seen[key] += 1
                     else:
-                        self.seen[key] = 0
+                        self.alias_positions[key] = len(self.seen_keys)
+                        self._add_seen(key)
             key = url_data.cache_url_key
             if key in self.in_progress:
                 del self.in_progress[key]
@@ -205,8 +326,9 @@ class UrlQueue (object):
     def do_shutdown (self):
         """Shutdown the queue by not accepting any more URLs."""
         with self.mutex:
-            unfinished = self.unfinished_tasks - len(self.queue)
+            unfinished = self.unfinished_tasks - len(self.queue) - self.producers
             self.queue.clear()
+            self.producers = 0
             if unfinished <= 0:
                 if unfinished < 0:
                     raise ValueError('shutdown is in error')
@@ -214,6 +336,56 @@ class UrlQueue (object):
             self.unfinished_tasks = unfinished
             self.shutdown = True
 
+    def get_checkpoint (self, logger):
+        """Get the URLs still to check and the cache keys of all seen
+        URLs. URLs being checked are still to check unless they are
+        already logged. A logger marker is queued at the same time, so
+        the logger states match the returned URLs.
+        The mutex is only held while copying the queue and in-progress
+        references; the seen keys and logger states are collected after
+        releasing it.
+        @param logger: the aggregate logger
+        @ptype logger: linkcheck.director.logger.Logger
+        @return: tuple (URLs, seen cache keys, logger state), or None
+          if the queue is shut down
+        @rtype: tuple (list, list, dict) or None
+        """
+        with self.mutex:
+            if self.shutdown:
+                return None
+            # only copy references here, the caller serializes the URLs
+            urls = list(self.queue)
+            in_progress, marker = logger.get_checkpoint(
+                self.in_progress.values())
+            # seen keys are only appended, so the prefix is stable
+            num_seen = len(self.seen_keys)
+        seen = self.seen_keys[:num_seen]
+        state = logger.wait_checkpoint(marker)
+        return in_progress + urls, seen, state
+
+    def restore (self, urls, seen):
+        """Restore URLs and seen cache keys of a checkpoint. Seen URLs
+        are not checked again, but the given URL objects are queued
+        even if their cache key is seen.
+        @param urls: URL objects and pending URLs still to check
+        @ptype urls: list
+        @param seen: cache keys of seen URLs
+        @ptype seen: list
+        """
+        with self.mutex:
+            for key in seen:
+                if key not in self.seen:
+                    self._add_seen(key)
+            for url_data in urls:
+                if url_data.pending:
+                    self._put(url_data)
+                else:
+                    if url_data.cache_url_key not in self.seen:
+                        self._add_seen(url_data.cache_url_key)
+                    self.queue.append(url_data)
+                    self.unfinished_tasks += 1
+            self.not_empty.notifyAll()
+
     def status (self):
         """Get tuple (finished tasks, in progress, queue size)."""
         with self.mutex:
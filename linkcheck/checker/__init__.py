@@ -21,6 +21,7 @@ Main functions for link checking.
 import os
 import cgi
 import urllib
+import urlparse
 from .. import strformat, url as urlutil, log, LOG_CHECK
 
 MAX_FILESIZE = 1024*1024*10 # 10MB
@@ -95,10 +96,12 @@ def get_url_from (base_url, recursion_level, aggregate,
         base_url_stripped = base_url.lstrip()
     else:
         base_url_stripped = base_url
+    # parent URL and base reference are equal for all links of a page
+    internpool = aggregate.internpool
     if parent_url is not None:
-        parent_url = strformat.unicode_safe(parent_url)
+        parent_url = internpool.intern(strformat.unicode_safe(parent_url))
     if base_ref is not None:
-        base_ref = strformat.unicode_safe(base_ref)
+        base_ref = internpool.intern(strformat.unicode_safe(base_ref))
     name = strformat.unicode_safe(name)
     url = absolute_url(base_url_stripped, base_ref, parent_url).lower()
     if not (url or name):
@@ -117,6 +120,97 @@ def get_url_from (base_url, recursion_level, aggregate,
                  line=line, column=column, name=name, extern=extern)
 
 
+class PendingUrl (object):
+    """Lightweight record of an URL waiting in the URL queue. The URL
+    check object is only created with get_url_data() when the URL is
+    taken from the queue."""
+
+    __slots__ = ('base_url', 'parent_url', 'base_ref', 'line', 'column',
+                 'name', 'recursion_level', 'parent_content_type', 'lastmod',
+                 'aggregate', 'cache_key', 'seen_position')
+
+    # the URL queue uses this to distinguish pending URLs from URL objects
+    pending = True
+
+    def __init__ (self, base_url, recursion_level, aggregate,
+                  parent_url=None, base_ref=None, line=0, column=0,
+                  name=u"", parent_content_type=None, lastmod=None):
+        """Store URL data. The parameters are the same as for
+        get_url_from()."""
+        self.base_url = base_url
+        self.recursion_level = recursion_level
+        self.aggregate = aggregate
+        self.parent_url = parent_url
+        self.base_ref = base_ref
+        self.line = line
+        self.column = column
+        self.name = name
+        self.parent_content_type = parent_content_type
+        self.lastmod = lastmod
+        self.cache_key = get_pending_cache_key(base_url, base_ref, parent_url)
+        # number of seen URL keys when queued, set by the URL queue
+        self.seen_position = None
+
+    def is_strict_extern (self):
+        """Check if the URL matches a strict extern pattern and will
+        not be checked. Only absolute URLs are matched; others are
+        skipped after creating the URL object.
+        @rtype: bool
+        """
+        url = self.cache_key
+        if not isinstance(url, basestring) or \
+           not urlutil.url_is_absolute(url):
+            return False
+        for entry in self.aggregate.config["externlinks"]:
+            match = entry['pattern'].search(url)
+            if (entry['negate'] and not match) or \
+               (match and not entry['negate']):
+                return bool(entry['strict'])
+        return False
+
+    def get_url_data (self):
+        """Create the URL check object.
+        @return: URL check object
+        @rtype: UrlBase
+        """
+        url_data = get_url_from(self.base_url, self.recursion_level,
+            self.aggregate, parent_url=self.parent_url,
+            base_ref=self.base_ref, line=self.line, column=self.column,
+            name=self.name, parent_content_type=self.parent_content_type)
+        url_data.lastmod = self.lastmod
+        return url_data
+
+    def __repr__ (self):
+        """Return URL representation for debugging."""
+        return "<%s %r>" % (self.__class__.__name__, self.base_url)
+
+
+def get_pending_cache_key (base_url, base_ref, parent_url):
+    """Get a cache key for a pending URL without building the URL.
+    Relative URLs are joined with the base reference or parent URL
+    like UrlBase.build_url() does, but without normalization.
+    Equal keys always result in the same URL cache key, but different
+    keys can still end up as the same URL after normalization.
+    @return: cache key
+    @rtype: unicode or tuple
+    """
+    if base_url and urlutil.url_is_absolute(base_url):
+        return base_url
+    if base_ref:
+        if ":" not in base_ref:
+            # relative base reference
+            return (base_url, base_ref, parent_url)
+        base = base_ref
+    elif parent_url:
+        base = urlparse.urldefrag(parent_url)[0]
+    else:
+        return base_url
+    try:
+        return urlparse.urljoin(base, base_url or u"")
+    except UnicodeError:
+        return (base_url, base_ref, parent_url)
+
+
 def get_urlclass_from (url, assume_local_file=False):
     """Return checker class for given URL. If URL does not start
     with a URL scheme and assume_local_file is True, assume that
@@ -28,6 +28,8 @@ class DnsUrl (urlbase.UrlBase):
     Url link with dns scheme.
     """
 
+    __slots__ = ()
+
     def can_get_content (self):
         """
         dns: URLs do not have any content
@@ -25,7 +25,7 @@ import urllib
 import urllib2
 from datetime import datetime
 
-from . import urlbase, get_index_html, get_url_from
+from . import urlbase, get_index_html
 from .. import log, LOG_CHECK, fileutil, LinkCheckerError, url as urlutil
 from ..bookmarks import firefox
 from .const import WARN_FILE_MISSING_SLASH, WARN_FILE_SYSTEM_PATH
@@ -94,6 +94,8 @@ class FileUrl (urlbase.UrlBase):
     Url link with file scheme.
     """
 
+    __slots__ = ()
+
     def init (self, base_ref, base_url, parent_url, recursion_level,
               aggregate, line, column, name, url_encoding, extern):
         """Initialize the scheme."""
@@ -289,9 +291,7 @@ class FileUrl (urlbase.UrlBase):
         log.debug(LOG_CHECK, "Parsing Firefox bookmarks %s", self)
         filename = self.get_os_filename()
         for url, name in firefox.parse_bookmark_file(filename):
-            url_data = get_url_from(url, self.recursion_level+1,
-                self.aggregate, parent_url=self.url, name=name)
-            self.aggregate.urlqueue.put(url_data)
+            self.add_url(url, name=name)
 
     def get_content_type (self):
         """Return URL content type, or an empty string if content
@@ -320,7 +320,8 @@ class FileUrl (urlbase.UrlBase):
                 url = url[:i+1]
         return re.escape(url)
 
-    def add_url (self, url, line=0, column=0, name=u"", base=None):
+    def add_url (self, url, line=0, column=0, name=u"", base=None,
+                 lastmod=None):
         """If a local webroot directory is configured, replace absolute URLs
         with it. After that queue the URL data for checking."""
         webroot = self.aggregate.config["localwebroot"]
@@ -328,4 +329,5 @@ class FileUrl (urlbase.UrlBase):
             url = webroot + url[1:]
             log.debug(LOG_CHECK, "Applied local webroot `%s' to `%s'.",
                 webroot, url)
-        super(FileUrl, self).add_url(url, line=line, column=column, name=name, base=base)
+        super(FileUrl, self).add_url(url, line=line, column=column, name=name,
+            base=base, lastmod=lastmod)
@@ -31,6 +31,9 @@ class FtpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledco
     Url link with ftp scheme.
     """
 
+    __slots__ = ('files', 'filename', 'filename_encoding',
+                 'proxy', 'proxyauth', 'proxytype')
+
     def reset (self):
         """
         Initialize FTP url data.
@@ -28,6 +28,8 @@ class HttpsUrl (httpurl.HttpUrl):
     Url link with https scheme.
     """
 
+    __slots__ = ()
+
     def local_check (self):
         """
         Check connection if SSL is supported, else ignore.
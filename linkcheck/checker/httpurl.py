@@ -29,15 +29,16 @@ from cStringIO import StringIO
 from datetime import datetime
 
 from .. import (log, LOG_CHECK, gzip2 as gzip, strformat, url as urlutil,
-    httplib2 as httplib, LinkCheckerError, httputil, configuration)
+    httplib2 as httplib, LinkCheckerError, httputil, configuration,
+    sitemapparse, trace)
 from . import (internpaturl, proxysupport, httpheaders as headers, urlbase,
-    get_url_from, pooledconnection)
+    get_url_from, PendingUrl, pooledconnection)
 # import warnings
 from .const import WARN_HTTP_ROBOTS_DENIED, \
     WARN_HTTP_MOVED_PERMANENT, \
     WARN_HTTP_EMPTY_CONTENT, WARN_HTTP_COOKIE_STORE_ERROR, \
     WARN_HTTP_DECOMPRESS_ERROR, WARN_HTTP_UNSUPPORTED_ENCODING, \
-    WARN_HTTP_AUTH_UNKNOWN, WARN_HTTP_AUTH_UNAUTHORIZED
+    WARN_HTTP_AUTH_UNKNOWN, WARN_HTTP_AUTH_UNAUTHORIZED, ExcList
 
 # assumed HTTP header encoding
 HEADER_ENCODING = "iso-8859-1"
@@ -62,6 +63,10 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
     Url link with http scheme.
     """
 
+    __slots__ = ('_data', 'aliases', 'auth', 'cookies', 'has301status',
+                 'headers', 'max_redirects', 'method', 'method_get_allowed',
+                 'persistent', 'response', 'proxy', 'proxyauth', 'proxytype')
+
     def reset (self):
         """
         Initialize HTTP specific variables.
@@ -99,8 +104,32 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
         user, password = self.get_user_password()
         rb = self.aggregate.robots_txt
         callback = self.aggregate.connections.host_wait
-        return rb.allows_url(roboturl, url, self.proxy, user, password,
-            callback=callback)
+        start = time.time()
+        try:
+            return rb.allows_url(roboturl, url, self.proxy, user, password,
+                callback=callback, sitemap_callback=self.add_sitemap_urls)
+        finally:
+            self.add_timing("robotstxt", time.time() - start)
+
+    def add_sitemap_urls (self, roboturl, sitemap_urls):
+        """Queue sitemap URLs found in the robots.txt file of an
+        internal URL, if the recursion level allows it.
+
+        @param roboturl: the robots.txt URL
+        @type roboturl: string
+        @param sitemap_urls: list of (sitemap URL, line number)
+        @type sitemap_urls: list of tuples (string, int)
+        """
+        if self.extern[0]:
+            return
+        rec_level = self.aggregate.config["recursionlevel"]
+        if rec_level >= 0 and self.recursion_level >= rec_level:
+            return
+        for url, line in sitemap_urls:
+            log.debug(LOG_CHECK, "Adding sitemap %r from %r", url, roboturl)
+            url_data = PendingUrl(url, self.recursion_level+1,
+                self.aggregate, parent_url=roboturl, line=line)
+            self.aggregate.urlqueue.put(url_data)
 
     def add_size_info (self):
         """Get size of URL content from HTTP header."""
@@ -310,22 +339,60 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
         if self.content_type is None:
             if self.headers:
                 self.content_type = headers.get_content_type(self.headers)
+                if self.may_be_sitemap():
+                    self.set_sitemap_content_type()
             else:
                 self.content_type = u""
         return self.content_type
 
+    def may_be_sitemap (self):
+        """Check if the content type allows sitemap content. Only
+        content that is recursed into is downloaded to detect sitemaps,
+        since the links of other URLs are never parsed."""
+        if not (self.valid and self.method_get_allowed):
+            return False
+        if self.extern[0]:
+            return False
+        rec_level = self.aggregate.config["recursionlevel"]
+        if rec_level >= 0 and self.recursion_level >= rec_level:
+            return False
+        if self.content_type in sitemapparse.XmlMimetypes:
+            return True
+        return (self.content_type in sitemapparse.GzipMimetypes and
+                self.urlparts[2].endswith(".gz"))
+
+    def set_sitemap_content_type (self):
+        """Look at the content to detect sitemap or sitemap index
+        content and set the content type accordingly."""
+        try:
+            data = self.get_content()
+        except tuple(ExcList):
+            log.debug(LOG_CHECK, "Could not get content of %r to detect sitemap", self.url)
+            return
+        if self.content_type is None:
+            # the GET request replaced the headers
+            self.content_type = headers.get_content_type(self.headers)
+        mime = sitemapparse.guess_mimetype(data)
+        if mime is not None:
+            self.content_type = mime
+
     def follow_redirections (self, set_result=True):
         """Follow all redirections of http response."""
         log.debug(LOG_CHECK, "follow all redirections")
         redirected = self.url
         tries = 0
-        while self.response.status in [301, 302] and self.headers and \
-              tries < self.max_redirects:
-            num = self.follow_redirection(set_result, redirected)
-            if num == -1:
-                return num
-            redirected = urlutil.urlunsplit(self.urlparts)
-            tries += num
+        start = time.time()
+        try:
+            while self.response.status in [301, 302] and self.headers and \
+                  tries < self.max_redirects:
+                num = self.follow_redirection(set_result, redirected)
+                if num == -1:
+                    return num
+                redirected = urlutil.urlunsplit(self.urlparts)
+                tries += num
+        finally:
+            if tries:
+                self.add_timing("redirect", time.time() - start)
         return tries
 
     def follow_redirection (self, set_result, redirected):
@@ -469,6 +536,19 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
             return default
         return unicode_safe(value, encoding=HEADER_ENCODING)
 
+    def get_content_validator (self):
+        """Return the ETag or Last-Modified header value, or None if
+        the server sent none of them."""
+        if not self.headers:
+            return None
+        etag = self.getheader("ETag")
+        if etag:
+            return u"etag:%s" % etag
+        modified = self.getheader("Last-Modified")
+        if modified:
+            return u"modified:%s" % modified
+        return None
+
     def check_response (self):
         """Check final result and log it."""
         if self.response.status >= 400:
@@ -517,10 +597,15 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
         """Send HTTP request and get response object."""
         scheme, host, port = self.get_netloc()
         log.debug(LOG_CHECK, "Connecting to %r", host)
-        self.get_http_object(scheme, host, port)
-        self.add_connection_request()
-        self.add_connection_headers()
-        self.response = self.url_connection.getresponse(buffering=True)
+        try:
+            with trace.Span(u"request", "http", {"method": self.method}):
+                self.get_http_object(scheme, host, port)
+                self.add_connection_request()
+                self.add_connection_headers()
+                self.response = self.url_connection.getresponse(
+                    buffering=True)
+        finally:
+            self.add_connection_timing()
         self.headers = self.response.msg
         self.content_type = None
         self.persistent = not self.response.will_close
@@ -540,6 +625,16 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
             self.response.reason = unicode_safe(self.response.reason)
         log.debug(LOG_CHECK, "Response: %s %s", self.response.status, self.response.reason)
 
+    def add_connection_timing (self):
+        """Add the seconds spent in the connection phases of the
+        current request and reset them for the next request on this
+        connection."""
+        if self.url_connection is None:
+            return
+        for phase, seconds in self.url_connection.timing.items():
+            self.add_timing(phase, seconds)
+        self.url_connection.timing.clear()
+
     def add_connection_request(self):
         """Add connection request."""
         # the anchor fragment is not part of a HTTP URL, see
@@ -661,7 +756,8 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
                 h.set_debuglevel(1)
             return h
         self.get_pooled_connection(scheme, host, port, create_connection)
-        self.url_connection.connect()
+        with trace.Span(u"connect", "http", {"host": host}):
+            self.url_connection.connect()
 
     def read_content (self):
         """Get content of the URL target. The content data is cached after
@@ -804,6 +900,8 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport, pooledc
             self.parse_word()
         elif ctype == "text/vnd.wap.wml":
             self.parse_wml()
+        elif self.ContentMimetypes.get(ctype) == "sitemap":
+            self.parse_sitemap()
         self.add_num_url_info()
 
     def get_robots_txt_url (self):
@@ -23,6 +23,8 @@ from . import unknownurl
 class IgnoreUrl (unknownurl.UnknownUrl):
     """Always ignored URL."""
 
+    __slots__ = ()
+
     def ignored (self):
         """Return True if this URL scheme is ignored."""
         return True
@@ -49,6 +49,8 @@ def get_intern_pattern (url):
 class InternPatternUrl (urlbase.UrlBase):
     """Class supporting an intern URL pattern."""
 
+    __slots__ = ()
+
     def get_intern_pattern (self, url=None):
         """
         Get pattern for intern URL matching.
@@ -71,6 +71,8 @@ class MailtoUrl (urlbase.UrlBase):
     Url link with mailto scheme.
     """
 
+    __slots__ = ('addresses',)
+
     def build_url (self):
         """Call super.build_url(), extract list of mail addresses from URL,
         and check their syntax.
@@ -34,6 +34,8 @@ class NntpUrl (urlbase.UrlBase):
     Url link with NNTP scheme.
     """
 
+    __slots__ = ()
+
     def check_connection (self):
         """
         Connect to NNTP server and try to request the URL article
@@ -17,14 +17,20 @@
 """
 Mixin class for URLs that pool connections.
 """
+import time
 
 
 class PooledConnection (object):
     """Support for connection pooling."""
 
+    __slots__ = ()
+
     def get_pooled_connection(self, scheme, host, port, create_connection):
-        """Get a connection from the connection pool."""
+        """Get a connection from the connection pool. The seconds spent
+        waiting for a free connection or for the host wait time are
+        added as "poolwait" timing."""
         get_connection = self.aggregate.connections.get
+        start = time.time()
         while True:
             connection = get_connection(scheme, host, port, create_connection)
             if hasattr(connection, 'acquire'):
@@ -38,3 +44,4 @@ class PooledConnection (object):
             else:
                 self.url_connection = connection
                 break
+        self.add_timing("poolwait", time.time() - start)
@@ -25,6 +25,8 @@ from .. import LinkCheckerError, log, LOG_CHECK, url as urlutil, httputil
 class ProxySupport (object):
     """Get support for proxying and for URLs with user:pass@host setting."""
 
+    __slots__ = ()
+
     def set_proxy (self, proxy):
         """Parse given proxy information and store parsed values.
         Note that only http:// proxies are supported, both for ftp://
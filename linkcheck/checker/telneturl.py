@@ -33,6 +33,8 @@ class TelnetUrl (urlbase.UrlBase):
     Url link with telnet scheme.
     """
 
+    __slots__ = ('user', 'password')
+
     def build_url (self):
         """
         Call super.build_url(), set default telnet port and initialize
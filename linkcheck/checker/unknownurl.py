@@ -138,6 +138,8 @@ is_unknown_url = ignored_schemes_re.search
 class UnknownUrl (urlbase.UrlBase):
     """Handle unknown or just plain broken URLs."""
 
+    __slots__ = ()
+
     def local_check (self):
         """Only logs that this URL is unknown."""
         if self.extern[0] and self.extern[1]:
@@ -26,11 +26,12 @@ import time
 import errno
 import socket
 import select
+import hashlib
 
-from . import absolute_url, get_url_from
+from . import absolute_url, PendingUrl
 from .. import (log, LOG_CHECK, LOG_CACHE, httputil, httplib2 as httplib,
   strformat, LinkCheckerError, url as urlutil, trace, clamav, winutil, geoip,
-  fileutil, get_link_pat)
+  fileutil, get_link_pat, sitemapparse)
 from ..HtmlParser import htmlsax
 from ..htmlutil import linkparse
 from ..network import iputil
@@ -85,6 +86,21 @@ def getXmlText (parent, tag):
 class UrlBase (object):
     """An URL with additional information like validity etc."""
 
+    # use slots instead of an instance dictionary to save memory
+    __slots__ = (
+        'aggregate', 'anchor', 'anchors', 'base_ref', 'base_url',
+        'cache_content_key', 'cache_url_key', 'caching', 'charset',
+        'checktime', 'column', 'content_bytes', 'content_digest',
+        'content_type', 'data',
+        'dlsize', 'dltime',
+        'do_check_content', 'encoding', 'extern', 'has_result', 'host',
+        'info', 'lastmod', 'line', 'logged', 'modified', 'name', 'num_urls',
+        'parent_url', 'port', 'recorded_links', 'recursion_level', 'result',
+        'scheme', 'size', 'timing',
+        'title', 'url', 'url_connection', 'urlparts', 'userinfo', 'valid',
+        'warnings',
+    )
+
     # file types that can be parsed recursively
     ContentMimetypes = {
         "text/html": "html",
@@ -101,11 +117,16 @@ class UrlBase (object):
         "text/plain+chromium": "chromium",
         "application/x-plist+safari": "safari",
         "text/vnd.wap.wml": "wml",
+        sitemapparse.SitemapMimetype: "sitemap",
+        sitemapparse.SitemapIndexMimetype: "sitemap",
     }
 
     # Set maximum file size for downloaded files in bytes.
     MaxFilesizeBytes = 1024*1024*5
 
+    # the URL queue uses this to distinguish URL objects from pending URLs
+    pending = False
+
     def __init__ (self, base_url, recursion_level, aggregate,
                   parent_url=None, base_ref=None, line=-1, column=-1,
                   name=u"", url_encoding=None, extern=None):
@@ -194,10 +215,20 @@ class UrlBase (object):
         self.dlsize = -1
         # check time
         self.checktime = 0
+        # seconds spent in the check phases, eg. "dns" or "parse"
+        self.timing = {}
         # connection object
         self.url_connection = None
         # data of url content,  (data == None) means no data is available
         self.data = None
+        # number of content bytes reserved in the content budget
+        self.content_bytes = 0
+        # SHA-1 digest of the content, computed when downloading
+        self.content_digest = None
+        # links added while parsing in incremental mode
+        self.recorded_links = None
+        # set by the aggregate logger
+        self.logged = False
         # cache keys, are set by build_url() calling set_cache_keys()
         self.cache_url_key = None
         self.cache_content_key = None
@@ -213,6 +244,8 @@ class UrlBase (object):
         self.content_type = None
         # number of URLs in page content
         self.num_urls = 0
+        # last modification date from a sitemap entry linking this URL
+        self.lastmod = None
 
     def set_result (self, msg, valid=True, overwrite=False):
         """
@@ -318,6 +351,13 @@ class UrlBase (object):
         if s not in self.info:
             self.info.append(s)
 
+    def add_timing (self, phase, seconds):
+        """
+        Add seconds spent in a check phase. Phases that are run more
+        than once, eg. for redirections, are summed up.
+        """
+        self.timing[phase] = self.timing.get(phase, 0) + seconds
+
     def copy_from_cache (self, cache_data):
         """
         Fill attributes from cache data.
@@ -425,7 +465,8 @@ class UrlBase (object):
             # use base reference as parent url
             if ":" not in self.base_ref:
                 # some websites have a relative base reference
-                self.base_ref = urljoin(self.parent_url, self.base_ref)
+                self.base_ref = self.aggregate.internpool.intern(
+                    urljoin(self.parent_url, self.base_ref))
             self.url = urljoin(self.base_ref, base_url)
         elif self.parent_url:
             # strip the parent url query and anchor
@@ -485,8 +526,15 @@ class UrlBase (object):
         """Main check function for checking this URL."""
         if self.aggregate.config["trace"]:
             trace.trace_on()
+        resultcache = self.aggregate.resultcache
+        if resultcache is not None and resultcache.load(self):
+            self.add_info(_("Result copied from result cache."))
+            return
         try:
-            self.local_check()
+            with trace.Span(u"check", "url", {"url": self.url}):
+                self.local_check()
+            if resultcache is not None:
+                resultcache.store(self)
         except (socket.error, select.error):
             # on Unix, ctrl-c can raise
             # error: (4, 'Interrupted system call')
@@ -496,7 +544,8 @@ class UrlBase (object):
             else:
                 raise
         finally:
-            # close/release possible open connection
+            # release content memory and possible open connection
+            self.free_content()
             self.close_connection()
 
     def add_country_info (self):
@@ -541,9 +590,20 @@ class UrlBase (object):
         if self.do_check_content:
             # check content and recursion
             try:
-                self.check_content()
-                if self.allows_recursion():
-                    self.parse_url()
+                links = self.get_unchanged_links()
+                if links is None or self.data is not None:
+                    self.check_content()
+                if links is not None:
+                    # only the parsing is skipped for unchanged pages
+                    self.add_stored_links(links)
+                elif self.allows_recursion():
+                    original = self.get_duplicate_content_url()
+                    if original is None:
+                        self.parse_url_recorded()
+                    else:
+                        self.add_info(_("Content is the same as "
+                            "%(url)s, links are not parsed again.") %
+                            {"url": original})
                 # check content size
                 self.check_size()
             except tuple(ExcList):
@@ -623,6 +683,95 @@ class UrlBase (object):
         log.debug(LOG_CHECK, "... yes, recursion.")
         return True
 
+    def get_content_validator (self):
+        """Return a value which changes when the content changes, without
+        downloading the content, or None if not available.
+        Can be overridden in subclasses."""
+        return None
+
+    def get_content_digest (self):
+        """Return SHA-1 digest of the content."""
+        self.get_content()
+        return unicode(self.content_digest)
+
+    def get_duplicate_content_url (self):
+        """Return the content cache key of an already parsed URL with the
+        same content and the same resolution of relative links, or None
+        if the content must be parsed."""
+        return self.aggregate.duplicates.get_original(
+            self.get_content_digest(), self.cache_content_key,
+            self.recursion_level)
+
+    def get_unchanged_links (self):
+        """In incremental mode, return the stored links of this page if
+        its content has not changed since it was parsed, else None.
+        A page is unchanged if its content validator or, after
+        downloading, its content digest is the same. The validator is
+        not used if the content checks need the content anyway."""
+        linkgraph = self.aggregate.linkgraph
+        if linkgraph is None or not self.valid or self.extern[0]:
+            return None
+        if self.anchor and self.aggregate.config["anchors"]:
+            # the anchors of the content must be checked
+            return None
+        rec_level = self.aggregate.config["recursionlevel"]
+        if rec_level >= 0 and self.recursion_level >= rec_level:
+            return None
+        if not self.can_get_content():
+            return None
+        page = linkgraph.get_page(self.cache_content_key)
+        if page is None:
+            return None
+        digest, validator = page
+        current = None
+        if not self.needs_content_check():
+            current = self.get_content_validator()
+        if current is None or current != validator:
+            if self.get_content_digest() != digest:
+                return None
+        return linkgraph.get_links(self.cache_content_key)
+
+    def needs_content_check (self):
+        """Check if check_content() reads the content for configured
+        warning regular expressions, syntax or virus checks."""
+        config = self.aggregate.config
+        if self.aggregate.warningregex:
+            return True
+        if self.extern[0]:
+            return False
+        return bool(config["checkhtml"] or config["checkcss"] or
+                    config["scanvirus"])
+
+    def add_stored_links (self, links):
+        """Queue stored links of an unchanged page."""
+        log.debug(LOG_CHECK, "Adding %d stored links of %s", len(links), self)
+        self.add_info(_("Content is unchanged, using stored links."))
+        for url, line, column, name, base, lastmod in links:
+            self.add_url(url, line=line, column=column, name=name, base=base,
+                         lastmod=lastmod)
+        self.add_num_url_info()
+
+    def parse_url_recorded (self):
+        """Parse URL content. In incremental mode the added links are
+        stored with the content digest."""
+        linkgraph = self.aggregate.linkgraph
+        start = time.time()
+        if linkgraph is None:
+            with trace.Span(u"parse", "url"):
+                self.parse_url()
+            self.add_timing("parse", time.time() - start)
+            return
+        self.recorded_links = []
+        try:
+            with trace.Span(u"parse", "url"):
+                self.parse_url()
+            self.add_timing("parse", time.time() - start)
+            linkgraph.store_page(self.cache_content_key,
+                self.get_content_digest(), self.get_content_validator(),
+                self.recorded_links)
+        finally:
+            self.recorded_links = None
+
     def content_allows_robots (self):
         """
         Return False if the content of this URL forbids robots to
@@ -747,11 +896,28 @@ class UrlBase (object):
         """Precondition: url_connection is an opened URL."""
         if self.data is None:
             log.debug(LOG_CHECK, "Get content of %r", self.url)
+            budget = self.aggregate.contentbudget
+            # reserve the known size before downloading, or the maximum
+            # size if unknown
+            self.content_bytes = budget.acquire(
+                budget.get_reservation(self.size, self.MaxFilesizeBytes))
             t = time.time()
-            self.data, self.dlsize = self.read_content()
+            with trace.Span(u"download", "url"):
+                self.data, self.dlsize = self.read_content()
             self.dltime = time.time() - t
+            self.content_bytes = budget.resize(self.content_bytes,
+                                               len(self.data))
+            self.content_digest = hashlib.sha1(self.data).hexdigest()
         return self.data
 
+    def free_content (self):
+        """Release the content data and its reserved bytes in the
+        content budget. Called after checking and parsing."""
+        self.data = None
+        if self.content_bytes:
+            self.aggregate.contentbudget.release(self.content_bytes)
+            self.content_bytes = 0
+
     def read_content (self):
         """Return data and data size for this URL.
         Can be overridden in subclasses."""
@@ -786,29 +952,27 @@ class UrlBase (object):
                 self.scan_virus()
 
     def check_warningregex (self):
-        """Check if content matches a given regular expression."""
-        config = self.aggregate.config
-        warningregex = config["warningregex"]
-        if not (warningregex and self.valid and self.is_parseable()):
+        """Check if content matches the configured warning regular
+        expressions."""
+        scanner = self.aggregate.warningregex
+        if not (scanner and self.valid):
+            return
+        indices = scanner.get_patterns(self.get_content_type(),
+            self.extern[0], self.is_parseable())
+        if not indices:
             return
-        log.debug(LOG_CHECK, "checking content for warning regex")
+        log.debug(LOG_CHECK, "checking content for %d warning regex(es)", len(indices))
         try:
             content = self.get_content()
-            curpos = 0
-            curline = 1
-            # add warnings for found matches, up to the maximum allowed number
-            for num, match in enumerate(warningregex.finditer(content)):
-                # calculate line number for match
-                curline += content.count('\n', curpos, match.start())
-                curpos = match.start()
+            for pattern, match, line in scanner.scan(content, indices):
                 # add a warning message
-                msg = _("Found %(match)r at line %(line)d in link contents.")
+                if pattern.name is None:
+                    msg = _("Found %(match)r at line %(line)d in link contents.")
+                else:
+                    msg = _("Found %(match)r of warning regex %(name)s at line %(line)d in link contents.")
                 self.add_warning(msg %
-                   {"match": match.group(), "line": curline},
+                   {"match": match, "line": line, "name": pattern.name},
                    tag=WARN_URL_WARNREGEX_FOUND)
-                # check for maximum number of warnings
-                if num >= config["warningregex_max"]:
-                    break
         except tuple(ExcList):
             value = self.handle_exception()
             self.set_result(unicode_safe(value), valid=False)
@@ -940,19 +1104,26 @@ class UrlBase (object):
         log.debug(LOG_CHECK, "Parsing HTML %s", self)
         self.find_links(self.add_url)
 
-    def add_url (self, url, line=0, column=0, name=u"", base=None):
+    def add_url (self, url, line=0, column=0, name=u"", base=None,
+                 lastmod=None):
         """Queue URL data for checking."""
         self.num_urls += 1
+        if self.recorded_links is not None:
+            self.recorded_links.append((url, line, column, name, base, lastmod))
         if base:
             base_ref = urlutil.url_norm(base)[0]
         else:
             base_ref = None
-        url_data = get_url_from(url, self.recursion_level+1, self.aggregate,
+        # The URL object is created when the URL is taken from the queue.
+        # Strict extern URLs that are only detected after building the
+        # URL are skipped there.
+        url_data = PendingUrl(url, self.recursion_level+1, self.aggregate,
             parent_url=self.url, base_ref=base_ref, line=line, column=column,
-            name=name, parent_content_type=self.content_type)
-        if url_data.has_result or not url_data.extern[1]:
-            # Only queue URLs which have a result or are not strict extern.
-            self.aggregate.urlqueue.put(url_data)
+            name=name, parent_content_type=self.content_type, lastmod=lastmod)
+        if url_data.is_strict_extern():
+            log.debug(LOG_CHECK, "skip strict extern %s", url_data)
+            return
+        self.aggregate.urlqueue.put(url_data)
 
     def add_num_url_info(self):
         """Add number of URLs parsed to info."""
@@ -982,6 +1153,19 @@ class UrlBase (object):
         for url, name in parse_bookmark_data(self.get_content()):
             self.add_url(url, name=name)
 
+    def parse_sitemap (self):
+        """Parse a sitemap or sitemap index file. Entries are parsed
+        incrementally and gzip compressed files are supported."""
+        log.debug(LOG_CHECK, "Parsing sitemap %s", self)
+        try:
+            for url, lastmod in sitemapparse.parse_sitemap_data(self.get_content()):
+                self.add_url(url, lastmod=lastmod)
+        except (SyntaxError, IOError, EOFError) as msg:
+            # cElementTree raises a SyntaxError subclass on parse errors
+            self.add_warning(_("Error parsing sitemap: %(msg)s") %
+                {"msg": unicode_safe(str(msg))},
+                tag=WARN_URL_ERROR_GETTING_CONTENT)
+
     def parse_text (self):
         """Parse a text file with one url per line; comment and blank
         lines are ignored."""
@@ -1153,6 +1337,8 @@ class UrlBase (object):
           Number of seconds needed to download URL content, default: -1
         - url_data.dlsize: int
           Size of downloaded URL content, default: -1
+        - url_data.timing: dict
+          Seconds spent in the check phases, eg. {"dns": 0.01}.
         - url_data.info: list of unicode
           Additional information about this URL.
         - url_data.line: int
@@ -1167,6 +1353,8 @@ class UrlBase (object):
           Recursion level until reaching this URL from start URL
         - url_data.last_modified: datetime
           Last modification date of retrieved page (or None).
+        - url_data.lastmod: unicode
+          Last modification date given by a sitemap entry (or None).
         """
         return dict(valid=self.valid,
           extern=self.extern[0],
@@ -1182,6 +1370,7 @@ class UrlBase (object):
           checktime=self.checktime,
           dltime=self.dltime,
           dlsize=self.dlsize,
+          timing=dict(self.timing),
           info=self.info,
           line=self.line,
           column=self.column,
@@ -1189,6 +1378,7 @@ class UrlBase (object):
           content_type=self.get_content_type(),
           level=self.recursion_level,
           modified=self.modified,
+          lastmod=self.lastmod,
         )
 
     def to_wire (self):
@@ -1212,8 +1402,10 @@ urlDataAttr = [
     'checktime',
     'dltime',
     'dlsize',
+    'timing',
     'info',
     'modified',
+    'lastmod',
     'line',
     'column',
     'cache_url_key',
@@ -0,0 +1,219 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Scan URL content for multiple named warning regular expressions
+in one pass.
+"""
+import re
+import bisect
+from ..decorators import synchronized
+from ..lock import get_lock
+
+_cache_lock = get_lock("warningregex")
+
+# valid values for the scope of a warning regex
+Scopes = ("all", "intern", "extern")
+
+# patterns with backreferences, named groups or inline flags cannot
+# be combined safely with other patterns into one alternation
+_uncombinable = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?[iLmsux]")
+
+
+class WarningRegex (object):
+    """A named warning regular expression with optional restrictions
+    to content types and intern or extern URLs."""
+
+    def __init__ (self, name, regex, contenttypes=None, scope="all"):
+        """Store pattern settings.
+        @param name: name of the pattern or None
+        @ptype name: unicode or None
+        @param regex: compiled regular expression
+        @ptype regex: regular expression object
+        @param contenttypes: MIME types to scan, for example "text/html"
+          or "text/*"; if empty only parseable content is scanned
+        @ptype contenttypes: list of strings or None
+        @param scope: one of "all", "intern" or "extern"
+        @ptype scope: string
+        """
+        if scope not in Scopes:
+            raise ValueError("invalid warning regex scope %r" % scope)
+        self.name = name
+        self.regex = regex
+        self.contenttypes = [x.lower() for x in (contenttypes or [])]
+        self.scope = scope
+        self.combinable = not (regex.flags & ~re.UNICODE or
+                               _uncombinable.search(regex.pattern))
+
+    def applies (self, content_type, extern, parseable):
+        """Check if this pattern applies to content with given type.
+        @param content_type: MIME type of the content
+        @ptype content_type: string
+        @param extern: True if the URL is extern
+        @ptype extern: bool
+        @param parseable: True if the content is parseable
+        @ptype parseable: bool
+        @return: True if content should be scanned with this pattern
+        @rtype: bool
+        """
+        if self.scope == "intern" and extern:
+            return False
+        if self.scope == "extern" and not extern:
+            return False
+        if not self.contenttypes:
+            return parseable
+        content_type = content_type.lower()
+        for mime in self.contenttypes:
+            if mime == content_type:
+                return True
+            if mime.endswith("/*") and content_type.startswith(mime[:-1]):
+                return True
+        return False
+
+
+class LineIndex (object):
+    """Map content offsets to line numbers with a precomputed list
+    of newline offsets and binary search."""
+
+    def __init__ (self, content):
+        """Compute the offsets of all newlines in content."""
+        newlines = []
+        append = newlines.append
+        pos = content.find('\n')
+        while pos != -1:
+            append(pos)
+            pos = content.find('\n', pos + 1)
+        self.newlines = newlines
+
+    def line (self, offset):
+        """Return line number (starting with 1) of given content offset."""
+        return bisect.bisect_left(self.newlines, offset) + 1
+
+
+class WarningRegexScanner (object):
+    """Run all applicable warning regular expressions over the content
+    in one pass. Patterns that can be combined are joined into one
+    alternation of named groups; note that in this case overlapping
+    matches of different patterns are reported only once for the
+    leftmost match."""
+
+    def __init__ (self, patterns, maxmatches):
+        """Store patterns.
+        @param patterns: list of warning regex patterns
+        @ptype patterns: list of WarningRegex
+        @param maxmatches: maximum number of reported matches per pattern
+        @ptype maxmatches: int
+        """
+        self.patterns = patterns
+        self.maxmatches = maxmatches
+        # cache of combined regular expressions, keyed by the tuple
+        # of applicable pattern indices
+        self.combined = {}
+
+    def __len__ (self):
+        """Return number of patterns."""
+        return len(self.patterns)
+
+    def get_patterns (self, content_type, extern, parseable):
+        """Get indices of all patterns applying to given content.
+        @return: tuple of pattern indices
+        @rtype: tuple of int
+        """
+        return tuple(i for i, pattern in enumerate(self.patterns)
+                     if pattern.applies(content_type, extern, parseable))
+
+    @synchronized(_cache_lock)
+    def get_combined (self, indices):
+        """Get the combined regular expression for the combinable patterns
+        of the given indices, and the indices of the remaining patterns.
+        @return: tuple (combined regex or None, list of other indices)
+        @rtype: tuple (regular expression object or None, list of int)
+        """
+        if indices not in self.combined:
+            combined = []
+            separate = []
+            for i in indices:
+                if self.patterns[i].combinable:
+                    combined.append(i)
+                else:
+                    separate.append(i)
+            if len(combined) > 1:
+                regex = re.compile("|".join("(?P<_wr%d>%s)" %
+                    (i, self.patterns[i].regex.pattern) for i in combined))
+            else:
+                # no need for an alternation
+                separate = sorted(combined + separate)
+                regex = None
+            self.combined[indices] = (regex, separate)
+        return self.combined[indices]
+
+    def scan (self, content, indices):
+        """Scan content with patterns of given indices.
+        @param content: the content to scan
+        @ptype content: string
+        @param indices: pattern indices as returned by get_patterns()
+        @ptype indices: tuple of int
+        @return: list of tuples (pattern, match string, line number),
+          sorted by line number
+        @rtype: list of tuples (WarningRegex, string, int)
+        """
+        if not indices:
+            return []
+        regex, separate = self.get_combined(indices)
+        found = []
+        if regex is not None:
+            counts = dict.fromkeys(indices, 0)
+            active = len(counts) - len(separate)
+            for match in regex.finditer(content):
+                i = int(match.lastgroup[3:])
+                if counts[i] >= self.maxmatches:
+                    continue
+                counts[i] += 1
+                found.append((match.start(), i, match.group()))
+                if counts[i] >= self.maxmatches:
+                    active -= 1
+                    if not active:
+                        break
+        for i in separate:
+            for num, match in enumerate(self.patterns[i].regex.finditer(content)):
+                if num >= self.maxmatches:
+                    break
+                found.append((match.start(), i, match.group()))
+        if not found:
+            return []
+        found.sort()
+        lines = LineIndex(content)
+        return [(self.patterns[i], group, lines.line(offset))
+                for offset, i, group in found]
+
+
+def get_scanner (config):
+    """Get a warning regex scanner from the configuration, or None
+    if no warning regular expressions are configured.
+    @param config: the configuration
+    @ptype config: linkcheck.configuration.Configuration
+    @return: scanner or None
+    @rtype: WarningRegexScanner or None
+    """
+    patterns = []
+    if config["warningregex"]:
+        patterns.append(WarningRegex(None, config["warningregex"]))
+    for entry in config["warningregexes"]:
+        patterns.append(WarningRegex(entry["name"], entry["pattern"],
+            contenttypes=entry["contenttypes"], scope=entry["scope"]))
+    if not patterns:
+        return None
+    return WarningRegexScanner(patterns, config["warningregex_max"])
@@ -152,11 +152,14 @@ class Configuration (dict):
         self['cookiefile'] = None
         self["status"] = False
         self["status_wait_seconds"] = 5
+        self["flushseconds"] = 1
+        self["outputqueuesize"] = 1000
         self["fileoutput"] = []
         self['output'] = 'text'
         self['logger'] = None
         self["warningregex"] = None
         self["warningregex_max"] = 5
+        self["warningregexes"] = []
         self["warnsizebytes"] = None
         self["nntpserver"] = os.environ.get("NNTP_SERVER", None)
         self["threads"] = 100
@@ -168,11 +171,27 @@ class Configuration (dict):
         self["clamavconf"] = clamav.canonical_clamav_conf()
         self["useragent"] = UserAgent
         self["debugmemory"] = False
+        self["debuglocks"] = False
         self["localwebroot"] = None
         self["sslverify"] = True
         self["warnsslcertdaysvalid"] = 14
         self["maxrunseconds"] = None
         self["maxnumurls"] = None
+        self["inputqueuesize"] = 10000
+        self["maxbufferedbytes"] = 1024*1024*100
+        self["resultcache"] = None
+        self["incremental"] = None
+        self["robotstxtcachesize"] = 10000
+        self["robotstxtmaxage"] = 60*60*24
+        self["robotstxtcache"] = None
+        self["checkpoint"] = None
+        self["checkpointseconds"] = 300
+        self["resume"] = False
+        self["coordinator"] = None
+        self["worker"] = None
+        self["metrics"] = None
+        self["leaseseconds"] = 300
+        self["resultcachettl"] = {"valid": 60*60*24, "invalid": 60*60}
         self["maxconnectionshttp"] = 10
         self["maxconnectionshttps"] = 10
         self["maxconnectionsftp"] = 2
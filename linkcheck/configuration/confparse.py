@@ -57,6 +57,8 @@ class LCConfigParser (ConfigParser.RawConfigParser, object):
             self.read_checking_config()
             self.read_authentication_config()
             self.read_filtering_config()
+            self.read_warningregex_config()
+            self.read_resultcache_config()
         except Exception as msg:
             raise LinkCheckerError(
               _("Error parsing configuration: %s") % unicode(msg))
@@ -120,6 +122,8 @@ class LCConfigParser (ConfigParser.RawConfigParser, object):
             parts = [f.strip().lower() for f in val.split(',')]
             self.config.set_debug(parts)
         self.read_boolean_option(section, "status")
+        self.read_int_option(section, "flushseconds", min=0)
+        self.read_int_option(section, "outputqueuesize", min=1)
         if self.has_option(section, "log"):
             val = self.get(section, "log").strip().lower()
             self.config['output'] = val
@@ -162,6 +166,7 @@ class LCConfigParser (ConfigParser.RawConfigParser, object):
         self.read_boolean_option(section, "scanvirus")
         self.read_boolean_option(section, "clamavconf")
         self.read_boolean_option(section, "debugmemory")
+        self.read_boolean_option(section, "debuglocks")
         if self.has_option(section, "cookies"):
             self.config["sendcookies"] = self.config["storecookies"] = \
                 self.getboolean(section, "cookies")
@@ -173,6 +178,59 @@ class LCConfigParser (ConfigParser.RawConfigParser, object):
             self.read_string_option(section, "sslverify")
         self.read_int_option(section, "warnsslcertdaysvalid", min=1)
         self.read_int_option(section, "maxrunseconds", min=0)
+        self.read_int_option(section, "inputqueuesize", min=1)
+        self.read_int_option(section, "maxbufferedbytes", min=0)
+        self.read_string_option(section, "incremental")
+        self.read_int_option(section, "robotstxtcachesize", min=1)
+        self.read_int_option(section, "robotstxtmaxage", min=0)
+        self.read_string_option(section, "robotstxtcache")
+        self.read_string_option(section, "checkpoint")
+        self.read_int_option(section, "checkpointseconds", min=1)
+        self.read_int_option(section, "leaseseconds", min=1)
+
+    def read_warningregex_config (self):
+        """Read named warning regular expressions from all sections
+        starting with "warningregex:"."""
+        prefix = "warningregex:"
+        for section in self.sections():
+            if not section.startswith(prefix):
+                continue
+            name = section[len(prefix):].strip()
+            if not name:
+                raise LinkCheckerError(_("missing warning regex name in section %(section)r") % {"section": section})
+            if not self.has_option(section, "pattern"):
+                raise LinkCheckerError(_("missing pattern in section %(section)r") % {"section": section})
+            contenttypes = []
+            if self.has_option(section, "contenttypes"):
+                contenttypes = [x.strip() for x in
+                    self.get(section, "contenttypes").split(",") if x.strip()]
+            scope = "all"
+            if self.has_option(section, "scope"):
+                scope = self.get(section, "scope").strip().lower()
+                if scope not in ("all", "intern", "extern"):
+                    raise LinkCheckerError(_("invalid scope %(scope)r in section %(section)r") % {"scope": scope, "section": section})
+            self.config["warningregexes"].append({
+                "name": name,
+                "pattern": re.compile(self.get(section, "pattern")),
+                "contenttypes": contenttypes,
+                "scope": scope,
+            })
+
+    def read_resultcache_config (self):
+        """Read result cache file name and time-to-live values in
+        seconds from section "resultcache"."""
+        section = "resultcache"
+        if not self.has_section(section):
+            return
+        for option in self.options(section):
+            if option == "filename":
+                filename = self.get(section, option)
+                self.config["resultcache"] = os.path.expanduser(filename)
+                continue
+            validity = option.rsplit(".", 1)[-1]
+            if validity not in ("valid", "invalid"):
+                raise LinkCheckerError(_("invalid option %(option)r in section %(section)r") % {"option": option, "section": section})
+            self.config["resultcachettl"][option] = self.getint(section, option)
 
     def read_authentication_config (self):
         """Read configuration options in section "authentication"."""
@@ -24,7 +24,7 @@ from cStringIO import StringIO
 from .. import log, LOG_CHECK, LinkCheckerInterrupt, cookies, dummy, \
   fileutil, strformat
 from ..cache import urlqueue, robots_txt, cookie, connection
-from . import aggregator, console
+from . import aggregator, console, distributed
 from ..httplib2 import HTTPMessage
 
 
@@ -132,7 +132,7 @@ def check_urls (aggregate):
         raise
     try:
         aggregate.logger.start_log_output()
-        if not aggregate.urlqueue.empty():
+        if not aggregate.urlqueue.empty() or aggregate.feeders:
             aggregate.start_threads()
         check_url(aggregate)
         aggregate.finish()
@@ -165,7 +165,10 @@ def check_url (aggregate):
         except urlqueue.Timeout:
             # Cleanup threads every 30 seconds
             aggregate.remove_stopped_threads()
-            if not any(aggregate.get_check_threads()):
+            if not (any(aggregate.get_check_threads()) or
+                    aggregate.urlqueue.has_producers() or
+                    aggregate.coordinator is not None and
+                    aggregate.coordinator.is_alive()):
                 break
 
 
@@ -213,9 +216,17 @@ def abort_now ():
 
 def get_aggregate (config):
     """Get an aggregator instance with given configuration."""
-    _urlqueue = urlqueue.UrlQueue(max_allowed_puts=config["maxnumurls"])
+    if config["worker"]:
+        # URLs are leased from the coordinator
+        _urlqueue = distributed.WorkerQueue(config["worker"],
+                                            config["threads"])
+    else:
+        _urlqueue = urlqueue.UrlQueue(max_allowed_puts=config["maxnumurls"])
     connections = connection.ConnectionPool(config.get_connectionlimits(), wait=config["wait"])
     cookies = cookie.CookieJar()
-    _robots_txt = robots_txt.RobotsTxt()
-    return aggregator.Aggregate(config, _urlqueue, connections,
-                                cookies, _robots_txt)
+    _robots_txt = robots_txt.get_robots_txt(config)
+    aggregate = aggregator.Aggregate(config, _urlqueue, connections,
+                                     cookies, _robots_txt)
+    if config["worker"]:
+        _urlqueue.aggregate = aggregate
+    return aggregate
@@ -18,16 +18,19 @@
 Aggregate needed object instances for checker threads.
 """
 import time
-import threading
 from .. import log, LOG_CHECK, strformat
 from ..decorators import synchronized
-from ..cache import urlqueue
-from . import logger, status, checker, cleanup
+from ..lock import get_lock, get_rlock
+from ..cache import (urlqueue, contentbudget, internpool, results,
+    linkgraph, duplicates)
+from ..checker import warningregex
+from . import (logger, status, checker, cleanup, feeder, checkpoint,
+    distributed, metrics)
 
 
-_w3_time_lock = threading.Lock()
-_threads_lock = threading.RLock()
-_download_lock = threading.Lock()
+_w3_time_lock = get_lock("w3_time")
+_threads_lock = get_rlock("threads")
+_download_lock = get_lock("download")
 
 class Aggregate (object):
     """Store thread-safe data collections for checker threads."""
@@ -43,21 +46,60 @@ class Aggregate (object):
         self.threads = []
         self.last_w3_call = 0
         self.downloaded_bytes = 0
+        self.warningregex = warningregex.get_scanner(config)
+        self.feeders = []
+        self.contentbudget = contentbudget.ContentBudget(
+            config["maxbufferedbytes"])
+        self.internpool = internpool.InternPool()
+        self.resultcache = results.get_result_cache(config)
+        self.linkgraph = linkgraph.get_link_graph(config)
+        self.duplicates = duplicates.DuplicateContent()
+        # serves the URL queue to worker processes
+        self.coordinator = distributed.get_coordinator(self)
+        # restores the checkpoint state when resuming
+        self.checkpoint = checkpoint.get_checkpoint(self)
+        # serves metrics to monitoring systems
+        self.metrics = metrics.get_metrics_task(self)
+
+    def add_input (self, fileobj, inputformat="text"):
+        """Read URLs to check from given file object. The URLs are
+        read in a separate thread started with start_threads().
+        @param fileobj: the file to read URLs from
+        @ptype fileobj: file object
+        @param inputformat: "text" or "ndjson"
+        @ptype inputformat: string
+        """
+        t = feeder.Feeder(self, fileobj, inputformat=inputformat,
+            highwater=self.config["inputqueuesize"])
+        self.feeders.append(t)
 
     @synchronized(_threads_lock)
     def start_threads (self):
         """Spawn threads for URL checking and status printing."""
+        for t in self.feeders:
+            t.start()
+            self.threads.append(t)
         if self.config["status"]:
             t = status.Status(self.urlqueue, self.config.status_logger,
                 self.config["status_wait_seconds"],
-                self.config["maxrunseconds"])
+                self.config["maxrunseconds"], self.contentbudget)
             t.start()
             self.threads.append(t)
+        if self.checkpoint is not None:
+            self.checkpoint.start()
+            self.threads.append(self.checkpoint)
+        if self.metrics is not None:
+            self.metrics.start()
+            self.threads.append(self.metrics)
         t = cleanup.Cleanup(self.connections)
         t.start()
         self.threads.append(t)
         num = self.config["threads"]
-        if num > 0:
+        if self.coordinator is not None:
+            # worker processes check the URLs
+            self.coordinator.start()
+            self.threads.append(self.coordinator)
+        elif num > 0:
             for dummy in range(num):
                 t = checker.Checker(self.urlqueue, self.logger)
                 t.start()
@@ -97,6 +139,9 @@ class Aggregate (object):
     def abort (self):
         """Print still-active URLs and empty the URL queue."""
         self.print_active_threads()
+        if self.checkpoint is not None:
+            # store the queue before it is emptied
+            self.checkpoint.write()
         self.cancel()
         timeout = self.config["timeout"]
         try:
@@ -118,7 +163,18 @@ class Aggregate (object):
             self.cancel()
         for t in self.threads:
             t.stop()
+        if self.coordinator is not None and self.coordinator.is_alive():
+            # polling workers are told that checking is done
+            self.coordinator.join(distributed.DoneSeconds + 1)
+        if self.checkpoint is not None and not self.urlqueue.shutdown:
+            # checking is complete
+            self.checkpoint.finish()
         self.connections.clear()
+        self.robots_txt.close()
+        if self.resultcache is not None:
+            self.resultcache.close()
+        if self.linkgraph is not None:
+            self.linkgraph.close()
         self.gather_statistics()
 
     @synchronized(_threads_lock)
@@ -148,6 +204,9 @@ class Aggregate (object):
         """Gather download and cache statistics and send them to the
         logger.
         """
-        robots_txt_stats = self.robots_txt.hits, self.robots_txt.misses
+        robots_txt_stats = (self.robots_txt.hits, self.robots_txt.misses,
+                            self.robots_txt.stored_hits)
         download_stats = self.downloaded_bytes
-        self.logger.add_statistics(robots_txt_stats, download_stats)
+        intern_stats = self.internpool.hits, self.internpool.misses
+        self.logger.add_statistics(robots_txt_stats, download_stats,
+                                   intern_stats)
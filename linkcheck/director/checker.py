@@ -19,12 +19,17 @@ URL checking functions.
 """
 from . import task
 from ..cache import urlqueue
+from ..cache.urlqueue import Empty
 
 
 def check_url (urlqueue, logger):
     """Check URLs without threading."""
-    while not urlqueue.empty():
-        url_data = urlqueue.get()
+    while not urlqueue.empty() or urlqueue.has_producers():
+        try:
+            url_data = urlqueue.get(timeout=0.1)
+        except Empty:
+            # wait for URLs of producer threads
+            continue
         try:
             if not url_data.has_result:
                 url_data.check()
@@ -0,0 +1,180 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Periodic checkpoints of the check state, used to resume an interrupted
+check run.
+"""
+import os
+import time
+import cPickle as pickle
+from .. import log, LOG_CHECK, checker, fileutil
+from ..decorators import synchronized
+from ..lock import get_lock
+from . import task
+
+# name of the checkpoint file in the checkpoint directory
+CheckpointFile = "checkpoint.pickle"
+# increase when the checkpoint data changes
+CheckpointVersion = 1
+
+_lock = get_lock("checkpoint")
+
+
+def get_entry (url_data):
+    """Get the data needed to create given URL or pending URL again.
+    @return: tuple of URL parameters
+    @rtype: tuple
+    """
+    if url_data.pending:
+        return (True, url_data.base_url, url_data.recursion_level,
+            url_data.parent_url, url_data.base_ref, url_data.line,
+            url_data.column, url_data.name, url_data.parent_content_type,
+            url_data.lastmod, None)
+    return (False, url_data.base_url, url_data.recursion_level,
+        url_data.parent_url, url_data.base_ref, url_data.line,
+        url_data.column, url_data.name, None, url_data.lastmod,
+        url_data.extern)
+
+
+def get_url (entry, aggregate):
+    """Create URL or pending URL from a checkpoint entry."""
+    (pending, base_url, recursion_level, parent_url, base_ref, line, column,
+     name, parent_content_type, lastmod, extern) = entry
+    if pending:
+        return checker.PendingUrl(base_url, recursion_level, aggregate,
+            parent_url=parent_url, base_ref=base_ref, line=line,
+            column=column, name=name,
+            parent_content_type=parent_content_type, lastmod=lastmod)
+    url_data = checker.get_url_from(base_url, recursion_level, aggregate,
+        parent_url=parent_url, base_ref=base_ref, line=line, column=column,
+        name=name, extern=extern)
+    url_data.lastmod = lastmod
+    return url_data
+
+
+class Checkpoint (task.LoggedCheckedTask):
+    """Thread writing the URLs still to check, the seen URLs, the
+    robots.txt cache and the logger states periodically to a checkpoint
+    file. The queue and logger locks are only held while copying
+    references, so checker threads are not stalled while the checkpoint
+    is written."""
+
+    def __init__ (self, aggregate, directory, wait_seconds):
+        """Store checkpoint parameters.
+        @param aggregate: the aggregate object
+        @ptype aggregate: linkcheck.director.aggregator.Aggregate
+        @param directory: directory of the checkpoint file
+        @ptype directory: string
+        @param wait_seconds: interval in seconds between checkpoints
+        @ptype wait_seconds: int
+        """
+        super(Checkpoint, self).__init__(aggregate.logger)
+        self.aggregate = aggregate
+        self.directory = directory
+        self.filename = os.path.join(directory, CheckpointFile)
+        self.wait_seconds = max(1, wait_seconds)
+        self.finished = False
+        # do not block program exit
+        self.setDaemon(True)
+
+    def run_checked (self):
+        """Write periodic checkpoints."""
+        self.setName("Checkpoint")
+        while not self.stopped(self.wait_seconds):
+            self.write()
+
+    @synchronized(_lock)
+    def write (self):
+        """Write a checkpoint file. Nothing is written after the URL
+        queue has been shut down or the check run finished."""
+        if self.finished:
+            return
+        start = time.time()
+        checkpoint = self.aggregate.urlqueue.get_checkpoint(
+            self.aggregate.logger)
+        if checkpoint is None:
+            return
+        urls, seen, logger_state = checkpoint
+        data = dict(
+            version=CheckpointVersion,
+            urls=[get_entry(url_data) for url_data in urls],
+            seen=seen,
+            robots_txt=self.aggregate.robots_txt.get_items(),
+            logger=logger_state,
+        )
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        # the robots.txt data can contain passwords
+        oldmask = os.umask(0077)
+        try:
+            fileutil.write_file(self.filename, data,
+                callback=lambda fd, data: pickle.dump(data, fd, 2))
+        finally:
+            os.umask(oldmask)
+        log.debug(LOG_CHECK, "Wrote checkpoint with %d URLs in %.3f seconds",
+                  len(urls), time.time() - start)
+
+    @synchronized(_lock)
+    def finish (self):
+        """Stop writing checkpoints and remove the checkpoint file, since
+        the check run is complete."""
+        self.finished = True
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def resume (self):
+        """Restore state of the checkpoint file, if it exists.
+        @return: True if a checkpoint was restored
+        @rtype: bool
+        """
+        filename = self.filename
+        if not os.path.exists(filename):
+            # an interrupted write leaves the previous checkpoint here
+            filename += ".bak"
+            if not os.path.exists(filename):
+                log.warn(LOG_CHECK, _("No checkpoint found in %(dir)s, "
+                    "starting a new check.") % {"dir": self.directory})
+                return False
+        with open(filename, "rb") as fd:
+            data = pickle.load(fd)
+        if data.get("version") != CheckpointVersion:
+            log.warn(LOG_CHECK, _("Checkpoint in %(dir)s has an unsupported "
+                "version, starting a new check.") % {"dir": self.directory})
+            return False
+        aggregate = self.aggregate
+        aggregate.robots_txt.add_items(data["robots_txt"],
+            callback=aggregate.connections.host_wait)
+        aggregate.logger.resume(data["logger"])
+        urls = [get_url(entry, aggregate) for entry in data["urls"]]
+        aggregate.urlqueue.restore(urls, data["seen"])
+        log.info(LOG_CHECK, _("Resuming check with %(num)d queued URLs.") %
+                 {"num": len(urls)})
+        return True
+
+
+def get_checkpoint (aggregate):
+    """Return a checkpoint thread if checkpoints are configured, else
+    None. The checkpoint state is restored if resuming is configured."""
+    config = aggregate.config
+    if not config["checkpoint"]:
+        return None
+    directory = os.path.expanduser(config["checkpoint"])
+    checkpoint = Checkpoint(aggregate, directory,
+                            config["checkpointseconds"])
+    if config["resume"]:
+        checkpoint.resume()
+    return checkpoint
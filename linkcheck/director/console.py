@@ -42,7 +42,8 @@ class StatusLogger (object):
         """Save file descriptor for logging."""
         self.fd = fd
 
-    def log_status (self, checked, in_progress, queue, duration):
+    def log_status (self, checked, in_progress, queue, duration,
+                    buffered, buffered_peak):
         """Write status message to file descriptor."""
         msg = _n("%2d URL active", "%2d URLs active", in_progress) % \
           in_progress
@@ -51,6 +52,10 @@ class StatusLogger (object):
         self.write(u"%s, " % msg)
         msg = _n("%4d URL checked", "%4d URLs checked", checked) % checked
         self.write(u"%s, " % msg)
+        msg = _("%(size)s buffered (peak %(peak)s)") % \
+          {"size": strformat.strsize(buffered),
+           "peak": strformat.strsize(buffered_peak)}
+        self.write(u"%s, " % msg)
         msg = _("runtime %s") % strformat.strduration_long(duration)
         self.writeln(msg)
         self.flush()
@@ -0,0 +1,471 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Distributed checking with one coordinator and several worker processes.
+
+The coordinator owns the URL queue with the seen URLs and writes the
+log output. Workers lease URLs from the coordinator, check them with
+the usual checker threads and send back the check results together
+with the links found in the URL content. Leases that are not finished
+in time, for example because the worker died, are given to other
+workers.
+
+Both sides talk over HTTP: the worker POSTs a JSON object to /lease
+with the results of finished leases and gets new leases back:
+  request:  {"version": 1, "worker": ID, "size": N, "results": [RESULT]}
+  response: {"version": 1, "done": BOOL, "leases": [[LEASE, ENTRY]]}
+  RESULT:   {"lease": LEASE, "result": WIREDICT, "links": [ENTRY]}
+where ENTRY is a URL entry as stored in checkpoints and WIREDICT is
+the to_wire_dict() of the checked URL.
+"""
+import os
+import time
+import json
+import socket
+import httplib
+import datetime
+import itertools
+import threading
+import collections
+import BaseHTTPServer
+from .. import log, LOG_CHECK
+from ..cache.urlqueue import Empty, Timeout
+from ..checker.urlbase import CompactUrlData
+from ..lock import get_lock
+from . import task, checkpoint
+
+# increase when the protocol changes
+ProtocolVersion = 1
+# seconds an idle worker waits before asking for work again
+PollSeconds = 1.0
+# seconds a worker tries to reach the coordinator before giving up
+ConnectRetrySeconds = 60
+# seconds the coordinator tells polling workers that checking is done
+DoneSeconds = 5
+# format of modification dates in results
+DateFormat = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_address (address):
+    """Parse a HOST:PORT address. An empty host means all interfaces.
+    @return: tuple (host, port)
+    @rtype: tuple (string, int)
+    @raises: ValueError for invalid addresses
+    """
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit() or int(port) > 65535:
+        raise ValueError(_("invalid address %(address)r, expected HOST:PORT")
+                         % {"address": address})
+    return host, int(port)
+
+
+def encode_result (url_data):
+    """Get the JSON encoded check result of an URL."""
+    wire = url_data.to_wire_dict()
+    if wire["modified"] is not None:
+        wire["modified"] = wire["modified"].strftime(DateFormat)
+    return json.dumps(wire)
+
+
+def decode_result (wire):
+    """Restore the check result values which have no JSON type."""
+    wire["warnings"] = [tuple(x) for x in wire["warnings"]]
+    if wire["modified"] is not None:
+        wire["modified"] = datetime.datetime.strptime(wire["modified"],
+                                                      DateFormat)
+    return wire
+
+
+def get_url (entry, aggregate):
+    """Create URL or pending URL from a JSON decoded URL entry."""
+    if entry[10] is not None:
+        # the extern tuple has been decoded as list
+        entry[10] = tuple(entry[10])
+    return checkpoint.get_url(entry, aggregate)
+
+
+class WorkerResult (object):
+    """Check result received from a worker, logged like a checked URL."""
+
+    def __init__ (self, wire):
+        """Store decoded result values."""
+        self.wire = wire
+        self.valid = wire["valid"]
+        self.warnings = wire["warnings"]
+        self.logged = False
+
+    def to_wire (self):
+        """Return compact UrlData object of the result."""
+        return CompactUrlData(self.wire)
+
+
+class CoordinatorServer (BaseHTTPServer.HTTPServer):
+    """HTTP server handling one request at a time, so the coordinator
+    state needs no locking."""
+
+    # wait at most this many seconds for a request in handle_request()
+    timeout = 0.5
+
+    def __init__ (self, address, coordinator):
+        """Bind to given address and store the coordinator."""
+        BaseHTTPServer.HTTPServer.__init__(self, address, CoordinatorHandler)
+        self.coordinator = coordinator
+
+
+class CoordinatorHandler (BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handle lease requests of workers."""
+
+    # do not let a stalled worker block the coordinator
+    timeout = 60
+
+    def do_POST (self):
+        """Return new leases and store the sent results."""
+        if self.path != "/lease":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.getheader("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length))
+            if request.get("version") != ProtocolVersion:
+                raise ValueError("unsupported protocol version %r" %
+                                 request.get("version"))
+            response = self.server.coordinator.handle_lease(request)
+        except (ValueError, KeyError, TypeError, IndexError) as msg:
+            log.warn(LOG_CHECK, "Invalid lease request from %s: %s",
+                     self.client_address[0], msg)
+            self.send_error(400)
+            return
+        data = json.dumps(response)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message (self, format, *args):
+        """Log requests as debug messages."""
+        log.debug(LOG_CHECK, "%s %s", self.client_address[0], format % args)
+
+
+class Coordinator (task.LoggedCheckedTask):
+    """Thread serving URL leases to workers and logging their results.
+    It takes the place of the checker threads."""
+
+    def __init__ (self, aggregate, address, lease_seconds):
+        """Listen on given address.
+        @param aggregate: the aggregate object
+        @ptype aggregate: linkcheck.director.aggregator.Aggregate
+        @param address: host and port to listen on
+        @ptype address: tuple (string, int)
+        @param lease_seconds: seconds until an unfinished lease expires
+        @ptype lease_seconds: int
+        @raises: socket.error if the address can not be used
+        """
+        super(Coordinator, self).__init__(aggregate.logger)
+        self.aggregate = aggregate
+        self.urlqueue = aggregate.urlqueue
+        self.lease_seconds = lease_seconds
+        # lease id -> (URL object, worker id, expiration time)
+        self.leases = {}
+        self.lease_ids = itertools.count(1)
+        # worker id -> time of last request
+        self.workers = {}
+        self.done = False
+        self.server = CoordinatorServer(address, self)
+        # do not block program exit
+        self.setDaemon(True)
+
+    def run_checked (self):
+        """Serve lease requests until stopped, then tell the polling
+        workers that checking is done."""
+        self.setName("Coordinator")
+        log.info(LOG_CHECK, _("Coordinator listening on %(host)s:%(port)d") %
+                 {"host": self.server.server_address[0],
+                  "port": self.server.server_address[1]})
+        try:
+            while not self.stopped(0):
+                self.server.handle_request()
+                self.expire_leases()
+            self.done = True
+            end = time.time() + DoneSeconds
+            while self.workers and time.time() < end:
+                self.server.handle_request()
+        finally:
+            self.server.server_close()
+
+    def handle_lease (self, request):
+        """Store the results of a worker and get new leases for it.
+        @param request: the decoded lease request
+        @ptype request: dict
+        @return: the lease response
+        @rtype: dict
+        """
+        worker = request["worker"]
+        self.workers[worker] = time.time()
+        for result in request["results"]:
+            self.add_result(result)
+        if self.done:
+            del self.workers[worker]
+            return dict(version=ProtocolVersion, done=True, leases=[])
+        leases = self.get_leases(worker, int(request["size"]))
+        return dict(version=ProtocolVersion, done=False, leases=leases)
+
+    def get_leases (self, worker, size):
+        """Take at most size URLs from the queue and lease them to
+        the given worker. URLs which already have a result are logged
+        directly."""
+        leases = []
+        while len(leases) < size:
+            try:
+                url_data = self.urlqueue.get(timeout=0)
+            except Empty:
+                break
+            if url_data.has_result:
+                try:
+                    self.aggregate.logger.log_url(url_data)
+                finally:
+                    self.urlqueue.task_done(url_data)
+                continue
+            lease = self.lease_ids.next()
+            expires = time.time() + self.lease_seconds
+            self.leases[lease] = (url_data, worker, expires)
+            leases.append((lease, checkpoint.get_entry(url_data)))
+        return leases
+
+    def add_result (self, result):
+        """Queue the links and log the check result of a finished lease.
+        Results of expired leases are ignored since the URL has been
+        leased again."""
+        lease = self.leases.pop(result["lease"], None)
+        if lease is None:
+            log.debug(LOG_CHECK, "Ignoring result of expired lease %s",
+                      result["lease"])
+            return
+        url_data = lease[0]
+        try:
+            for entry in result["links"]:
+                self.urlqueue.put(get_url(entry, self.aggregate))
+            self.aggregate.logger.log_url(
+                WorkerResult(decode_result(result["result"])))
+            url_data.logged = True
+        finally:
+            self.urlqueue.task_done(url_data)
+
+    def expire_leases (self):
+        """Put URLs of expired leases back into the queue."""
+        now = time.time()
+        for lease, (url_data, worker, expires) in self.leases.items():
+            if expires < now:
+                log.info(LOG_CHECK, _("Lease of %(url)s by worker %(worker)s "
+                    "expired, checking it again.") %
+                    {"url": url_data.url, "worker": worker})
+                del self.leases[lease]
+                self.urlqueue.requeue(url_data)
+
+
+def get_coordinator (aggregate):
+    """Return a coordinator thread if configured, else None."""
+    config = aggregate.config
+    if not config["coordinator"]:
+        return None
+    return Coordinator(aggregate, config["coordinator"],
+                       config["leaseseconds"])
+
+
+class WorkerQueue (object):
+    """URL queue of a worker process, used by the checker threads instead
+    of the URL queue. URLs are leased from the coordinator when no leased
+    URL is left. Links found while checking an URL are collected instead
+    of being queued, and are sent to the coordinator together with the
+    check result in the next lease request."""
+
+    def __init__ (self, address, size, timeout=60):
+        """Store coordinator parameters.
+        @param address: host and port of the coordinator
+        @ptype address: tuple (string, int)
+        @param size: maximum number of URLs per lease request
+        @ptype size: int
+        @param timeout: network timeout in seconds
+        @ptype timeout: int
+        """
+        self.host, self.port = address
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.worker = "%s-%d-%s" % (socket.gethostname(), os.getpid(),
+                                    os.urandom(4).encode("hex"))
+        # set by get_aggregate(), needed to create URL objects
+        self.aggregate = None
+        # held while leasing URLs from the coordinator
+        self.mutex = get_lock("workerqueue")
+        self.results_lock = get_lock("workerresults")
+        self.leased = collections.deque()
+        # JSON encoded results not yet sent to the coordinator
+        self.results = []
+        # id of URL object -> URL object, like UrlQueue.in_progress
+        self.in_progress = {}
+        # id of URL object -> lease id
+        self.leases = {}
+        # links found by the URL checked in the current thread
+        self.local = threading.local()
+        self.finished_tasks = 0
+        self.next_request = 0
+        self.failed_since = None
+        self.finished = False
+        self.shutdown = False
+
+    def qsize (self):
+        """Return the number of leased URLs not yet checked."""
+        return len(self.leased)
+
+    def empty (self):
+        """Return True if the coordinator has no more URLs to check."""
+        return self.finished and not self.leased
+
+    def has_producers (self):
+        """The coordinator produces URLs until checking is done."""
+        return not self.finished
+
+    def get (self, timeout=None):
+        """Get the next leased URL, requesting new leases from the
+        coordinator if needed.
+        @raises: Empty if no URL is available
+        """
+        with self.mutex:
+            if not self.leased and not self.finished and \
+               (self.results or time.time() >= self.next_request):
+                self.request_leases()
+            if self.leased:
+                lease, entry = self.leased.popleft()
+                url_data = get_url(entry, self.aggregate)
+                self.leases[id(url_data)] = lease
+                self.in_progress[id(url_data)] = url_data
+                self.local.links = []
+                return url_data
+        if timeout:
+            time.sleep(timeout)
+        raise Empty()
+
+    def put (self, url_data):
+        """Collect a link found by the URL checked in this thread."""
+        links = getattr(self.local, "links", None)
+        if links is None:
+            log.warn(LOG_CHECK, "Ignoring URL %s queued outside of a check",
+                     url_data.base_url)
+            return
+        links.append(checkpoint.get_entry(url_data))
+
+    def task_done (self, url_data):
+        """Store the check result of an URL for the coordinator. URLs
+        not logged, for example after an internal error, are not sent,
+        and their lease expires."""
+        links = self.local.links
+        self.local.links = None
+        with self.results_lock:
+            lease = self.leases.pop(id(url_data))
+            del self.in_progress[id(url_data)]
+            self.finished_tasks += 1
+        if not url_data.logged:
+            return
+        try:
+            result = '{"lease": %d, "result": %s, "links": %s}' % \
+                (lease, encode_result(url_data), json.dumps(links))
+        except ValueError as msg:
+            log.warn(LOG_CHECK, "Could not encode result of %s: %s",
+                     url_data, msg)
+            return
+        with self.results_lock:
+            self.results.append(result)
+
+    def request_leases (self):
+        """Send the stored results to the coordinator and store the
+        new leases. Not thread-safe!"""
+        with self.results_lock:
+            results, self.results = self.results, []
+        try:
+            response = self.post(results)
+        except (socket.error, httplib.HTTPException, ValueError) as msg:
+            with self.results_lock:
+                self.results[:0] = results
+            self.connection_failed(msg)
+            return
+        self.failed_since = None
+        if response["done"]:
+            log.debug(LOG_CHECK, "Coordinator finished checking")
+            self.finished = True
+        self.leased.extend(response["leases"])
+        if not response["leases"]:
+            self.next_request = time.time() + PollSeconds
+
+    def post (self, results):
+        """Send a lease request with given JSON encoded results.
+        @return: the decoded response
+        @rtype: dict
+        """
+        data = '{"version": %d, "worker": %s, "size": %d, "results": [%s]}' % \
+            (ProtocolVersion, json.dumps(self.worker), self.size,
+             ", ".join(results))
+        conn = httplib.HTTPConnection(self.host, self.port,
+                                      timeout=self.timeout)
+        try:
+            conn.request("POST", "/lease", data,
+                         {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            if response.status != 200:
+                raise httplib.HTTPException("%d %s" %
+                    (response.status, response.reason))
+            return json.loads(response.read())
+        finally:
+            conn.close()
+
+    def connection_failed (self, msg):
+        """Retry later, or stop when the coordinator was not reachable
+        for ConnectRetrySeconds."""
+        now = time.time()
+        log.debug(LOG_CHECK, "Lease request failed: %s", msg)
+        if self.failed_since is None:
+            self.failed_since = now
+        elif now - self.failed_since > ConnectRetrySeconds:
+            log.warn(LOG_CHECK, _("Coordinator %(host)s:%(port)d is not "
+                "reachable: %(msg)s") %
+                {"host": self.host, "port": self.port, "msg": msg})
+            self.finished = True
+        self.next_request = now + PollSeconds
+
+    def join (self, timeout=None):
+        """Wait until checking is done and all URLs are finished.
+        @raises: Timeout if not finished after timeout seconds
+        """
+        if timeout is not None:
+            endtime = time.time() + timeout
+        while not (self.finished and not self.in_progress):
+            if timeout is not None and time.time() >= endtime:
+                raise Timeout()
+            time.sleep(0.1)
+
+    def do_shutdown (self):
+        """Stop leasing URLs. Leased URLs not yet checked expire at the
+        coordinator."""
+        with self.mutex:
+            self.leased.clear()
+            self.finished = True
+            self.shutdown = True
+
+    def status (self):
+        """Get tuple (finished tasks, in progress, leased URLs)."""
+        with self.results_lock:
+            return (self.finished_tasks, len(self.in_progress),
+                    len(self.leased))
@@ -0,0 +1,140 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Read URLs to check from a file object while checking is in progress.
+"""
+import json
+from .. import log, LOG_CHECK, checker, strformat
+from . import task
+
+# supported input formats
+InputFormats = ("text", "ndjson")
+
+
+def read_text (fileobj):
+    """Read white-space separated URLs.
+    @return: iterator of dictionaries with a "url" key
+    @rtype: iterator of dict
+    """
+    for line in iter(fileobj.readline, ''):
+        for url in line.split():
+            yield {"url": url}
+
+
+def read_ndjson (fileobj):
+    """Read newline delimited JSON objects with a mandatory "url" key
+    and optional "parent", "line" and "name" keys. Invalid lines are
+    skipped with a warning.
+    @return: iterator of dictionaries
+    @rtype: iterator of dict
+    """
+    lineno = 0
+    for line in iter(fileobj.readline, ''):
+        lineno += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError as msg:
+            log.warn(LOG_CHECK, _("Invalid JSON input at line %(line)d: %(msg)s") %
+                     {"line": lineno, "msg": msg})
+            continue
+        if not (isinstance(entry, dict) and entry.get("url")):
+            log.warn(LOG_CHECK, _("Missing URL in JSON input at line %(line)d") %
+                     {"line": lineno})
+            continue
+        yield entry
+
+
+class Feeder (task.LoggedCheckedTask):
+    """Thread reading URLs from a file object into the URL queue.
+    Reading pauses while the queue holds at least highwater URLs, so the
+    input is never read into memory completely. Duplicate input lines
+    are skipped before creating URL objects."""
+
+    def __init__ (self, aggregate, fileobj, inputformat="text",
+                  highwater=10000):
+        """Store input parameters and register as producer of the
+        URL queue.
+        @param aggregate: the aggregate object
+        @ptype aggregate: linkcheck.director.aggregator.Aggregate
+        @param fileobj: the file to read URLs from
+        @ptype fileobj: file object
+        @param inputformat: "text" or "ndjson"
+        @ptype inputformat: string
+        @param highwater: maximum number of queued URLs
+        @ptype highwater: int
+        """
+        super(Feeder, self).__init__(aggregate.logger)
+        if inputformat not in InputFormats:
+            raise ValueError("invalid input format %r" % inputformat)
+        self.aggregate = aggregate
+        self.urlqueue = aggregate.urlqueue
+        self.fileobj = fileobj
+        self.inputformat = inputformat
+        self.highwater = max(1, highwater)
+        self.seen = set()
+        self.num = 0
+        # do not let the URL queue finish before all input is read
+        self.urlqueue.add_producer()
+        # reading the input could block until program exit
+        self.setDaemon(True)
+
+    def run_checked (self):
+        """Put URLs into the queue until the input is read."""
+        self.setName("Feeder")
+        try:
+            self.feed()
+        finally:
+            self.urlqueue.producer_done()
+        log.debug(LOG_CHECK, "Feeder read %d URLs", self.num)
+
+    def feed (self):
+        """Read input entries and put them into the queue."""
+        if self.inputformat == "ndjson":
+            entries = read_ndjson(self.fileobj)
+        else:
+            entries = read_text(self.fileobj)
+        for entry in entries:
+            while self.urlqueue.qsize() >= self.highwater:
+                if self.stopped(0.1):
+                    return
+            if self.stopped(0) or self.urlqueue.shutdown:
+                return
+            self.add_entry(entry)
+
+    def add_entry (self, entry):
+        """Add one input entry to the URL queue if it has not been seen."""
+        url = entry["url"]
+        parent = entry.get("parent")
+        key = (parent, url) if parent else url
+        if key in self.seen:
+            return
+        self.seen.add(key)
+        self.num += 1
+        if self.num % 10000 == 0:
+            log.info(LOG_CHECK, "Read %d URLs", self.num)
+        if not parent:
+            url = checker.guess_url(strformat.stripurl(url))
+        line = entry.get("line", 0)
+        if not isinstance(line, (int, long)):
+            line = 0
+        url_data = checker.get_url_from(url, 0, self.aggregate,
+            parent_url=parent, line=line, name=entry.get("name", u""),
+            extern=(0, 0))
+        self.urlqueue.put(url_data)
@@ -15,41 +15,162 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """Logger for aggregator instances"""
-import threading
 import thread
+import threading
+import time
+import Queue
+import cPickle as pickle
+from .. import log, LOG_CHECK, trace
 from ..decorators import synchronized
-_lock = threading.Lock()
+from ..lock import get_lock, get_semaphore
+from ..statistics import StatisticsCollector
+from . import task, console
+_lock = get_lock("logger")
+
+
+class CheckpointMarker (object):
+    """Output barrier queued by a checkpoint. The writer thread takes
+    the logger states when it reaches the marker, so the states contain
+    exactly the URLs logged before the marker was queued."""
+
+    def __init__ (self):
+        """Initialize empty state."""
+        self.state = None
+        self.done = threading.Event()
+
+
+# queued to log an internal error after the URLs logged before
+InternalErrorMarker = object()
 
 
 class Logger (object):
-    """Thread safe multi-logger class used by aggregator instances."""
+    """Thread safe multi-logger class used by aggregator instances.
+    Checked URLs are queued and written to the loggers by a writer
+    thread, so checker threads do not wait for formatting and disk
+    output."""
 
     def __init__ (self, config):
         """Initialize basic logging variables."""
         self.loggers = [config['logger']]
         self.loggers.extend(config['fileoutput'])
+        # loggers that get URL records, set by start_log_output()
+        self.url_loggers = self.loggers
         self.verbose = config["verbose"]
         self.complete = config["complete"]
         self.warnings = config["warnings"]
+        self.flush_seconds = config["flushseconds"]
+        self.statistics = StatisticsCollector()
+        # logger states of a resumed checkpoint
+        self.resume_states = None
+        # URL records and markers waiting for the writer thread
+        self.records = Queue.Queue()
+        # free slots for URL records; checker threads block while all
+        # slots are used, but markers are always queued without waiting
+        self.slots = get_semaphore("logger_queue",
+                                   value=config["outputqueuesize"])
+        # held by the writer thread while writing to the loggers
+        self.write_lock = get_lock("logger_write")
+        self.writer = None
 
     def start_log_output (self):
         """
-        Start output of all configured loggers.
+        Start output of all configured loggers and the writer thread.
         """
-        for logger in self.loggers:
-            logger.start_output()
+        for i, logger in enumerate(self.loggers):
+            state = self.get_resume_state(i, logger)
+            if state is None:
+                logger.start_output()
+            else:
+                logger.start_resumed_output(state)
+        # loggers that ignore all URLs get no records
+        self.url_loggers = [logger for logger in self.loggers
+                            if logger.LoggerName != 'none']
+        self.writer = LogWriter(self)
+        self.writer.start()
+
+    def resume (self, state):
+        """Continue logger output and statistics of a checkpoint.
+        @param state: logger state returned by get_checkpoint()
+        @ptype state: dict
+        """
+        self.resume_states = state["loggers"]
+        self.statistics = pickle.loads(state["statistics"])
+
+    def get_resume_state (self, i, logger):
+        """Get checkpoint state of the logger with given index, or None
+        if the logger was not configured in the checkpointed run."""
+        if self.resume_states is None or i >= len(self.resume_states):
+            return None
+        state = self.resume_states[i]
+        if state["logger"] != logger.LoggerName:
+            log.warn(LOG_CHECK, _("Logger %(logger)s does not match the "
+                "checkpoint, starting new output.") % {"logger": logger})
+            return None
+        return state
+
+    @synchronized(_lock)
+    def get_checkpoint (self, urls):
+        """Get the given URLs which are not logged yet, and queue a
+        marker for the logger states. Since URLs are queued with the
+        same lock held, the logger states taken at the marker match the
+        returned URLs. This does not wait for the queued URLs to be
+        written; use wait_checkpoint() for that.
+        @param urls: URLs being checked
+        @ptype urls: list of UrlBase
+        @return: tuple (not logged URLs, checkpoint marker)
+        @rtype: tuple (list, CheckpointMarker)
+        """
+        urls = [url_data for url_data in urls if not url_data.logged]
+        marker = CheckpointMarker()
+        if self.writer is None:
+            with self.write_lock:
+                self.set_checkpoint_state(marker)
+        else:
+            self.records.put(marker)
+        return urls, marker
+
+    def wait_checkpoint (self, marker):
+        """Wait until the writer thread reached the given marker.
+        @return: logger state
+        @rtype: dict
+        """
+        while not marker.done.wait(1):
+            writer = self.writer
+            if writer is None or not writer.is_alive():
+                # no more records are written
+                with self.write_lock:
+                    if not marker.done.is_set():
+                        self.set_checkpoint_state(marker)
+        return marker.state
+
+    def set_checkpoint_state (self, marker):
+        """Store the logger states and statistics in the marker. The
+        write lock must be held."""
+        marker.state = dict(
+            loggers=[logger.get_checkpoint() for logger in self.loggers],
+            statistics=pickle.dumps(self.statistics, 2),
+        )
+        marker.done.set()
 
     def end_log_output (self):
         """
-        End output of all configured loggers.
+        Stop the writer thread and end output of all configured loggers.
         """
+        if self.writer is not None:
+            if self.writer.is_alive():
+                self.records.put(None)
+                self.writer.join()
+            self.writer = None
         for logger in self.loggers:
             logger.end_output()
 
-    def add_statistics(self, robots_txt_stats, download_stats):
+    def add_statistics(self, robots_txt_stats, download_stats, intern_stats):
         """Add statistics to logger."""
-        for logger in self.loggers:
-            logger.add_statistics(robots_txt_stats, download_stats)
+        self.wait_written()
+        with self.write_lock:
+            for logger in self.loggers:
+                logger.add_statistics(robots_txt_stats, download_stats,
+                                      intern_stats, self.statistics)
 
     def do_print (self, url_data):
         """Determine if URL entry should be logged or not."""
@@ -61,20 +182,104 @@ class Logger (object):
             return True
         return not url_data.valid
 
-    @synchronized(_lock)
     def log_url (self, url_data):
-        """Send new url to all configured loggers."""
-        self.check_active_loggers()
+        """Queue new url for the loggers."""
         do_print = self.do_print(url_data)
         # Only send a transport object to the loggers, not the complete
         # object instance.
         transport = url_data.to_wire()
-        for log in self.loggers:
-            log.log_filter_url(transport, do_print)
+        if self.writer is None:
+            with _lock:
+                self.write_record(transport, do_print)
+                url_data.logged = True
+            return
+        # wait for a free slot without holding the lock
+        self.slots.acquire()
+        # checkpoints see either a logged and queued URL or neither
+        with _lock:
+            self.records.put((transport, do_print))
+            url_data.logged = True
+
+    def write_records (self):
+        """Write queued URL records to the loggers until the end marker
+        is queued. Loggers are flushed every flush_seconds instead of
+        after every URL, and when no URL was queued for that long."""
+        next_flush = None
+        while True:
+            try:
+                record = self.records.get(timeout=self.flush_seconds or None)
+            except Queue.Empty:
+                # nothing to write
+                if next_flush is not None:
+                    self.flush()
+                    next_flush = None
+                continue
+            try:
+                if record is None:
+                    self.flush()
+                    break
+                self.write_queued(record)
+            finally:
+                self.records.task_done()
+            now = time.time()
+            if next_flush is None:
+                next_flush = now + self.flush_seconds
+            if now >= next_flush:
+                self.flush()
+                next_flush = None
+
+    def write_queued (self, record):
+        """Write a queued URL record or handle a marker."""
+        with self.write_lock:
+            if isinstance(record, CheckpointMarker):
+                self.set_checkpoint_state(record)
+            elif record is InternalErrorMarker:
+                self.write_internal_error()
+            else:
+                try:
+                    self.write_record(*record)
+                finally:
+                    self.slots.release()
+
+    def write_record (self, transport, do_print):
+        """Send URL record to the loggers, logging errors as internal
+        errors instead of stopping the writer thread."""
+        self.check_active_loggers()
+        try:
+            with trace.Span(u"write", "logger"):
+                self.statistics.log_url(transport)
+                for log in self.url_loggers:
+                    log.log_filter_url(transport, do_print)
+        except Exception:
+            console.internal_error()
+            self.write_internal_error()
+
+    def flush (self):
+        """Flush the output of all loggers."""
+        with self.write_lock:
+            for logger in self.url_loggers:
+                logger.flush()
+
+    def wait_written (self):
+        """Wait until all queued URL records are written. Only used
+        when no URLs are checked anymore, since URLs queued meanwhile
+        are also waited for."""
+        if self.writer is not None and self.writer.is_alive():
+            self.records.join()
 
     @synchronized(_lock)
     def log_internal_error (self):
-        """Document that an internal error occurred."""
+        """Document that an internal error occurred, after the URLs
+        already logged."""
+        if self.writer is not None and self.writer.is_alive():
+            self.records.put(InternalErrorMarker)
+        else:
+            with self.write_lock:
+                self.write_internal_error()
+
+    def write_internal_error (self):
+        """Write an internal error to all loggers. The write lock must
+        be held."""
         for logger in self.loggers:
             logger.log_internal_error()
 
@@ -85,3 +290,23 @@ class Logger (object):
                 break
         else:
             thread.interrupt_main()
+
+
+class LogWriter (task.CheckedTask):
+    """Thread writing the queued URL records of a logger."""
+
+    def __init__ (self, logger):
+        """Store the aggregate logger."""
+        super(LogWriter, self).__init__()
+        self.logger = logger
+        self.setName("LogWriter")
+        # do not block program exit after an abort
+        self.setDaemon(True)
+
+    def run_checked (self):
+        """Write records until the end of output."""
+        self.logger.write_records()
+
+    def internal_error (self):
+        """Print an internal error on the console."""
+        console.internal_error()
@@ -0,0 +1,241 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Serve check metrics in the Prometheus text format.
+
+The metrics are read from the counters of the URL queue, logger,
+connection pool and caches without acquiring their locks, so scraping
+never blocks the checker threads. The values of one scrape may
+therefore be off by the URLs changing state during the scrape.
+"""
+import time
+import socket
+import BaseHTTPServer
+from .. import log, LOG_CHECK, LinkCheckerError
+from . import task, distributed
+
+# content type of the text exposition format
+ContentType = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def quote_label (value):
+    """Escape a label value."""
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"')
+
+
+def format_metric (name, mtype, helptext, samples):
+    """Format one metric with its HELP and TYPE lines.
+    @param name: metric name
+    @ptype name: string
+    @param mtype: metric type, "counter" or "gauge"
+    @ptype mtype: string
+    @param helptext: metric description
+    @ptype helptext: string
+    @param samples: list of (labels, value) with labels being a list of
+      (label name, label value) tuples
+    @ptype samples: list of tuples
+    @return: metric lines
+    @rtype: list of strings
+    """
+    lines = ["# HELP %s %s" % (name, helptext),
+             "# TYPE %s %s" % (name, mtype)]
+    for labels, value in samples:
+        if labels:
+            label = ",".join('%s="%s"' % (key, quote_label(val))
+                             for key, val in labels)
+            lines.append("%s{%s} %s" % (name, label, value))
+        else:
+            lines.append("%s %s" % (name, value))
+    return lines
+
+
+class Metrics (object):
+    """Collect the metrics of an aggregate."""
+
+    def __init__ (self, aggregate):
+        """Store aggregate object."""
+        self.aggregate = aggregate
+        self.start_time = time.time()
+
+    def get_queued (self):
+        """Get the number of queued URLs."""
+        urlqueue = self.aggregate.urlqueue
+        if isinstance(urlqueue, distributed.WorkerQueue):
+            return len(urlqueue.leased)
+        return len(urlqueue.queue)
+
+    def get_host_requests (self):
+        """Get the number of URLs being checked per host."""
+        hosts = {}
+        # dict.values() copies the values atomically
+        for url_data in self.aggregate.urlqueue.in_progress.values():
+            host = url_data.host or u""
+            hosts[host] = hosts.get(host, 0) + 1
+        return hosts
+
+    def get_busy_threads (self):
+        """Get the number of checker threads checking an URL."""
+        # the thread list is copied without the aggregate thread lock
+        threads = list(self.aggregate.threads)
+        return len([t for t in threads
+                    if t.getName().startswith("CheckThread-")])
+
+    def get_caches (self):
+        """Get (name, hits, misses) of the caches in use."""
+        aggregate = self.aggregate
+        robots_txt = aggregate.robots_txt
+        caches = [
+            ("robotstxt", robots_txt.hits,
+             robots_txt.stored_hits + robots_txt.misses),
+            ("internpool", aggregate.internpool.hits,
+             aggregate.internpool.misses),
+        ]
+        if robots_txt.store is not None:
+            caches.append(("robotstxt_store", robots_txt.stored_hits,
+                           robots_txt.misses))
+        for name in ("resultcache", "linkgraph"):
+            cache = getattr(aggregate, name)
+            if cache is not None:
+                caches.append((name, cache.hits, cache.misses))
+        return caches
+
+    def get_lines (self):
+        """Get all metric lines.
+        @return: metric lines
+        @rtype: list of strings
+        """
+        aggregate = self.aggregate
+        statistics = aggregate.logger.statistics
+        connections = aggregate.connections
+        hosts = self.get_host_requests()
+        caches = self.get_caches()
+        lines = []
+        lines.extend(format_metric("linkchecker_start_time_seconds", "gauge",
+            "Start time of the check in seconds since the epoch.",
+            [([], "%.3f" % self.start_time)]))
+        lines.extend(format_metric("linkchecker_urls_total", "counter",
+            "Logged URLs by result.",
+            [([("result", "valid")], statistics.valid),
+             ([("result", "warning")], statistics.warnings),
+             ([("result", "error")], statistics.errors)]))
+        lines.extend(format_metric("linkchecker_urls_queued", "gauge",
+            "URLs waiting in the queue.", [([], self.get_queued())]))
+        lines.extend(format_metric("linkchecker_urls_in_progress", "gauge",
+            "URLs being checked.", [([], sum(hosts.values()))]))
+        lines.extend(format_metric("linkchecker_host_requests_in_progress",
+            "gauge", "URLs being checked per host.",
+            [([("host", host.encode("utf-8"))], num)
+             for host, num in sorted(hosts.items())]))
+        lines.extend(format_metric("linkchecker_connections_total",
+            "counter", "Connections returned by the connection pool.",
+            [([("state", "created")], connections.created),
+             ([("state", "reused")], connections.reused)]))
+        lines.extend(format_metric("linkchecker_downloaded_bytes_total",
+            "counter", "Downloaded content bytes.",
+            [([], aggregate.downloaded_bytes)]))
+        lines.extend(format_metric("linkchecker_cache_hits_total",
+            "counter", "Cache hits.",
+            [([("cache", name)], hits) for name, hits, misses in caches]))
+        lines.extend(format_metric("linkchecker_cache_misses_total",
+            "counter", "Cache misses.",
+            [([("cache", name)], misses) for name, hits, misses in caches]))
+        lines.extend(format_metric("linkchecker_checker_threads", "gauge",
+            "Configured checker threads.",
+            [([], aggregate.config["threads"])]))
+        lines.extend(format_metric("linkchecker_checker_threads_busy",
+            "gauge", "Checker threads checking an URL.",
+            [([], self.get_busy_threads())]))
+        return lines
+
+
+class MetricsServer (BaseHTTPServer.HTTPServer):
+    """HTTP server handling one scrape at a time."""
+
+    # wait at most this many seconds for a request in handle_request()
+    timeout = 0.5
+
+    def __init__ (self, address, metrics):
+        """Bind to given address and store the metrics."""
+        BaseHTTPServer.HTTPServer.__init__(self, address, MetricsHandler)
+        self.metrics = metrics
+
+
+class MetricsHandler (BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handle scrape requests."""
+
+    # do not let a stalled client block further scrapes
+    timeout = 10
+
+    def do_GET (self):
+        """Send the metrics."""
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        lines = self.server.metrics.get_lines()
+        data = "\n".join(lines) + "\n"
+        self.send_response(200)
+        self.send_header("Content-Type", ContentType)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message (self, format, *args):
+        """Log requests as debug messages."""
+        log.debug(LOG_CHECK, "%s %s", self.client_address[0], format % args)
+
+
+class MetricsTask (task.LoggedCheckedTask):
+    """Thread serving the metrics until checking is finished."""
+
+    def __init__ (self, aggregate, address):
+        """Listen on given address.
+        @param aggregate: the aggregate object
+        @ptype aggregate: linkcheck.director.aggregator.Aggregate
+        @param address: host and port to listen on
+        @ptype address: tuple (string, int)
+        @raises: LinkCheckerError if the address can not be used
+        """
+        super(MetricsTask, self).__init__(aggregate.logger)
+        try:
+            self.server = MetricsServer(address, Metrics(aggregate))
+        except socket.error as msg:
+            raise LinkCheckerError(_("Could not listen on %(host)s:%(port)d:"
+                " %(msg)s") % {"host": address[0], "port": address[1],
+                "msg": msg})
+        # do not block program exit
+        self.setDaemon(True)
+
+    def run_checked (self):
+        """Serve scrape requests until stopped."""
+        self.setName("Metrics")
+        log.info(LOG_CHECK, _("Metrics served on %(host)s:%(port)d") %
+                 {"host": self.server.server_address[0],
+                  "port": self.server.server_address[1]})
+        try:
+            while not self.stopped(0):
+                self.server.handle_request()
+        finally:
+            self.server.server_close()
+
+
+def get_metrics_task (aggregate):
+    """Return a metrics thread if configured, else None."""
+    address = aggregate.config["metrics"]
+    if not address:
+        return None
+    return MetricsTask(aggregate, address)
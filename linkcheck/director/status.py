@@ -16,13 +16,15 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """Status message handling"""
 import time
+from .. import log, LOG_THREAD, lock
 from . import task
 
 
 class Status (task.LoggedCheckedTask):
     """Thread that gathers and logs the status periodically."""
 
-    def __init__ (self, urlqueue, logger, wait_seconds, max_duration):
+    def __init__ (self, urlqueue, logger, wait_seconds, max_duration,
+                  contentbudget):
         """Initialize the status logger task.
         @param urlqueue: the URL queue
         @ptype urlqueue: Urlqueue
@@ -32,6 +34,8 @@ class Status (task.LoggedCheckedTask):
         @ptype wait_seconds: int
         @param max_duration: abort checking after given number of seconds
         @ptype max_duration: int or None
+        @param contentbudget: the buffered content counter
+        @ptype contentbudget: ContentBudget
         """
         super(Status, self).__init__(logger)
         self.urlqueue = urlqueue
@@ -39,6 +43,7 @@ class Status (task.LoggedCheckedTask):
         assert self.wait_seconds >= 1
         self.first_wait = True
         self.max_duration = max_duration
+        self.contentbudget = contentbudget
 
     def run_checked (self):
         """Print periodic status messages."""
@@ -59,4 +64,10 @@ class Status (task.LoggedCheckedTask):
         if self.max_duration is not None and duration > self.max_duration:
             raise KeyboardInterrupt()
         checked, in_progress, queue = self.urlqueue.status()
-        self.logger.log_status(checked, in_progress, queue, duration)
+        buffered, buffered_peak = self.contentbudget.status()
+        self.logger.log_status(checked, in_progress, queue, duration,
+                               buffered, buffered_peak)
+        stats = lock.get_stats()
+        if stats is not None and log.is_debug(LOG_THREAD):
+            for line in stats.get_report():
+                log.debug(LOG_THREAD, line)
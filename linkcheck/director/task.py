@@ -16,7 +16,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 import thread
 from ..decorators import notimplemented
-from .. import log, LOG_CHECK, threader
+from .. import log, LOG_CHECK, threader, profiler
 from . import console
 
 
@@ -26,7 +26,7 @@ class CheckedTask (threader.StoppableThread):
     def run (self):
         """Handle keyboard interrupt and other errors."""
         try:
-            self.run_checked()
+            profiler.run_profiled(self.run_checked)
         except KeyboardInterrupt:
             log.warn(LOG_CHECK, "interrupt did not reach the main thread")
             thread.interrupt_main()
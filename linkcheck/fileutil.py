@@ -29,7 +29,7 @@ import importlib
 from distutils.spawn import find_executable
 
 from .decorators import memoized
-from . import log, LOG_CHECK
+from . import log, LOG_CHECK, sitemapparse
 
 def write_file (filename, content, backup=False, callback=None):
     """Overwrite a possibly existing file with new content. Do this
@@ -243,6 +243,12 @@ def guess_mimetype (filename, read=None):
                     break
         except Exception:
             pass
+    # XML files could be sitemaps or sitemap indexes
+    if mime in sitemapparse.XmlMimetypes and read is not None:
+        try:
+            mime = sitemapparse.guess_mimetype(read()) or mime
+        except Exception:
+            pass
     if not mime:
         mime = "application/octet-stream"
     elif ";" in mime:
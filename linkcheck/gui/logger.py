@@ -67,6 +67,8 @@ class StatusLogger (object):
         """Store given signal object."""
         self.signal = signal
 
-    def log_status (self, checked, in_progress, queued, duration):
-        """Emit signal with given status information."""
+    def log_status (self, checked, in_progress, queued, duration,
+                    buffered, buffered_peak):
+        """Emit signal with given status information. Buffered content
+        sizes are not displayed."""
         self.signal.emit(checked, in_progress, queued, duration)
@@ -19,10 +19,12 @@ from ..logger import ContentTypes
 
 def set_statistics (widget, statistics):
     """Set statistic information in given widget."""
-    widget.stats_domains.setText(u"%d" % len(statistics.domains))
-    widget.stats_url_minlen.setText(u"%d" % statistics.min_url_length)
-    widget.stats_url_maxlen.setText(u"%d" % statistics.max_url_length)
-    widget.stats_url_avglen.setText(u"%d" % statistics.avg_url_length)
+    collector = statistics.collector
+    if collector is not None:
+        widget.stats_domains.setText(u"%d" % len(collector.domains))
+        widget.stats_url_minlen.setText(u"%d" % collector.min_url_length)
+        widget.stats_url_maxlen.setText(u"%d" % collector.max_url_length)
+        widget.stats_url_avglen.setText(u"%d" % collector.avg_url_length)
     widget.stats_valid_urls.setText(u"%d" % (statistics.number - statistics.errors))
     if statistics.errors > 0:
         color = '#aa0000'
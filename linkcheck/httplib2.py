@@ -75,6 +75,7 @@ import mimetools
 from array import array
 import os
 import socket
+import time
 from urlparse import urlsplit
 import warnings
 
@@ -702,6 +703,8 @@ class HTTPConnection:
         self.__response = None
         self.__state = _CS_IDLE
         self._method = None
+        # seconds spent in the connection phases
+        self.timing = {}
         self._tunnel_host = None
         self._tunnel_port = None
         self._tunnel_headers = {}
@@ -776,10 +779,39 @@ class HTTPConnection:
                 break
 
 
+    def create_connection(self):
+        """Connect to the host and port like socket.create_connection(),
+        measuring the seconds spent in the "dns" and "connect" phases."""
+        start = time.time()
+        addrinfos = socket.getaddrinfo(self.host, self.port, 0,
+                                       socket.SOCK_STREAM)
+        self.timing["dns"] = time.time() - start
+        err = None
+        start = time.time()
+        try:
+            for af, socktype, proto, canonname, sa in addrinfos:
+                sock = None
+                try:
+                    sock = socket.socket(af, socktype, proto)
+                    if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                        sock.settimeout(self.timeout)
+                    if self.source_address:
+                        sock.bind(self.source_address)
+                    sock.connect(sa)
+                    return sock
+                except socket.error as msg:
+                    err = msg
+                    if sock is not None:
+                        sock.close()
+            if err is not None:
+                raise err
+            raise socket.error("getaddrinfo returns an empty list")
+        finally:
+            self.timing["connect"] = time.time() - start
+
     def connect(self):
         """Connect to the host and port specified in __init__."""
-        self.sock = socket.create_connection((self.host,self.port),
-                                             self.timeout, self.source_address)
+        self.sock = self.create_connection()
 
         if self._tunnel_host:
             self._tunnel()
@@ -1073,7 +1105,9 @@ class HTTPConnection:
             kwds["buffering"] = True;
         response = self.response_class(*args, **kwds)
 
+        start = time.time()
         response.begin()
+        self.timing["firstbyte"] = time.time() - start
         assert response.will_close != _UNKNOWN
         self.__state = _CS_IDLE
 
@@ -1207,14 +1241,18 @@ else:
         def connect(self):
             "Connect to a host on a given (SSL) port."
 
-            sock = socket.create_connection((self.host, self.port),
-                                            self.timeout, self.source_address)
+            sock = self.create_connection()
             if self._tunnel_host:
                 self.sock = sock
                 self._tunnel()
-            self.sock = ssl.wrap_socket(sock, self.key_file, self.cert_file,
-                                        cert_reqs=self.cert_reqs,
-                                        ca_certs=self.ca_certs)
+            start = time.time()
+            try:
+                self.sock = ssl.wrap_socket(sock, self.key_file,
+                                            self.cert_file,
+                                            cert_reqs=self.cert_reqs,
+                                            ca_certs=self.ca_certs)
+            finally:
+                self.timing["tls"] = time.time() - start
 
     __all__.append("HTTPSConnection")
 
@@ -17,21 +17,40 @@
 """
 Locking utility class.
 """
+import bisect
+import thread
 import threading
-from . import log, LOG_THREAD
+import time
+from . import log, LOG_THREAD, trace
+
+# lock statistics, recorded after calling enable_stats()
+_stats = None
 
 def get_lock (name, debug=False):
     """Get a new lock.
     @param debug: if True, acquire() and release() will have debug messages
     @ptype debug: boolean, default is False
     @return: a lock object
-    @rtype: threading.Lock or DebugLock
+    @rtype: InstrumentedLock
     """
     lock = threading.Lock()
     # for thread debugging, use the DebugLock wrapper
     if debug:
         lock = DebugLock(lock, name)
-    return lock
+    return InstrumentedLock(lock, name)
+
+
+def get_rlock (name, debug=False):
+    """Get a new reentrant lock.
+    @param debug: if True, acquire() and release() will have debug messages
+    @ptype debug: boolean, default is False
+    @return: a reentrant lock object
+    @rtype: InstrumentedLock
+    """
+    lock = threading.RLock()
+    if debug:
+        lock = DebugLock(lock, name)
+    return InstrumentedLock(lock, name)
 
 
 class DebugLock (object):
@@ -46,8 +65,9 @@ class DebugLock (object):
         """Acquire lock."""
         threadname = threading.currentThread().getName()
         log.debug(LOG_THREAD, "Acquire %s for %s", self.name, threadname)
-        self.lock.acquire(blocking)
+        acquired = self.lock.acquire(blocking)
         log.debug(LOG_THREAD, "...acquired %s for %s", self.name, threadname)
+        return acquired
 
     def release (self):
         """Release lock."""
@@ -63,7 +83,7 @@ def get_semaphore(name, value=None, debug=False):
     @param debug: if True, acquire() and release() will have debug messages
     @ptype debug: boolean, default is False
     @return: a semaphore object
-    @rtype: threading.Semaphore or threading.BoundedSemaphore or DebugLock
+    @rtype: InstrumentedLock
     """
     if value is None:
         lock = threading.Semaphore()
@@ -71,4 +91,186 @@ def get_semaphore(name, value=None, debug=False):
         lock = threading.BoundedSemaphore(value)
     if debug:
         lock = DebugLock(lock, name)
-    return lock
+    # semaphores can be released by other threads, so hold times are
+    # not recorded
+    return InstrumentedLock(lock, name, hold_times=False)
+
+
+class InstrumentedLock (object):
+    """Lock wrapper recording acquire counts, wait and hold times
+    by lock name. Without enabled statistics only the check of the
+    global statistics object is added to each acquire() and release()."""
+
+    __slots__ = ('lock', 'name', 'hold_times', 'acquired')
+
+    def __init__ (self, lock, name, hold_times=True):
+        """Store lock and name parameters.
+        @param hold_times: if True, record the time between acquire()
+          and release() in the same thread
+        @ptype hold_times: bool
+        """
+        self.lock = lock
+        self.name = name
+        self.hold_times = hold_times
+        # {thread id -> [acquire time, depth of reentrant acquires]}
+        self.acquired = {}
+
+    def acquire (self, blocking=1):
+        """Acquire lock. Only acquires that had to wait for another
+        thread are counted as contended, and only those are recorded
+        as trace events."""
+        stats = _stats
+        tracer = trace.tracer
+        if stats is None and tracer is None:
+            return self.lock.acquire(blocking)
+        if self.lock.acquire(False):
+            wait = 0.0
+        elif not blocking:
+            return False
+        else:
+            start = time.time()
+            self.lock.acquire()
+            wait = time.time() - start
+            if tracer is not None:
+                tracer.add_span(u"lock %s" % self.name, "lock", start, wait)
+        if stats is not None:
+            if self.hold_times:
+                tid = thread.get_ident()
+                entry = self.acquired.get(tid)
+                if entry is None:
+                    self.acquired[tid] = [time.time(), 1]
+                else:
+                    # nested acquire of a reentrant lock
+                    entry[1] += 1
+            stats.add_acquire(self.name, wait)
+        return True
+
+    def release (self):
+        """Release lock. The hold time is recorded when the outermost
+        acquire of the current thread is released."""
+        stats = _stats
+        if stats is not None and self.hold_times:
+            tid = thread.get_ident()
+            entry = self.acquired.get(tid)
+            if entry is not None:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.acquired[tid]
+                    stats.add_hold(self.name, time.time() - entry[0])
+        self.lock.release()
+
+    def __enter__ (self):
+        """Acquire lock in with statement."""
+        self.acquire()
+        return self
+
+    def __exit__ (self, *args):
+        """Release lock at end of with statement."""
+        self.release()
+
+
+# upper bounds in seconds of the wait and hold time histogram buckets
+HistogramBounds = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0)
+HistogramLabels = (u"<10us", u"<100us", u"<1ms", u"<10ms", u"<100ms",
+                   u"<1s", u">=1s")
+
+
+class LockCounter (object):
+    """Acquire counts and time histograms of one lock name."""
+
+    __slots__ = ('acquires', 'contended', 'wait', 'wait_max',
+                 'wait_histogram', 'hold', 'hold_max', 'hold_histogram')
+
+    def __init__ (self):
+        """Initialize counters."""
+        self.acquires = self.contended = 0
+        self.wait = self.wait_max = self.hold = self.hold_max = 0.0
+        self.wait_histogram = [0] * len(HistogramLabels)
+        self.hold_histogram = [0] * len(HistogramLabels)
+
+
+class LockStatistics (object):
+    """Lock statistics of all lock names."""
+
+    def __init__ (self):
+        """Initialize the counters. The counters are guarded by a plain
+        lock which is not instrumented itself."""
+        self.counters = {}
+        self.mutex = threading.Lock()
+
+    def get_counter (self, name):
+        """Get counter of given lock name. The mutex must be held."""
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = LockCounter()
+        return counter
+
+    def add_acquire (self, name, wait):
+        """Count an acquire of given lock name that waited the given
+        number of seconds."""
+        with self.mutex:
+            counter = self.get_counter(name)
+            counter.acquires += 1
+            if wait:
+                counter.contended += 1
+                counter.wait += wait
+                counter.wait_max = max(counter.wait_max, wait)
+            counter.wait_histogram[bisect.bisect(HistogramBounds, wait)] += 1
+
+    def add_hold (self, name, hold):
+        """Add the number of seconds given lock name was held."""
+        with self.mutex:
+            counter = self.get_counter(name)
+            counter.hold += hold
+            counter.hold_max = max(counter.hold_max, hold)
+            counter.hold_histogram[bisect.bisect(HistogramBounds, hold)] += 1
+
+    def get_report (self):
+        """Get report lines of all acquired locks, sorted by the total
+        wait time with the most contended locks first.
+        @return: report lines
+        @rtype: list of unicode
+        """
+        with self.mutex:
+            items = sorted(self.counters.items(),
+                key=lambda item: (-item[1].wait, -item[1].acquires, item[0]))
+            lines = []
+            for name, counter in items:
+                lines.append(_(u"Lock %(name)s: %(acquires)d acquires, "
+                  u"%(contended)d contended, wait %(wait).3fs "
+                  u"(max %(wait_max).3fs), hold %(hold).3fs "
+                  u"(max %(hold_max).3fs)") % dict(name=name,
+                  acquires=counter.acquires, contended=counter.contended,
+                  wait=counter.wait, wait_max=counter.wait_max,
+                  hold=counter.hold, hold_max=counter.hold_max))
+                lines.append(_(u"  wait %(histogram)s") %
+                  {"histogram": format_histogram(counter.wait_histogram)})
+                lines.append(_(u"  hold %(histogram)s") %
+                  {"histogram": format_histogram(counter.hold_histogram)})
+            return lines
+
+
+def format_histogram (histogram):
+    """Format the non-empty buckets of a histogram."""
+    return u", ".join(u"%s %d" % (label, count) for label, count in
+                      zip(HistogramLabels, histogram) if count)
+
+
+def enable_stats ():
+    """Start recording statistics of all instrumented locks."""
+    global _stats
+    _stats = LockStatistics()
+
+
+def disable_stats ():
+    """Stop recording lock statistics."""
+    global _stats
+    _stats = None
+
+
+def get_stats ():
+    """Get lock statistics.
+    @return: recorded statistics or None if not enabled
+    @rtype: LockStatistics or None
+    """
+    return _stats
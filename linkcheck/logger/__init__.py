@@ -24,7 +24,10 @@ import datetime
 import time
 import codecs
 import abc
-from .. import log, LOG_CHECK, strformat, dummy, configuration, i18n
+import zlib
+import bz2
+from .. import log, LOG_CHECK, strformat, dummy, configuration, i18n, \
+  fileutil
 
 _ = lambda x: x
 Fields = dict(
@@ -43,9 +46,16 @@ Fields = dict(
     url=_("URL"),
     level=_("Level"),
     modified=_("Modified"),
+    timing=_("Timing"),
 )
 del _
 
+# check phases of the URL timing in output order
+TimingPhases = (
+    "dns", "connect", "tls", "firstbyte", "redirect", "robotstxt",
+    "poolwait", "parse",
+)
+
 ContentTypes = dict(
     image=0,
     text=0,
@@ -57,12 +67,117 @@ ContentTypes = dict(
 )
 
 
+# compression of output files, selected by the compress logger option
+# or by the file name suffix
+Compressions = {
+    "gzip": ".gz",
+    "bz2": ".bz2",
+    "zstd": ".zst",
+}
+
+
+def get_compression (filename, compress=None):
+    """Get the compression of an output file.
+    @param filename: name of the output file
+    @ptype filename: string
+    @param compress: compress logger option, or None to look at the
+      file name suffix
+    @ptype compress: string or None
+    @return: key of Compressions or None for uncompressed output
+    @rtype: string or None
+    @raises: ValueError for unknown compress values
+    """
+    if compress is not None:
+        compress = compress.strip().lower()
+        if compress in ("", "none"):
+            return None
+        if compress not in Compressions:
+            raise ValueError(_("unknown compression %(compress)r") %
+                             {"compress": compress})
+        return compress
+    for compression, suffix in Compressions.items():
+        if filename.lower().endswith(suffix):
+            return compression
+    return None
+
+
+def open_output (filename, compression):
+    """Open an output file for writing byte strings, compressed while
+    writing with the given compression.
+    @return: the open file
+    @rtype: file-like object
+    """
+    fd = open(filename, "wb")
+    if compression is not None:
+        fd = CompressedOutput(fd, compression)
+    return fd
+
+
+def get_compressor (compression):
+    """Get a compressor object for one gzip member, bz2 or zstd stream.
+    @return: object with compress(data) and flush() methods, where
+      flush() ends the member
+    """
+    if compression == "gzip":
+        # a window size of 16 + MAX_WBITS writes the gzip format
+        return zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if compression == "bz2":
+        return bz2.BZ2Compressor()
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError("unknown compression %r" % compression)
+
+
+class CompressedOutput (object):
+    """Output file compressed while writing. The output is a sequence
+    of independently compressed members, which gzip, bzip2 and zstd
+    decompress as one file. A checkpoint ends the current member, so a
+    resumed check can truncate the file at the checkpoint position and
+    append a new member."""
+
+    def __init__ (self, fd, compression):
+        """Store wrapped file descriptor and compression."""
+        self.fd = fd
+        self.compression = compression
+        self.compressor = None
+
+    def write (self, data):
+        """Compress and write byte string."""
+        if self.compressor is None:
+            self.compressor = get_compressor(self.compression)
+        self.fd.write(self.compressor.compress(data))
+
+    def flush (self):
+        """Flush the wrapped file descriptor. Data buffered by the
+        compressor is written when the member ends."""
+        self.fd.flush()
+
+    def end_member (self):
+        """End the current member.
+        @return: file position after the member
+        @rtype: int
+        """
+        if self.compressor is not None:
+            self.fd.write(self.compressor.flush())
+            self.compressor = None
+        self.fd.flush()
+        return self.fd.tell()
+
+    def close (self):
+        """End the current member and close the file descriptor."""
+        try:
+            self.end_member()
+        finally:
+            self.fd.close()
+
+
 class LogStatistics (object):
     """Gather log statistics:
     - number of errors, warnings and valid links
     - type of contents (image, video, audio, text, ...)
-    - number of different domains
-    - URL lengths
+    Domains, URL lengths and timings of all checked URLs are gathered
+    once per check run by the statistics collector.
     """
 
     def __init__ (self):
@@ -83,19 +198,15 @@ class LogStatistics (object):
         self.warnings_printed = 0
         # number of internal errors
         self.internal_errors = 0
-        # the set of checked domains
-        self.domains = set()
         # link types
         self.link_types = ContentTypes.copy()
-        # URL length statistics
-        self.max_url_length = 0
-        self.min_url_length = 0
-        self.avg_url_length = 0.0
-        self.avg_number = 0
+        # the linkcheck.statistics.StatisticsCollector of the check run
+        self.collector = None
         # download stats
         self.downloaded_bytes = None
         # cache stats
         self.robots_txt_stats = None
+        self.intern_stats = None
 
     def log_url (self, url_data, do_print):
         """Log URL statistics."""
@@ -108,7 +219,6 @@ class LogStatistics (object):
         self.warnings += num_warnings
         if do_print:
             self.warnings_printed += num_warnings
-        self.domains.add(url_data.domain)
         if url_data.content_type:
             key = url_data.content_type.split('/', 1)[0].lower()
             if key not in self.link_types:
@@ -118,22 +228,49 @@ class LogStatistics (object):
         else:
             key = "other"
         self.link_types[key] += 1
-        if url_data.url:
-            l = len(url_data.url)
-            self.max_url_length = max(l, self.max_url_length)
-            if self.min_url_length == 0:
-                self.min_url_length = l
-            else:
-                self.min_url_length = min(l, self.min_url_length)
-            # track average number separately since empty URLs do not count
-            self.avg_number += 1
-            # calculate running average
-            self.avg_url_length += (l - self.avg_url_length) / self.avg_number
 
     def log_internal_error (self):
         """Increase internal error count."""
         self.internal_errors += 1
 
+    def get_counters (self):
+        """Return the URL counters for checkpoints."""
+        return dict(number=self.number, errors=self.errors,
+            errors_printed=self.errors_printed, warnings=self.warnings,
+            warnings_printed=self.warnings_printed,
+            internal_errors=self.internal_errors,
+            link_types=self.link_types.copy())
+
+    def set_counters (self, counters):
+        """Restore URL counters of a checkpoint."""
+        self.number = counters["number"]
+        self.errors = counters["errors"]
+        self.errors_printed = counters["errors_printed"]
+        self.warnings = counters["warnings"]
+        self.warnings_printed = counters["warnings_printed"]
+        self.internal_errors = counters["internal_errors"]
+        self.link_types = counters["link_types"].copy()
+
+
+class ResumedOutput (object):
+    """Output file continued at a checkpoint position. Writes are dropped
+    while skip is True, which is used while the logger writes its
+    header again."""
+
+    def __init__ (self, fd, skip):
+        """Store wrapped file descriptor."""
+        self.fd = fd
+        self.skip = skip
+
+    def write (self, s, **args):
+        """Write string unless skipping."""
+        if not self.skip:
+            self.fd.write(s, **args)
+
+    def __getattr__ (self, name):
+        """Delegate other attributes to the file descriptor."""
+        return getattr(self.fd, name)
+
 
 class _Logger (object):
     """
@@ -170,6 +307,9 @@ class _Logger (object):
     # Default log configuration
     LoggerArgs = {}
 
+    # If file output can be continued after a checkpoint
+    Resumable = True
+
     def __init__ (self, **args):
         """
         Initialize a logger, looking for part restrictions in kwargs.
@@ -197,6 +337,11 @@ class _Logger (object):
         self.codec_errors = "replace"
         # Flag to see if logger is active. Can be deactivated on errors.
         self.is_active = True
+        # file position to continue output when resuming a checkpoint
+        self.resume_position = None
+        # skip output of resumed file while writing the header
+        self.resume_skip = False
+        self.resumed_fd = None
 
     def get_args(self, kwargs):
         """Construct log configuration from default and user args."""
@@ -225,13 +370,34 @@ class _Logger (object):
         self.filename = None
         self.close_fd = False
         self.fd = None
+        self.compression = None
         if args.get('fileoutput'):
             self.filename = os.path.expanduser(args['filename'])
+            self.init_compression(args.get('compress'))
         elif 'fd' in args:
             self.fd = args['fd']
         else:
             self.fd = self.create_fd()
 
+    def init_compression (self, compress):
+        """Determine the compression of the output file from the
+        compress option or the file name suffix."""
+        try:
+            self.compression = get_compression(self.filename, compress)
+        except ValueError as msg:
+            log.warn(LOG_CHECK, "%s, writing uncompressed output", msg)
+            return
+        if self.compression == "zstd" and \
+           not fileutil.has_module("zstandard"):
+            log.warn(LOG_CHECK, strformat.format_feature_warning(
+                module=u'zstandard', feature=u'zstd compressed output',
+                url=u'https://pypi.python.org/pypi/zstandard'))
+            self.compression = None
+
+    def open_fileoutput (self):
+        """Open the output file for writing byte strings."""
+        return open_output(self.filename, self.compression)
+
     def start_fileoutput (self):
         """Start output to configured file."""
         path = os.path.dirname(self.filename)
@@ -254,8 +420,31 @@ class _Logger (object):
         if self.filename is None:
             return i18n.get_encoded_writer(encoding=self.output_encoding,
                                            errors=self.codec_errors)
-        return codecs.open(self.filename, "wb", self.output_encoding,
-                           self.codec_errors)
+        if self.resume_position is not None and \
+           os.path.isfile(self.filename):
+            return self.create_resumed_fd(self.output_encoding)
+        fd = self.open_fileoutput()
+        return codecs.getwriter(self.output_encoding)(fd, self.codec_errors)
+
+    def create_resumed_fd (self, encoding):
+        """Open existing output file, truncated at the resume position.
+        @param encoding: encoding of the returned writer, or None to
+          write byte strings
+        @ptype encoding: string or None
+        """
+        fd = open(self.filename, "r+b")
+        fd.seek(self.resume_position)
+        fd.truncate()
+        if self.compression is not None:
+            # the position is at the end of a member, append a new one
+            fd = CompressedOutput(fd, self.compression)
+        if encoding is not None:
+            if encoding == "utf-8-sig" and self.resume_position:
+                # do not write the byte order mark again
+                encoding = "utf-8"
+            fd = codecs.getwriter(encoding)(fd, self.codec_errors)
+        self.resumed_fd = ResumedOutput(fd, self.resume_skip)
+        return self.resumed_fd
 
     def close_fileoutput (self):
         """
@@ -339,6 +528,13 @@ class _Logger (object):
             return True
         return name in self.logparts
 
+    def has_explicit_part (self, name):
+        """
+        See if given part name has been explicitly configured. Used for
+        parts that are not logged per default.
+        """
+        return self.logparts is not None and name in self.logparts
+
     def part (self, name):
         """
         Return translated part name.
@@ -369,6 +565,46 @@ class _Logger (object):
         self.stats.reset()
         self.starttime = time.time()
 
+    def get_checkpoint (self):
+        """Get state to continue the output after a checkpoint. This
+        is called by the aggregate logger with no URLs being logged.
+        @return: state with logger name, output file position and
+          URL counters
+        @rtype: dict
+        """
+        position = None
+        if getattr(self, "close_fd", False) and self.is_active:
+            # output file has been opened
+            self.flush()
+            if getattr(self, "compression", None) is not None:
+                position = self.fd.end_member()
+            else:
+                position = self.fd.tell()
+        return dict(logger=self.LoggerName, position=position,
+                    counters=self.stats.get_counters())
+
+    def start_resumed_output (self, state):
+        """Start log output continuing the output of a checkpoint.
+        An output file is truncated to the checkpoint position, and the
+        header written by start_output() is skipped.
+        @param state: state returned by get_checkpoint()
+        @ptype state: dict
+        """
+        if state["position"] is not None:
+            if self.Resumable and getattr(self, "filename", None):
+                self.resume_position = state["position"]
+                self.resume_skip = True
+            else:
+                log.warn(LOG_CHECK, _("Output of %(logger)s can not be "
+                    "continued, starting new output.") % {"logger": self})
+        try:
+            self.start_output()
+        finally:
+            self.resume_skip = False
+            if self.resumed_fd is not None:
+                self.resumed_fd.skip = False
+        self.stats.set_counters(state["counters"])
+
     def log_filter_url (self, url_data, do_print):
         """
         Log a new url with this logger if do_print is True. Else
@@ -442,10 +678,50 @@ class _Logger (object):
         log.warn(LOG_CHECK, "internal error occurred")
         self.stats.log_internal_error()
 
-    def add_statistics(self, robots_txt_stats, download_stats):
-        """Add cache and download statistics."""
+    def add_statistics(self, robots_txt_stats, download_stats, intern_stats,
+                       collector):
+        """Add cache, download and URL statistics."""
         self.stats.robots_txt_stats = robots_txt_stats
         self.stats.downloaded_bytes = download_stats
+        self.stats.intern_stats = intern_stats
+        self.stats.collector = collector
+
+    def get_collector_stats (self):
+        """Return lines with quantiles of check times, download times and
+        sizes, and the slowest URLs and hosts of the check run.
+        @return: list of lines
+        @rtype: list of unicode
+        """
+        collector = self.stats.collector
+        if collector is None or not collector.number:
+            return []
+        lines = []
+        def seconds (value):
+            """Format time value."""
+            return _("%.3f seconds") % value
+        for name, sketch, formatter in (
+            (_("Check time"), collector.checktime, seconds),
+            (_("Download time"), collector.dltime, seconds),
+            (_("Download size"), collector.dlsize, strformat.strsize),
+        ):
+            if not sketch.count:
+                continue
+            q50, q90, q99 = [formatter(x) for x in
+                             collector.get_quantiles(sketch)]
+            lines.append(_("%(name)s: median %(q50)s, 90%% %(q90)s, "
+                "99%% %(q99)s, max %(max)s.") % dict(name=name, q50=q50,
+                q90=q90, q99=q99, max=formatter(sketch.max)))
+        urls = collector.get_slowest_urls()
+        if urls:
+            lines.append(_("Slowest URLs:"))
+            for checktime, url in urls:
+                lines.append(u"  %s %s" % (seconds(checktime), url))
+        hosts = collector.get_slowest_hosts()
+        if hosts:
+            lines.append(_("Slowest hosts by median check time:"))
+            for checktime, host in hosts:
+                lines.append(u"  %s %s" % (seconds(checktime), host))
+        return lines
 
     def format_modified(self, modified, sep=" "):
         """Format modification date in UTC if it's not None.
@@ -458,6 +734,29 @@ class _Logger (object):
             return modified.strftime("%Y-%m-%d{0}%H:%M:%S.%fZ".format(sep))
         return u""
 
+    def get_timing(self, timing):
+        """Get check phase timing sorted in the order of TimingPhases.
+        @param timing: seconds spent in the check phases
+        @ptype timing: dict or None
+        @return: list of (phase, seconds)
+        @rtype: list of tuples (string, float)
+        """
+        if not timing:
+            return []
+        order = dict((phase, i) for i, phase in enumerate(TimingPhases))
+        key = lambda phase: (order.get(phase, len(order)), phase)
+        return [(phase, timing[phase]) for phase in sorted(timing, key=key)]
+
+    def format_timing(self, timing):
+        """Format check phase timing.
+        @param timing: seconds spent in the check phases
+        @ptype timing: dict or None
+        @return: formatted timing, eg. "dns 0.012s, connect 0.003s"
+        @rtype: unicode
+        """
+        return u", ".join(u"%s %.3fs" % item for item in
+                          self.get_timing(timing))
+
 def _get_loggers():
     """Return list of Logger classes."""
     from .. import loader
@@ -20,7 +20,82 @@ A blacklist logger.
 
 import os
 import codecs
+try:
+    import sqlite3
+    has_sqlite = True
+except ImportError:
+    has_sqlite = False
 from . import _Logger
+from .. import log, LOG_CHECK
+
+# header of sqlite database files
+SqliteMagic = "SQLite format 3\x00"
+
+
+def is_sqlite_file (filename):
+    """Check if given file is a sqlite database."""
+    with open(filename, 'rb') as fd:
+        return fd.read(len(SqliteMagic)) == SqliteMagic
+
+
+class BlacklistStore (object):
+    """
+    Indexed blacklist of failing URLs in a sqlite database. Each entry
+    maps the URL cache key to the number of times the URL failed.
+    """
+
+    def __init__ (self, filename=":memory:"):
+        """Open or create the blacklist database.
+        @param filename: database file name
+        @ptype filename: string
+        """
+        # the logger lock serializes calls from different checker threads
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS blacklist "
+            "(url TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS blacklist_count "
+            "ON blacklist (count)")
+        self.conn.commit()
+
+    def get (self, key):
+        """Return number of failures of given URL cache key, zero if
+        the URL is not blacklisted."""
+        row = self.conn.execute("SELECT count FROM blacklist WHERE url=?",
+                                (key,)).fetchone()
+        return row[0] if row else 0
+
+    def add_failure (self, key, count=1):
+        """Increase the failure count of given URL cache key."""
+        cursor = self.conn.execute("UPDATE blacklist SET count=count+? "
+            "WHERE url=?", (count, key))
+        if not cursor.rowcount:
+            self.conn.execute("INSERT INTO blacklist VALUES (?,?)",
+                              (key, count))
+
+    def remove (self, key):
+        """Remove given URL cache key from the blacklist."""
+        self.conn.execute("DELETE FROM blacklist WHERE url=?", (key,))
+
+    def get_failing (self, runs=1):
+        """Return entries which failed at least the given number of times.
+        @return: iterator of (URL cache key, count), most failures first
+        @rtype: iterator of tuples (unicode, int)
+        """
+        return self.conn.execute("SELECT url, count FROM blacklist "
+            "WHERE count>=? ORDER BY count DESC, url", (runs,))
+
+    def __len__ (self):
+        """Return number of blacklisted URLs."""
+        return self.conn.execute("SELECT COUNT(*) FROM blacklist").fetchone()[0]
+
+    def commit (self):
+        """Store pending changes."""
+        self.conn.commit()
+
+    def close (self):
+        """Store pending changes and close the database."""
+        self.conn.commit()
+        self.conn.close()
 
 
 class BlacklistLogger (_Logger):
@@ -28,6 +103,8 @@ class BlacklistLogger (_Logger):
     Updates a blacklist of wrong links. If a link on the blacklist
     is working (again), it is removed from the list. So after n days
     we have only links on the list which failed for n days.
+    The blacklist file is a sqlite database updated while checking.
+    Without file output the blacklist is printed at the end.
     """
 
     LoggerName = "blacklist"
@@ -36,14 +113,20 @@ class BlacklistLogger (_Logger):
         "filename": "~/.linkchecker/blacklist",
     }
 
+    # number of URL updates before changes are committed, unless
+    # checkpoints are written
+    CommitInterval = 100
+
     def __init__ (self, **kwargs):
-        """Intialize with old blacklist data (if found, else not)."""
+        """Initialize file output. The blacklist is opened when output
+        starts."""
         args = self.get_args(kwargs)
         super(BlacklistLogger, self).__init__(**args)
         self.init_fileoutput(args)
-        self.blacklist = {}
-        if self.filename is not None and os.path.exists(self.filename):
-            self.read_blacklist()
+        self.blacklist = None
+        self.updates = 0
+        # with checkpoints, changes are only committed at checkpoints
+        self.checkpoints = False
 
     def comment (self, s, **args):
         """
@@ -51,46 +134,108 @@ class BlacklistLogger (_Logger):
         """
         pass
 
+    def start_output (self):
+        """Open the blacklist database."""
+        super(BlacklistLogger, self).start_output()
+        if not has_sqlite:
+            log.warn(LOG_CHECK, "The blacklist output needs the sqlite3 "
+                     "Python module, disabling output of %s", self)
+            self.is_active = False
+            return
+        if self.filename is None:
+            self.blacklist = BlacklistStore()
+            return
+        path = os.path.dirname(self.filename)
+        if path and not os.path.isdir(path):
+            os.makedirs(path)
+        oldmask = os.umask(0077)
+        try:
+            if os.path.exists(self.filename) and \
+               not is_sqlite_file(self.filename):
+                self.convert_blacklist()
+            self.blacklist = BlacklistStore(self.filename)
+        finally:
+            # restore umask
+            os.umask(oldmask)
+
     def log_url (self, url_data):
         """
         Put invalid url in blacklist, delete valid url from blacklist.
         """
+        if self.blacklist is None:
+            return
         key = url_data.cache_url_key
-        if key in self.blacklist:
-            if url_data.valid:
-                del self.blacklist[key]
-            else:
-                self.blacklist[key] += 1
+        if url_data.valid:
+            self.blacklist.remove(key)
         else:
-            if not url_data.valid:
-                self.blacklist[key] = 1
+            self.blacklist.add_failure(key)
+        self.updates += 1
+        if not self.checkpoints and self.updates % self.CommitInterval == 0:
+            self.blacklist.commit()
+
+    def get_checkpoint (self):
+        """Commit the blacklist changes. From now on changes are only
+        committed at checkpoints, so after an interruption the blacklist
+        matches the checkpoint and failures are not counted twice when
+        the check is resumed."""
+        if self.blacklist is not None:
+            self.blacklist.commit()
+            self.checkpoints = True
+        return super(BlacklistLogger, self).get_checkpoint()
+
+    def start_resumed_output (self, state):
+        """Continue committing changes at checkpoints."""
+        super(BlacklistLogger, self).start_resumed_output(state)
+        self.checkpoints = True
 
     def end_output (self):
         """
-        Write blacklist file.
+        Store and close the blacklist. Without file output the
+        blacklist entries are written to the output.
         """
-        self.write_blacklist()
+        if self.blacklist is None:
+            return
+        if self.filename is None:
+            self.write_blacklist()
+        self.blacklist.close()
+        self.blacklist = None
 
-    def read_blacklist (self):
+    def read_blacklist (self, filename):
         """
-        Read a previously stored blacklist from file fd.
+        Read a blacklist text file of earlier versions.
+        @return: iterator of (URL cache key, count)
+        @rtype: iterator of tuples (unicode, int)
         """
-        with codecs.open(self.filename, 'r', self.output_encoding,
+        with codecs.open(filename, 'r', self.output_encoding,
                          self.codec_errors) as fd:
             for line in fd:
                 line = line.rstrip()
                 if line.startswith('#') or not line:
                     continue
                 value, key = line.split(None, 1)
-                self.blacklist[key] = int(value)
+                yield key, int(value)
+
+    def convert_blacklist (self):
+        """
+        Convert a blacklist text file of earlier versions into
+        a blacklist database.
+        """
+        log.info(LOG_CHECK, "Converting blacklist file %s", self.filename)
+        tmpname = self.filename + ".tmp"
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        store = BlacklistStore(tmpname)
+        for key, count in self.read_blacklist(self.filename):
+            store.add_failure(key, count)
+        store.close()
+        # os.rename() cannot replace existing files on Windows
+        os.remove(self.filename)
+        os.rename(tmpname, self.filename)
 
     def write_blacklist (self):
         """
         Write the blacklist.
         """
-        oldmask = os.umask(0077)
-        for key, value in self.blacklist.items():
+        for key, value in self.blacklist.get_failing():
             self.write(u"%d %s%s" % (value, key, os.linesep))
         self.close_fileoutput()
-        # restore umask
-        os.umask(oldmask)
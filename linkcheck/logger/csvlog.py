@@ -60,7 +60,10 @@ class CSVLogger (_Logger):
         """Create open file descriptor."""
         if self.filename is None:
             return sys.stdout
-        return open(self.filename, "wb")
+        if self.resume_position is not None and \
+           os.path.isfile(self.filename):
+            return self.create_resumed_fd(None)
+        return self.open_fileoutput()
 
     def write (self, s, **args):
         """Write encoded string."""
@@ -86,6 +89,8 @@ class CSVLogger (_Logger):
         for s in Columns:
             if self.has_part(s):
                 row.append(s)
+        if self.has_explicit_part(u"timing"):
+            row.append(u"timing")
         if row:
             self.writerow(row)
 
@@ -126,8 +131,9 @@ class CSVLogger (_Logger):
             row.append(url_data.level)
         if self.has_part("modified"):
             row.append(self.format_modified(url_data.modified))
+        if self.has_explicit_part(u"timing"):
+            row.append(self.format_timing(url_data.timing))
         self.writerow(map(strformat.unicode_safe, row))
-        self.flush()
 
     def writerow (self, row):
         """Write one row in CSV format."""
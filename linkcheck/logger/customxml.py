@@ -70,6 +70,11 @@ class CustomXMLLogger (xmllog._XMLLogger):
             self.xml_tag(u"dlsize", u"%d" % url_data.dlsize)
         if url_data.checktime and self.has_part("checktime"):
             self.xml_tag(u"checktime", u"%f" % url_data.checktime)
+        if url_data.timing and self.has_explicit_part("timing"):
+            self.xml_starttag(u"timing")
+            for phase, seconds in self.get_timing(url_data.timing):
+                self.xml_tag(u"phase", u"%f" % seconds, {u"name": phase})
+            self.xml_endtag(u"timing")
         if self.has_part("level"):
             self.xml_tag(u"level", u"%d" % url_data.level)
         if url_data.info and self.has_part('info'):
@@ -93,7 +98,6 @@ class CustomXMLLogger (xmllog._XMLLogger):
                 attrs["result"] = url_data.result
             self.xml_tag(u"valid", u"%d" % (1 if url_data.valid else 0), attrs)
         self.xml_endtag(u'urldata')
-        self.flush()
 
     def end_output (self):
         """
@@ -51,7 +51,7 @@ class DOTLogger (_GraphLogger):
         self.writeln(s=s, **args)
 
     def log_url (self, url_data):
-        """Write one node."""
+        """Write one node and its edge if the parent node is known."""
         node = self.get_node(url_data)
         if node is not None:
             self.writeln(u'  "%s" [' % dotquote(node["label"]))
@@ -66,10 +66,11 @@ class DOTLogger (_GraphLogger):
             if self.has_part("extern"):
                 self.writeln(u"    extern=%d," % node["extern"])
             self.writeln(u"  ];")
+            self.write_node_edge(node)
 
-    def write_edge (self, node):
+    def write_edge (self, node, parent):
         """Write edge from parent to node."""
-        source = dotquote(self.nodes[node["parent_url"]]["label"])
+        source = dotquote(parent[1])
         target = dotquote(node["label"])
         self.writeln(u'  "%s" -> "%s" [' % (source, target))
         self.writeln(u'    label="%s",' % dotquote(node["edge"]))
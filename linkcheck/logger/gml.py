@@ -45,7 +45,7 @@ class GMLLogger (_GraphLogger):
         self.writeln(s=u'comment "%s"' % s, **args)
 
     def log_url (self, url_data):
-        """Write one node."""
+        """Write one node and its edge if the parent node is known."""
         node = self.get_node(url_data)
         if node:
             self.writeln(u"  node [")
@@ -62,12 +62,13 @@ class GMLLogger (_GraphLogger):
             if self.has_part("extern"):
                 self.writeln(u"    extern %d" % node["extern"])
             self.writeln(u"  ]")
+            self.write_node_edge(node)
 
-    def write_edge (self, node):
+    def write_edge (self, node, parent):
         """Write one edge."""
         self.writeln(u"  edge [")
         self.writeln(u'    label  "%s"' % node["edge"])
-        self.writeln(u"    source %d" % self.nodes[node["parent_url"]]["id"])
+        self.writeln(u"    source %d" % parent[0])
         self.writeln(u"    target %d" % node["id"])
         if self.has_part("result"):
             self.writeln(u"    valid  %d" % node["valid"])
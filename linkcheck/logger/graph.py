@@ -17,22 +17,142 @@
 """
 Base class for graph loggers.
 """
+import os
+import re
+try:
+    import sqlite3
+    has_sqlite = True
+except ImportError:
+    has_sqlite = False
 from . import _Logger
+from .. import fileutil
 from ..decorators import notimplemented
-import re
+
+
+class MemoryNodeIndex (object):
+    """Store written nodes and edges with unknown parent in memory.
+    Used when the sqlite3 module is not available."""
+
+    def __init__ (self):
+        """Initialize node mapping and pending edge list."""
+        # mapping {url -> (id, label)}
+        self.nodes = {}
+        self.pending = []
+
+    def add_node (self, node):
+        """Store id and label of given node."""
+        self.nodes[node["url"]] = (node["id"], node["label"])
+
+    def get_node (self, url):
+        """Return (id, label) of the node with given URL or None."""
+        return self.nodes.get(url)
+
+    def add_pending (self, node):
+        """Store an edge whose parent node has not been written yet."""
+        self.pending.append((node["parent_url"], node["id"], node["label"],
+                             node["edge"], node["valid"]))
+
+    def get_pending (self):
+        """Return iterator of (node, parent) tuples of pending edges
+        whose parent node is known now."""
+        for parent_url, nid, label, edge, valid in self.pending:
+            parent = self.nodes.get(parent_url)
+            if parent is not None:
+                yield get_edge_node(nid, label, edge, valid), parent
+
+    def close (self):
+        """Free the stored data."""
+        self.nodes = {}
+        self.pending = []
+
+
+class SqliteNodeIndex (object):
+    """Store written nodes and edges with unknown parent in a temporary
+    sqlite database, so memory usage does not depend on the graph size."""
+
+    def __init__ (self):
+        """Create the temporary database."""
+        fd, self.filename = fileutil.get_temp_file(mode='wb',
+            prefix='lc_graph_', suffix='.db')
+        fd.close()
+        # the logger lock serializes calls from different checker threads
+        self.conn = sqlite3.connect(self.filename, check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("CREATE TABLE node (url TEXT PRIMARY KEY, "
+            "id INTEGER, label TEXT)")
+        self.conn.execute("CREATE TABLE pending (parent_url TEXT, "
+            "id INTEGER, label TEXT, edge TEXT, valid INTEGER)")
+
+    def add_node (self, node):
+        """Store id and label of given node."""
+        self.conn.execute("INSERT INTO node VALUES (?,?,?)",
+                          (node["url"], node["id"], node["label"]))
+
+    def get_node (self, url):
+        """Return (id, label) of the node with given URL or None."""
+        return self.conn.execute("SELECT id, label FROM node WHERE url=?",
+                                 (url,)).fetchone()
+
+    def add_pending (self, node):
+        """Store an edge whose parent node has not been written yet."""
+        self.conn.execute("INSERT INTO pending VALUES (?,?,?,?,?)",
+            (node["parent_url"], node["id"], node["label"], node["edge"],
+             node["valid"]))
+
+    def get_pending (self):
+        """Return iterator of (node, parent) tuples of pending edges
+        whose parent node is known now."""
+        cursor = self.conn.execute("SELECT p.id, p.label, p.edge, p.valid, "
+            "n.id, n.label FROM pending p JOIN node n "
+            "ON p.parent_url = n.url ORDER BY p.rowid")
+        for nid, label, edge, valid, parent_id, parent_label in cursor:
+            yield (get_edge_node(nid, label, edge, valid),
+                   (parent_id, parent_label))
+
+    def close (self):
+        """Close and remove the temporary database."""
+        self.conn.close()
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+def get_edge_node (nid, label, edge, valid):
+    """Return node dictionary with the values needed to write an edge."""
+    return {"id": nid, "label": label, "edge": edge, "valid": valid}
+
+
+def get_node_index ():
+    """Return an on-disk node index if sqlite3 is available, else
+    a memory node index."""
+    if has_sqlite:
+        return SqliteNodeIndex()
+    return MemoryNodeIndex()
 
 
 class _GraphLogger (_Logger):
-    """Provide base method to get node data."""
+    """Provide base method to get node data. Nodes are written as they
+    are logged. Edges are written as soon as the parent node is known;
+    the remaining edges are written at the end of output."""
+
+    # the node index is not part of checkpoints
+    Resumable = False
 
     def __init__ (self, **kwargs):
-        """Initialize graph node list and internal id counter."""
+        """Initialize node index and internal id counter."""
         args = self.get_args(kwargs)
         super(_GraphLogger, self).__init__(**args)
         self.init_fileoutput(args)
-        self.nodes = {}
+        self.nodes = None
         self.nodeid = 0
 
+    def start_output (self):
+        """Create the node index."""
+        super(_GraphLogger, self).start_output()
+        self.nodes = get_node_index()
+
     def log_filter_url(self, url_data, do_print):
         """Update accounting data and log all valid URLs regardless the
         do_print flag.
@@ -46,7 +166,7 @@ class _GraphLogger (_Logger):
         """Return new node data or None if node already exists."""
         if not url_data.url:
             return None
-        elif url_data.url in self.nodes:
+        elif self.nodes.get_node(url_data.url) is not None:
             return None
         node = {
             "url": url_data.url,
@@ -60,22 +180,37 @@ class _GraphLogger (_Logger):
             "edge": quote(url_data.name),
             "valid": 1 if url_data.valid else 0,
         }
-        self.nodes[node["url"]] = node
+        self.nodes.add_node(node)
         self.nodeid += 1
         return node
 
+    def write_node_edge (self, node):
+        """Write the edge from the parent to given node if the parent
+        node has already been written, else store it for write_edges()."""
+        if not node["parent_url"]:
+            return
+        parent = self.nodes.get_node(node["parent_url"])
+        if parent is not None:
+            self.write_edge(node, parent)
+        else:
+            self.nodes.add_pending(node)
+
     def write_edges (self):
         """
-        Write all edges we can find in the graph in a brute-force manner.
+        Write all stored edges whose parent node has been written.
         """
-        for node in self.nodes.values():
-            if node["parent_url"] in self.nodes:
-                self.write_edge(node)
+        for node, parent in self.nodes.get_pending():
+            self.write_edge(node, parent)
         self.flush()
 
     @notimplemented
-    def write_edge (self, node):
-        """Write edge data for one node and its parent."""
+    def write_edge (self, node, parent):
+        """Write edge data for one node and its parent.
+        @param node: node data
+        @ptype node: dict
+        @param parent: id and label of parent node
+        @ptype parent: tuple (int, unicode)
+        """
         pass
 
     @notimplemented
@@ -86,6 +221,7 @@ class _GraphLogger (_Logger):
     def end_output (self):
         """Write edges and end of checking info as gml comment."""
         self.write_edges()
+        self.nodes.close()
         self.end_graph()
         if self.has_part("outro"):
             self.write_outro()
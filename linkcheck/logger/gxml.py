@@ -32,13 +32,6 @@ class GraphXMLLogger (_XMLLogger, _GraphLogger):
         "filename": "linkchecker-out.gxml",
     }
 
-    def __init__ (self, **kwargs):
-        """Initialize graph node list and internal id counter."""
-        args = self.get_args(kwargs)
-        super(GraphXMLLogger, self).__init__(**args)
-        self.nodes = {}
-        self.nodeid = 0
-
     def start_output (self):
         """Write start of checking info as xml comment."""
         super(GraphXMLLogger, self).start_output()
@@ -66,11 +59,12 @@ class GraphXMLLogger (_XMLLogger, _GraphLogger):
                 self.xml_tag(u"extern", u"%d" % node["extern"])
             self.xml_endtag(u"data")
             self.xml_endtag(u"node")
+            self.write_node_edge(node)
 
-    def write_edge (self, node):
+    def write_edge (self, node, parent):
         """Write one edge."""
         attrs = {
-            u"source": u"%d" % self.nodes[node["parent_url"]]["id"],
+            u"source": u"%d" % parent[0],
             u"target": u"%d" % node["id"],
         }
         self.xml_starttag(u"edge", attrs=attrs)
@@ -84,6 +78,8 @@ class GraphXMLLogger (_XMLLogger, _GraphLogger):
     def end_output (self):
         """Finish graph output, and print end of checking info as xml
         comment."""
+        self.write_edges()
+        self.nodes.close()
         self.xml_endtag(u"graph")
         self.xml_endtag(u"GraphXML")
         self.xml_end_output()
@@ -140,7 +140,6 @@ class HtmlLogger (_Logger):
         if self.has_part("result"):
             self.write_result(url_data)
         self.write_table_end()
-        self.flush()
 
     def write_table_start (self):
         """Start html table."""
@@ -265,19 +264,24 @@ class HtmlLogger (_Logger):
     def write_stats (self):
         """Write check statistic infos."""
         self.writeln(u'<br><i>%s</i><br>' % _("Statistics"))
-        if len(self.stats.domains) > 1:
-            self.writeln(_("Number of domains: %d") % len(self.stats.domains))
+        collector = self.stats.collector
+        if collector is not None and len(collector.domains) > 1:
+            self.writeln(_("Number of domains: %d") % len(collector.domains))
             self.writeln(u"<br>")
         if self.stats.number > 0:
             self.writeln(_(
               "Content types: %(image)d image, %(text)d text, %(video)d video, "
               "%(audio)d audio, %(application)d application, %(mail)d mail"
               " and %(other)d other.") % self.stats.link_types)
-            self.writeln(u"<br>")
-            self.writeln(_("URL lengths: min=%(min)d, max=%(max)d, avg=%(avg)d.") %
-                         dict(min=self.stats.min_url_length,
-                         max=self.stats.max_url_length,
-                         avg=self.stats.avg_url_length))
+            if collector is not None:
+                self.writeln(u"<br>")
+                self.writeln(_("URL lengths: min=%(min)d, max=%(max)d, avg=%(avg)d.") %
+                             dict(min=collector.min_url_length,
+                             max=collector.max_url_length,
+                             avg=collector.avg_url_length))
+            for line in self.get_collector_stats():
+                self.writeln(u"<br>")
+                self.writeln(cgi.escape(line).replace(u"  ", u"&nbsp;&nbsp;"))
         else:
             self.writeln(_("No statistics available since no URLs were checked."))
         self.writeln(u"<br>")
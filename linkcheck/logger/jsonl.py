@@ -0,0 +1,76 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+A JSON Lines logger.
+"""
+import json
+import os
+import sys
+from . import _Logger
+from ..checker.urlbase import urlDataAttr
+
+
+class JSONLLogger (_Logger):
+    """
+    JSON Lines output, consisting of one JSON object per line with the
+    attributes of the checked URL. The output has no comments, so it
+    can be piped into other programs.
+    """
+
+    LoggerName = "jsonl"
+
+    LoggerArgs = {
+        "filename": "linkchecker-out.jsonl",
+    }
+
+    def __init__ (self, **kwargs):
+        """Initialize the JSON encoder."""
+        args = self.get_args(kwargs)
+        super(JSONLLogger, self).__init__(**args)
+        self.init_fileoutput(args)
+        # The output is ASCII since non-ASCII characters are escaped,
+        # so the encoded JSON is written without another encoding step.
+        self.encoder = json.JSONEncoder(separators=(",", ":"))
+        self.fields = urlDataAttr
+
+    def create_fd (self):
+        """Create open file descriptor."""
+        if self.filename is None:
+            return sys.stdout
+        if self.resume_position is not None and \
+           os.path.isfile(self.filename):
+            return self.create_resumed_fd(None)
+        return self.open_fileoutput()
+
+    def start_output (self):
+        """Determine the logged attributes."""
+        super(JSONLLogger, self).start_output()
+        self.fields = [name for name in urlDataAttr if self.has_part(name)]
+        # write empty string to initialize file output
+        self.write("")
+
+    def log_url (self, url_data):
+        """Write one JSON object with the URL check info."""
+        values = dict((name, getattr(url_data, name)) for name in self.fields)
+        if values.get("modified") is not None:
+            values["modified"] = self.format_modified(values["modified"],
+                                                      sep="T")
+        self.write(self.encoder.encode(values) + "\n")
+
+    def end_output (self):
+        """Close the output file."""
+        self.close_fileoutput()
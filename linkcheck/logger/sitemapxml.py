@@ -72,6 +72,19 @@ class SitemapXmlLogger (xmllog._XMLLogger):
         self.xml_starttag(u'urlset', attrs)
         self.flush()
 
+    def get_checkpoint (self):
+        """Add URL prefix to the checkpoint state."""
+        state = super(SitemapXmlLogger, self).get_checkpoint()
+        state["prefix"] = self.prefix
+        state["disabled"] = self.disabled
+        return state
+
+    def start_resumed_output (self, state):
+        """Restore URL prefix of the checkpoint state."""
+        super(SitemapXmlLogger, self).start_resumed_output(state)
+        self.prefix = state["prefix"]
+        self.disabled = state["disabled"]
+
     def log_filter_url(self, url_data, do_print):
         """Update accounting data and determine if URL should be included
         in the sitemap.
@@ -111,7 +124,6 @@ class SitemapXmlLogger (xmllog._XMLLogger):
         self.xml_tag(u'changefreq', self.frequency)
         self.xml_tag(u'priority', "%.2f" % priority)
         self.xml_endtag(u'url')
-        self.flush()
 
     def end_output (self):
         """Write XML end tag."""
@@ -15,12 +15,42 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
-A SQL logger.
+A SQL logger. It writes SQL insert statements to a file, or inserts
+the rows directly into a database with a DB-API 2.0 driver.
 """
 
 import os
+import importlib
 from . import _Logger
-from .. import url as urlutil
+from .. import url as urlutil, log, LOG_CHECK
+
+# columns of the table, see config/create.sql
+Columns = ("urlname", "parentname", "baseref", "valid", "result",
+    "warning", "info", "url", "line", "col", "name", "checktime",
+    "dltime", "dlsize", "cached", "level", "modified")
+
+CreateTable = """create table if not exists %(table)s (
+    urlname        varchar(256) not null,
+    parentname     varchar(256),
+    baseref        varchar(256),
+    valid          int,
+    result         varchar(256),
+    warning        varchar(512),
+    info           varchar(512),
+    url            varchar(256),
+    line           int,
+    col            int,
+    name           varchar(256),
+    checktime      int,
+    dltime         int,
+    dlsize         int,
+    cached         int,
+    level          int not null,
+    modified       varchar(256)
+)"""
+
+# indexed columns, created after all rows are inserted
+IndexColumns = ("url", "parentname", "valid")
 
 
 def sqlify (s):
@@ -46,9 +76,58 @@ def intify (s):
     return 0
 
 
+def get_placeholders (paramstyle, columns):
+    """Get the parameter markers of an insert statement for the given
+    DB-API parameter style.
+    @param paramstyle: the paramstyle attribute of a DB-API module
+    @ptype paramstyle: string
+    @param columns: column names
+    @ptype columns: sequence of strings
+    @return: comma separated parameter markers
+    @rtype: string
+    """
+    if paramstyle == "qmark":
+        markers = ["?" for x in columns]
+    elif paramstyle == "numeric":
+        markers = [":%d" % (i+1) for i in range(len(columns))]
+    elif paramstyle == "named":
+        markers = [":%s" % x for x in columns]
+    elif paramstyle == "format":
+        markers = ["%s" for x in columns]
+    elif paramstyle == "pyformat":
+        markers = ["%%(%s)s" % x for x in columns]
+    else:
+        raise ValueError("unsupported DB-API paramstyle %r" % paramstyle)
+    return u",".join(markers)
+
+
+def connect (dbapi, database):
+    """Connect to a database.
+    @param dbapi: name of a DB-API 2.0 module, eg. "sqlite3"
+    @ptype dbapi: string
+    @param database: argument for the connect() function of the module,
+      eg. the database file for sqlite3
+    @ptype database: string
+    @return: the module and the connection
+    @rtype: tuple (module, connection)
+    """
+    module = importlib.import_module(dbapi)
+    if dbapi == "sqlite3":
+        # URLs are logged from the checker threads
+        conn = module.connect(os.path.expanduser(database),
+                              check_same_thread=False)
+    else:
+        conn = module.connect(database)
+    return module, conn
+
+
 class SQLLogger (_Logger):
     """
     SQL output, should work with any SQL database (not tested).
+    With the database option the rows are inserted directly with
+    a DB-API 2.0 driver in batches of batchsize rows, each batch
+    committed in its own transaction. Indexes on the url, parentname
+    and valid columns are created at the end of the output.
     """
 
     LoggerName = 'sql'
@@ -57,6 +136,9 @@ class SQLLogger (_Logger):
         "filename": "linkchecker-out.sql",
         'separator': ';',
         'dbname': 'linksdb',
+        'dbapi': 'sqlite3',
+        'database': '',
+        'batchsize': 1000,
     }
 
     def __init__ (self, **kwargs):
@@ -66,6 +148,13 @@ class SQLLogger (_Logger):
         self.init_fileoutput(args)
         self.dbname = args['dbname']
         self.separator = args['separator']
+        self.dbapi = args['dbapi']
+        self.database = args['database']
+        self.batchsize = max(1, int(args['batchsize']))
+        self.conn = None
+        self.insert = None
+        self.use_dict = False
+        self.rows = []
 
     def comment (self, s, **args):
         """
@@ -79,18 +168,164 @@ class SQLLogger (_Logger):
         Write start of checking info as sql comment.
         """
         super(SQLLogger, self).start_output()
-        if self.has_part("intro"):
+        if self.database:
+            self.start_database()
+        elif self.has_part("intro"):
             self.write_intro()
             self.writeln()
             self.flush()
 
+    def start_database (self):
+        """Connect to the database, create the table if it does not
+        exist and prepare the insert statement."""
+        try:
+            module, self.conn = connect(self.dbapi, self.database)
+            placeholders = get_placeholders(module.paramstyle, Columns)
+            cursor = self.conn.cursor()
+            cursor.execute(CreateTable % {"table": self.dbname})
+            cursor.close()
+            self.conn.commit()
+        except Exception as msg:
+            log.warn(LOG_CHECK, "Could not open database %r with %s: %s\n"
+                     "Disabling log output of %s", self.database,
+                     self.dbapi, msg, self)
+            self.close_database()
+            self.is_active = False
+            return
+        self.use_dict = module.paramstyle in ("named", "pyformat")
+        self.insert = u"insert into %s(%s) values (%s)" % \
+            (self.dbname, u",".join(Columns), placeholders)
+
+    def get_row (self, url_data):
+        """Get the column values of a checked URL.
+        @return: values in the order of the table columns, or a dictionary
+          for named parameter styles
+        @rtype: tuple or dict
+        """
+        row = (
+            url_data.base_url or None,
+            url_data.parent_url or None,
+            url_data.base_ref or None,
+            intify(url_data.valid),
+            url_data.result or None,
+            os.linesep.join(x[1] for x in url_data.warnings) or None,
+            os.linesep.join(url_data.info) or None,
+            urlutil.url_quote(url_data.url) or None,
+            url_data.line,
+            url_data.column,
+            url_data.name or None,
+            url_data.checktime,
+            url_data.dltime,
+            url_data.dlsize,
+            0,
+            url_data.level,
+            self.format_modified(url_data.modified) or None,
+        )
+        if self.use_dict:
+            return dict(zip(Columns, row))
+        return row
+
+    def flush_rows (self):
+        """Insert the buffered rows in one transaction. A failed batch
+        is rolled back and dropped, else it would fail again on every
+        following flush."""
+        if not self.rows:
+            return
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.insert, self.rows)
+            self.conn.commit()
+        except Exception as msg:
+            self.conn.rollback()
+            log.warn(LOG_CHECK, "Could not insert %d rows into database %r: %s",
+                     len(self.rows), self.database, msg)
+        finally:
+            cursor.close()
+        self.rows = []
+
+    def create_indexes (self):
+        """Create indexes on the url, parentname and valid columns.
+        An index that already exists is not an error."""
+        for column in IndexColumns:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(u"create index %(table)s_%(column)s on "
+                    "%(table)s(%(column)s)" %
+                    {"table": self.dbname, "column": column})
+                self.conn.commit()
+            except Exception as msg:
+                self.conn.rollback()
+                log.debug(LOG_CHECK, "Index on %s not created: %s",
+                          column, msg)
+            finally:
+                cursor.close()
+
+    def close_database (self):
+        """Close the database connection."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def get_max_rowid (self):
+        """Get the highest row id of the table, or None if the
+        database has no row ids."""
+        if self.dbapi != "sqlite3":
+            return None
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(u"select max(rowid) from %s" % self.dbname)
+            return cursor.fetchone()[0] or 0
+        finally:
+            cursor.close()
+
+    def get_checkpoint (self):
+        """Commit buffered rows before the checkpoint is written, and
+        store the highest row id."""
+        rowid = None
+        if self.conn is not None:
+            self.flush_rows()
+            rowid = self.get_max_rowid()
+        state = super(SQLLogger, self).get_checkpoint()
+        state["rowid"] = rowid
+        return state
+
+    def start_resumed_output (self, state):
+        """Delete the rows inserted after the checkpoint, since their
+        URLs are logged again."""
+        super(SQLLogger, self).start_resumed_output(state)
+        if self.conn is None:
+            return
+        rowid = state.get("rowid")
+        if rowid is None:
+            log.warn(LOG_CHECK, "Rows inserted by %s after the checkpoint "
+                     "can not be removed and may be inserted twice.", self)
+            return
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(u"delete from %s where rowid > %d" %
+                           (self.dbname, rowid))
+            self.conn.commit()
+        except Exception as msg:
+            self.conn.rollback()
+            log.warn(LOG_CHECK, "Could not delete rows inserted after "
+                     "the checkpoint from database %r: %s",
+                     self.database, msg)
+        finally:
+            cursor.close()
+
     def log_url (self, url_data):
         """
         Store url check info into the database.
         """
+        if self.database:
+            if self.conn is not None:
+                self.rows.append(self.get_row(url_data))
+                if len(self.rows) >= self.batchsize:
+                    self.flush_rows()
+            return
         self.writeln(u"insert into %(table)s(urlname,"
               "parentname,baseref,valid,result,warning,info,url,line,col,"
-              "name,checktime,dltime,dlsize,cached,level) values ("
+              "name,checktime,dltime,dlsize,cached,level,modified) values ("
               "%(base_url)s,"
               "%(url_parent)s,"
               "%(base_ref)s,"
@@ -129,12 +364,20 @@ class SQLLogger (_Logger):
                "level": url_data.level,
                "modified": sqlify(self.format_modified(url_data.modified)),
               })
-        self.flush()
 
     def end_output (self):
         """
-        Write end of checking info as sql comment.
+        Write end of checking info as sql comment. In database mode
+        the remaining rows are inserted and the indexes are created.
         """
+        if self.database:
+            if self.conn is not None:
+                try:
+                    self.flush_rows()
+                    self.create_indexes()
+                finally:
+                    self.close_database()
+            return
         if self.has_part("outro"):
             self.write_outro()
         self.close_fileoutput()
@@ -123,6 +123,8 @@ class TextLogger (_Logger):
             self.write_checktime(url_data)
         if url_data.dltime >= 0 and self.has_part('dltime'):
             self.write_dltime(url_data)
+        if url_data.timing and self.has_explicit_part('timing'):
+            self.write_timing(url_data)
         if url_data.dlsize >= 0 and self.has_part('dlsize'):
             self.write_dlsize(url_data)
         if url_data.info and self.has_part('info'):
@@ -133,7 +135,6 @@ class TextLogger (_Logger):
             self.write_warning(url_data)
         if self.has_part('result'):
             self.write_result(url_data)
-        self.flush()
 
     def write_id (self):
         """Write unique ID of url_data."""
@@ -176,6 +177,12 @@ class TextLogger (_Logger):
         self.writeln(_("%.3f seconds") % url_data.dltime,
                      color=self.colordltime)
 
+    def write_timing (self, url_data):
+        """Write url_data.timing."""
+        self.write(self.part("timing") + self.spaces("timing"))
+        self.writeln(self.format_timing(url_data.timing),
+                     color=self.colordltime)
+
     def write_dlsize (self, url_data):
         """Write url_data.dlsize."""
         self.write(self.part("dlsize") + self.spaces("dlsize"))
@@ -262,19 +269,29 @@ class TextLogger (_Logger):
         self.writeln(_("Statistics:"))
         if self.stats.downloaded_bytes > 0:
             self.writeln(_("Downloaded: %s") % strformat.strsize(self.stats.downloaded_bytes))
-        hitsmisses = strformat.str_cache_stats(*self.stats.robots_txt_stats)
+        hits, misses, stored_hits = self.stats.robots_txt_stats
+        hitsmisses = strformat.str_cache_stats(hits, misses)
+        if stored_hits:
+            hitsmisses += u", " + _n("%d stored hit", "%d stored hits",
+                                     stored_hits) % stored_hits
         self.writeln(_("Robots.txt cache: %s") % hitsmisses)
-        if len(self.stats.domains) > 1:
-            self.writeln(_("Number of domains: %d") % len(self.stats.domains))
+        hitsmisses = strformat.str_cache_stats(*self.stats.intern_stats)
+        self.writeln(_("String pool: %s") % hitsmisses)
+        collector = self.stats.collector
+        if collector is not None and len(collector.domains) > 1:
+            self.writeln(_("Number of domains: %d") % len(collector.domains))
         if self.stats.number > 0:
             self.writeln(_(
               "Content types: %(image)d image, %(text)d text, %(video)d video, "
               "%(audio)d audio, %(application)d application, %(mail)d mail"
               " and %(other)d other.") % self.stats.link_types)
-            self.writeln(_("URL lengths: min=%(min)d, max=%(max)d, avg=%(avg)d.") %
-                         dict(min=self.stats.min_url_length,
-                         max=self.stats.max_url_length,
-                         avg=self.stats.avg_url_length))
+            if collector is not None:
+                self.writeln(_("URL lengths: min=%(min)d, max=%(max)d, avg=%(avg)d.") %
+                             dict(min=collector.min_url_length,
+                             max=collector.max_url_length,
+                             avg=collector.avg_url_length))
+            for line in self.get_collector_stats():
+                self.writeln(line)
         else:
             self.writeln(_("No statistics available since no URLs were checked."))
 
@@ -0,0 +1,164 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Profiling of all threads.
+
+With thread profiling enabled, every check task thread runs its work
+under its own cProfile profiler, and the finished profiles are merged
+with the profile of the main thread. The stack sampler is a cheaper
+alternative: it periodically records the stacks of all threads and
+writes them in the collapsed stack format read by flame graph tools.
+"""
+import os
+import sys
+import time
+import threading
+from . import threader
+
+# profiles of finished threads, None if thread profiling is disabled
+_profiles = None
+_lock = threading.Lock()
+
+
+def enable_thread_profiling ():
+    """Profile all check task threads started from now on."""
+    global _profiles
+    _profiles = []
+
+
+def disable_thread_profiling ():
+    """Stop profiling new check task threads and discard the profiles."""
+    global _profiles
+    _profiles = None
+
+
+def run_profiled (func):
+    """Call given function, profiled if thread profiling is enabled.
+    @return: return value of the function
+    """
+    if _profiles is None:
+        return func()
+    import cProfile
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func)
+    finally:
+        with _lock:
+            if _profiles is not None:
+                _profiles.append(profile)
+
+
+def join_threads (timeout):
+    """Wait for the stopped threads to finish and store their profiles.
+    Daemon threads are not waited for.
+    @param timeout: maximum number of seconds to wait for all threads
+    @ptype timeout: float
+    """
+    end = time.time() + timeout
+    current = threading.current_thread()
+    for t in threading.enumerate():
+        if t is not current and not t.daemon:
+            t.join(max(0, end - time.time()))
+
+
+def write_profile (filename, profile, timeout=10):
+    """Merge the given profile with the thread profiles and write the
+    statistics to a file readable with the pstats module. Threads
+    which have not finished within the timeout are not included.
+    @param filename: name of the statistics file
+    @ptype filename: string
+    @param profile: the profile of the main thread
+    @ptype profile: cProfile.Profile
+    @param timeout: maximum number of seconds to wait for threads
+    @ptype timeout: float
+    @return: number of merged thread profiles
+    @rtype: int
+    """
+    import pstats
+    join_threads(timeout)
+    stats = pstats.Stats(profile)
+    with _lock:
+        profiles = _profiles or []
+        for thread_profile in profiles:
+            try:
+                stats.add(thread_profile)
+            except TypeError:
+                # the thread did not call any function
+                pass
+    stats.dump_stats(filename)
+    return len(profiles)
+
+
+def get_frame_name (frame):
+    """Get name of a stack frame in the form "function (file:line)"."""
+    code = frame.f_code
+    return "%s (%s:%d)" % (code.co_name,
+        os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+def get_thread_name (name):
+    """Get thread name without the changing part, eg. the URL of
+    CheckThread-URL or the number of Thread-1."""
+    return name.split("-", 1)[0]
+
+
+class StackSampler (threader.StoppableThread):
+    """Thread recording the stacks of all other threads in regular
+    intervals."""
+
+    def __init__ (self, interval=0.01):
+        """Initialize empty stack counts.
+        @param interval: seconds between two samples
+        @ptype interval: float
+        """
+        super(StackSampler, self).__init__()
+        self.interval = interval
+        # {collapsed stack -> number of samples}
+        self.stacks = {}
+        self.setName("StackSampler")
+        # do not block program exit
+        self.setDaemon(True)
+
+    def run (self):
+        """Take samples until stopped."""
+        while not self.stopped(self.interval):
+            self.sample()
+
+    def sample (self):
+        """Record the current stacks of all other threads."""
+        names = dict((t.ident, t.getName()) for t in threading.enumerate())
+        own = threading.current_thread().ident
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(get_frame_name(frame))
+                frame = frame.f_back
+            frames.append(get_thread_name(names.get(ident, "Thread")))
+            stack = ";".join(reversed(frames))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def write (self, filename):
+        """Write the collapsed stacks, one line per stack followed by
+        its number of samples.
+        @param filename: name of the output file
+        @ptype filename: string
+        """
+        with open(filename, "w") as fd:
+            for stack, count in sorted(self.stacks.items()):
+                fd.write("%s %d\n" % (stack, count))
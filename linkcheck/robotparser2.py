@@ -26,6 +26,7 @@ import urllib2
 import time
 import socket
 import sys
+import email.utils
 from . import httplib2 as httplib
 from . import url as urlutil
 from . import log, LOG_CHECK, configuration
@@ -34,6 +35,36 @@ __all__ = ["RobotFileParser"]
 
 ACCEPT_ENCODING = 'x-gzip,gzip,deflate'
 
+
+def get_max_age (headers):
+    """Get the number of seconds a response may be cached from the
+    Cache-Control and Expires HTTP headers.
+    @param headers: HTTP headers, can be None
+    @ptype headers: mimetools.Message or None
+    @return: maximum age in seconds, or None if not given
+    @rtype: int or None
+    """
+    if headers is None:
+        return None
+    for directive in headers.get("Cache-Control", "").split(","):
+        directive = directive.strip().lower()
+        if directive in ("no-cache", "no-store"):
+            return 0
+        if directive.startswith("max-age="):
+            try:
+                return max(0, int(directive[8:]))
+            except ValueError:
+                pass
+    expires = headers.get("Expires")
+    if expires:
+        parsed = email.utils.parsedate_tz(expires)
+        if parsed is None:
+            # invalid dates mean already expired
+            return 0
+        return max(0, int(email.utils.mktime_tz(parsed) - time.time()))
+    return None
+
+
 class RobotFileParser (object):
     """This class provides a set of methods to read, parse and answer
     questions about a single robots.txt file."""
@@ -54,6 +85,13 @@ class RobotFileParser (object):
         self.disallow_all = False
         self.allow_all = False
         self.last_checked = 0
+        # list of tuples (sitemap url, line number)
+        self.sitemap_urls = []
+        # True if the server gave a lasting answer, ie. the result can be
+        # stored; temporary server errors are fetched again
+        self.fetched = False
+        # maximum age in seconds given by HTTP caching headers
+        self.max_age = None
 
     def mtime (self):
         """Returns the time the robots.txt file was last fetched.
@@ -79,6 +117,7 @@ class RobotFileParser (object):
     def read (self):
         """Read the robots.txt URL and feeds it to the parser."""
         self._reset()
+        self.modified()
         data = None
         headers = {
             'User-Agent': configuration.UserAgent,
@@ -88,6 +127,8 @@ class RobotFileParser (object):
         try:
             self._read_content(req)
         except urllib2.HTTPError, x:
+            self.fetched = 400 <= x.code < 500 and x.code != 429
+            self.max_age = get_max_age(x.info())
             if x.code in (401, 403):
                 self.disallow_all = True
                 log.debug(LOG_CHECK, "%r disallow all (code %d)",
@@ -135,6 +176,8 @@ class RobotFileParser (object):
         res = None
         try:
             res = f.open(req)
+            self.fetched = True
+            self.max_age = get_max_age(res.info())
             ct = res.info().get("Content-Type")
             if ct and ct.lower().startswith("text/plain"):
                 self.parse([line.strip() for line in res])
@@ -191,6 +234,11 @@ class RobotFileParser (object):
             line = line.split(':', 1)
             if len(line) == 2:
                 line[0] = line[0].strip().lower()
+                if line[0] == "sitemap":
+                    # sitemap URLs are independent of user-agent entries
+                    # and must not be unquoted
+                    self.sitemap_urls.append((line[1].strip(), linenumber))
+                    continue
                 line[1] = urllib.unquote(line[1].strip())
                 if line[0] == "user-agent":
                     if state == 2:
@@ -0,0 +1,126 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Streaming parser for sitemap and sitemap index XML files as described
+at http://www.sitemaps.org/protocol.html. Gzip compressed sitemaps
+are decompressed on the fly.
+"""
+import re
+import zlib
+from cStringIO import StringIO
+try:
+    from xml.etree.cElementTree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+from . import gzip2 as gzip
+
+# pseudo MIME types for sitemap XML data
+SitemapMimetype = "application/xml+sitemap"
+SitemapIndexMimetype = "application/xml+sitemapindex"
+
+# MIME types of content that could be a sitemap
+XmlMimetypes = ("application/xml", "text/xml")
+GzipMimetypes = ("application/x-gzip", "application/gzip",
+    "application/octet-stream")
+
+GzipMagic = "\x1f\x8b"
+
+# search the root element of an XML document
+root_re = re.compile(r"<(?:[A-Za-z_][\w.-]*:)?(urlset|sitemapindex)[\s>]")
+
+
+def is_gzip (data):
+    """Check for gzip magic bytes."""
+    return data.startswith(GzipMagic)
+
+
+def get_head (data, size=1024):
+    """Return the first size bytes of possibly gzip compressed data."""
+    if is_gzip(data):
+        try:
+            # skip the gzip header
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            return decompressor.decompress(data[:size*4], size)
+        except zlib.error:
+            return ""
+    return data[:size]
+
+
+def guess_mimetype (data):
+    """Detect sitemap or sitemap index content.
+    @param data: the (possibly gzip compressed) content
+    @ptype data: string
+    @return: SitemapMimetype, SitemapIndexMimetype or None
+    @rtype: string or None
+    """
+    # skip XML declaration, comments and processing instructions
+    mo = root_re.search(get_head(data))
+    if mo is None:
+        return None
+    if mo.group(1) == "urlset":
+        return SitemapMimetype
+    return SitemapIndexMimetype
+
+
+def strip_namespace (tag):
+    """Remove a leading {namespace} from an element tag."""
+    if tag.startswith("{"):
+        return tag.split("}", 1)[1]
+    return tag
+
+
+def parse_sitemap_data (data):
+    """Parse sitemap or sitemap index data incrementally.
+    Parsed elements are discarded immediately so memory usage does not
+    depend on the number of entries.
+    @param data: the (possibly gzip compressed) content
+    @ptype data: string
+    @return: iterator of tuples (url, lastmod) with lastmod being None
+      if not given
+    @rtype: iterator of tuples (unicode, unicode or None)
+    """
+    fileobj = StringIO(data)
+    if is_gzip(data):
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode='rb')
+    return parse_sitemap_file(fileobj)
+
+
+def parse_sitemap_file (fileobj):
+    """Parse sitemap or sitemap index data from given file object.
+    @return: iterator of tuples (url, lastmod)
+    @rtype: iterator of tuples (unicode, unicode or None)
+    """
+    root = None
+    loc = lastmod = None
+    for event, elem in iterparse(fileobj, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        tag = strip_namespace(elem.tag)
+        if tag == "loc":
+            loc = elem.text
+        elif tag == "lastmod":
+            lastmod = elem.text
+        elif tag in ("url", "sitemap"):
+            if loc and loc.strip():
+                if lastmod:
+                    lastmod = unicode(lastmod.strip())
+                yield unicode(loc.strip()), lastmod or None
+            loc = lastmod = None
+            # free memory of already parsed entries
+            root.clear()
@@ -0,0 +1,300 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Streaming statistics of checked URLs with bounded memory usage:
+quantile sketches, distinct count estimation and top-N lists.
+"""
+import math
+import heapq
+import struct
+import hashlib
+
+
+class QuantileSketch (object):
+    """Histogram with logarithmic bucket sizes similar to HDR histograms.
+    Quantiles are estimated with the given relative accuracy, and the
+    number of buckets only depends on the range of values, not on the
+    number of values."""
+
+    def __init__ (self, accuracy=0.01):
+        """Initialize empty sketch.
+        @param accuracy: relative accuracy of quantile estimates
+        @ptype accuracy: float
+        """
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        # mapping {bucket index -> count}
+        self.buckets = {}
+        # count of values too small for a logarithmic bucket
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add (self, value):
+        """Add one non-negative value."""
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value < 1e-6:
+            self.zeros += 1
+        else:
+            index = int(math.ceil(math.log(value) / self.log_gamma))
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile (self, q):
+        """Estimate the value at quantile q.
+        @param q: quantile between 0 and 1
+        @ptype q: float
+        @return: estimated value or None if no values were added
+        @rtype: float or None
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                # the estimate must not leave the observed range
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge (self, other):
+        """Add all values of another sketch with the same accuracy."""
+        assert self.gamma == other.gamma, "different sketch accuracy"
+        for index, count in other.buckets.iteritems():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                if self.min is None or value < self.min:
+                    self.min = value
+                if self.max is None or value > self.max:
+                    self.max = value
+
+    def average (self):
+        """Return average of all values or None if empty."""
+        if not self.count:
+            return None
+        return self.sum / self.count
+
+
+class HyperLogLog (object):
+    """Estimate the number of distinct values with 2**precision bytes
+    of memory. The standard error is about 1.04/sqrt(2**precision)."""
+
+    def __init__ (self, precision=12):
+        """Initialize empty registers."""
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add (self, value):
+        """Add a string value."""
+        if isinstance(value, unicode):
+            value = value.encode("utf-8", "replace")
+        x = struct.unpack(">Q", hashlib.sha1(value).digest()[:8])[0]
+        index = x >> (64 - self.precision)
+        rest = (x << self.precision) & 0xffffffffffffffff
+        # position of the leftmost one bit
+        rank = 1
+        while rank <= 64 - self.precision and not rest & (1 << 63):
+            rest <<= 1
+            rank += 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def __len__ (self):
+        """Return estimated number of distinct values."""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count("\x00")
+        if estimate <= 2.5 * m and zeros:
+            # small range correction with linear counting
+            estimate = m * math.log(float(m) / zeros)
+        return int(round(estimate))
+
+
+class TopN (object):
+    """Keep the n items with the largest values."""
+
+    def __init__ (self, n):
+        """Initialize empty min-heap."""
+        self.n = n
+        self.heap = []
+
+    def add (self, value, item):
+        """Add item with given value if it is among the n largest."""
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, (value, item))
+        elif value > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (value, item))
+
+    def items (self):
+        """Return list of (value, item) tuples, largest value first."""
+        return sorted(self.heap, reverse=True)
+
+
+class HostStatistics (object):
+    """Quantile sketches of one host. Host sketches use a lower accuracy
+    to keep memory usage low with many hosts."""
+
+    __slots__ = ('checktime', 'dltime', 'dlsize')
+
+    def __init__ (self, accuracy=0.05):
+        """Initialize empty sketches."""
+        self.checktime = QuantileSketch(accuracy)
+        self.dltime = QuantileSketch(accuracy)
+        self.dlsize = QuantileSketch(accuracy)
+
+    def merge (self, other):
+        """Add all values of another host."""
+        self.checktime.merge(other.checktime)
+        self.dltime.merge(other.dltime)
+        self.dlsize.merge(other.dlsize)
+
+
+class StatisticsCollector (object):
+    """Statistics of all checked URLs, updated once per logged URL.
+    Not thread-safe; the caller must serialize calls to log_url()."""
+
+    # reported quantiles
+    Quantiles = (0.5, 0.9, 0.99)
+
+    # number of hosts with own statistics, as multiple of topn
+    HostFactor = 10
+
+    def __init__ (self, topn=10):
+        """Initialize empty statistics.
+        @param topn: number of slowest URLs and hosts to report
+        @ptype topn: int
+        """
+        self.topn = topn
+        self.number = 0
+        # number of valid URLs without and with warnings, and of errors
+        self.valid = self.warnings = self.errors = 0
+        self.domains = HyperLogLog()
+        self.min_url_length = 0
+        self.max_url_length = 0
+        self.avg_url_length = 0.0
+        self.avg_number = 0
+        self.checktime = QuantileSketch()
+        self.dltime = QuantileSketch()
+        self.dlsize = QuantileSketch()
+        # mapping {host -> HostStatistics} of the slowest hosts
+        self.hosts = {}
+        self.maxhosts = topn * self.HostFactor
+        # min-heap of (median check time, host) to select the host
+        # that is removed from self.hosts, rebuilt when empty
+        self.host_heap = []
+        # statistics of all other hosts
+        self.other_hosts = HostStatistics()
+        self.slowest_urls = TopN(topn)
+
+    def log_url (self, url_data):
+        """Add statistics of one checked URL.
+        @param url_data: the checked URL
+        @ptype url_data: CompactUrlData
+        """
+        self.number += 1
+        if not url_data.valid:
+            self.errors += 1
+        elif url_data.warnings:
+            self.warnings += 1
+        else:
+            self.valid += 1
+        self.domains.add(url_data.domain)
+        if url_data.url:
+            l = len(url_data.url)
+            self.max_url_length = max(l, self.max_url_length)
+            if self.min_url_length == 0:
+                self.min_url_length = l
+            else:
+                self.min_url_length = min(l, self.min_url_length)
+            # track average number separately since empty URLs do not count
+            self.avg_number += 1
+            self.avg_url_length += (l - self.avg_url_length) / self.avg_number
+        host = self.get_host_statistics(url_data.domain, url_data.checktime)
+        if url_data.checktime >= 0:
+            self.checktime.add(url_data.checktime)
+            host.checktime.add(url_data.checktime)
+            if url_data.url:
+                self.slowest_urls.add(url_data.checktime, url_data.url)
+        # negative values mean the content was not downloaded
+        if url_data.dltime >= 0:
+            self.dltime.add(url_data.dltime)
+            host.dltime.add(url_data.dltime)
+        if url_data.dlsize >= 0:
+            self.dlsize.add(url_data.dlsize)
+            host.dlsize.add(url_data.dlsize)
+
+    def get_host_statistics (self, domain, checktime):
+        """Get the statistics of a host. Only the maxhosts hosts with
+        the largest median check time have own statistics, the values
+        of other hosts are added to self.other_hosts. When all host
+        slots are used, a new host replaces the host with the smallest
+        median if its check time is larger.
+        @param domain: host of a checked URL
+        @ptype domain: unicode
+        @param checktime: check time of the URL, negative if unknown
+        @ptype checktime: float
+        @rtype: HostStatistics
+        """
+        host = self.hosts.get(domain)
+        if host is not None:
+            return host
+        if len(self.hosts) >= self.maxhosts:
+            if checktime < 0:
+                return self.other_hosts
+            if not self.host_heap:
+                self.host_heap = [(stats.checktime.quantile(0.5), name)
+                                  for name, stats in self.hosts.iteritems()]
+                heapq.heapify(self.host_heap)
+            median, fastest = self.host_heap[0]
+            if median is not None and checktime <= median:
+                return self.other_hosts
+            heapq.heappop(self.host_heap)
+            self.other_hosts.merge(self.hosts.pop(fastest))
+        host = self.hosts[domain] = HostStatistics()
+        return host
+
+    def get_quantiles (self, sketch):
+        """Return list of estimated values for the reported quantiles."""
+        return [sketch.quantile(q) for q in self.Quantiles]
+
+    def get_slowest_urls (self):
+        """Return list of (checktime, url) tuples, slowest first."""
+        return self.slowest_urls.items()
+
+    def get_slowest_hosts (self):
+        """Return list of (median checktime, host) tuples of the hosts
+        with the largest median check time, slowest first."""
+        hosts = [(stats.checktime.quantile(0.5), host)
+                 for host, stats in self.hosts.iteritems()
+                 if host and stats.checktime.count]
+        return heapq.nlargest(self.topn, hosts)
@@ -15,12 +15,15 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 from __future__ import print_function
+import os
 import re
+import json
 import linecache
 import time
 import sys
 import thread
 import threading
+import collections
 
 # tracing
 _trace_ignore = set()
@@ -95,3 +98,153 @@ def trace_on (full=False):
 def trace_off ():
     """Stop tracing of the current thread (and the current thread only)."""
     sys.settrace(None)
+
+
+# event tracer, set by events_on()
+tracer = None
+
+
+class EventTracer (object):
+    """Record spans of all threads and write them as Chrome trace
+    events in the JSON array format, which can be loaded in trace
+    viewers like chrome://tracing or Perfetto. Events are written in
+    batches by a writer thread while tracing, so memory usage does not
+    grow with the number of checked URLs. Spans are often recorded
+    while holding a lock, so recording never writes to the file."""
+
+    def __init__ (self, filename, batchsize=10000, interval=1.0):
+        """Open the trace file and start the writer thread.
+        @param filename: name of the trace file
+        @ptype filename: string
+        @param batchsize: number of recorded events that wake up the
+          writer thread
+        @ptype batchsize: int
+        @param interval: maximum number of seconds between writes
+        @ptype interval: float
+        """
+        self.fd = open(filename, "w")
+        self.fd.write("[")
+        self.batchsize = batchsize
+        self.interval = interval
+        self.pid = os.getpid()
+        self.start = time.time()
+        # appending and popping is thread-safe
+        self.events = collections.deque()
+        # {thread id -> thread name}
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.first = True
+        self.closed = False
+        # set when a batch of events is recorded
+        self.full = threading.Event()
+        self.writer = threading.Thread(target=self.run_writer,
+                                       name="TraceWriter")
+        self.writer.setDaemon(True)
+        self.writer.start()
+
+    def add_span (self, name, category, start, duration, args=None):
+        """Record a span of the current thread.
+        @param name: span name, eg. "connect"
+        @ptype name: string
+        @param category: span category, eg. "http"
+        @ptype category: string
+        @param start: start time in seconds since the epoch
+        @ptype start: float
+        @param duration: span duration in seconds
+        @ptype duration: float
+        @param args: additional span values shown by the trace viewer
+        @ptype args: dict or None
+        """
+        tid = thread.get_ident()
+        if tid not in self.threads:
+            name_ = threading.current_thread().getName()
+            # the names of check threads change with the URL
+            self.threads[tid] = name_.split("-", 1)[0]
+        self.events.append((name, category, start, duration, tid, args))
+        if len(self.events) >= self.batchsize:
+            self.full.set()
+
+    def run_writer (self):
+        """Write the recorded events when a batch is full, or after
+        the interval, until the tracer is closed."""
+        while not self.closed:
+            self.full.wait(self.interval)
+            self.full.clear()
+            self.write_events()
+
+    def write_events (self):
+        """Write the recorded events."""
+        with self.lock:
+            events = self.events
+            for dummy in range(len(events)):
+                name, category, start, duration, tid, args = events.popleft()
+                event = dict(name=name, cat=category, ph="X",
+                             ts=int((start - self.start) * 1000000),
+                             dur=int(duration * 1000000),
+                             pid=self.pid, tid=tid)
+                if args:
+                    event["args"] = args
+                self.write_event(event)
+
+    def write_event (self, event):
+        """Write one event. The lock must be held."""
+        if self.first:
+            self.first = False
+        else:
+            self.fd.write(",")
+        self.fd.write("\n" + json.dumps(event))
+
+    def close (self):
+        """Stop the writer thread, write the remaining events and the
+        thread names, and close the trace file."""
+        self.closed = True
+        self.full.set()
+        self.writer.join()
+        self.write_events()
+        with self.lock:
+            for tid, name in sorted(self.threads.items()):
+                self.write_event(dict(name="thread_name", ph="M",
+                    pid=self.pid, tid=tid, args={"name": name}))
+            self.fd.write("\n]\n")
+            self.fd.close()
+
+
+class Span (object):
+    """Context manager recording a span of the current thread if event
+    tracing is on."""
+
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__ (self, name, category, args=None):
+        """Store span parameters."""
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__ (self):
+        """Store start time."""
+        if tracer is not None:
+            self.start = time.time()
+        return self
+
+    def __exit__ (self, *args):
+        """Record the span."""
+        if tracer is not None:
+            start = getattr(self, "start", None)
+            if start is not None:
+                tracer.add_span(self.name, self.category, start,
+                                time.time() - start, self.args)
+
+
+def events_on (filename):
+    """Start recording trace events of all threads in given file."""
+    global tracer
+    tracer = EventTracer(filename)
+
+
+def events_off ():
+    """Stop recording trace events and close the trace file."""
+    global tracer
+    if tracer is not None:
+        tracer, t = None, tracer
+        t.close()
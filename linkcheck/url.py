@@ -592,6 +592,15 @@ def get_content (url, user=None, password=None, proxy=None, data=None,
     return (None, None)
 
 
+def is_same_link_base (url1, url2):
+    """Check if relative links in the same content resolve to the same
+    URLs for both given URLs, ie. if the URLs only differ in the query
+    or anchor. Query-only and empty links resolve against the last path
+    segment, so it must be the same too.
+    """
+    return urlparse.urlsplit(url1)[:3] == urlparse.urlsplit(url2)[:3]
+
+
 def shorten_duplicate_content_url(url):
     """Remove anchor part and trailing index.html from URL."""
     if '#' in url:
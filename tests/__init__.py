@@ -176,6 +176,18 @@ def has_biplist ():
 need_biplist = _need_func(has_biplist, "biplist")
 
 
+@memoized
+def has_sqlite ():
+    """Test if sqlite3 is available."""
+    try:
+        import sqlite3
+        return True
+    except ImportError:
+        return False
+
+need_sqlite = _need_func(has_sqlite, "sqlite3")
+
+
 @memoized
 def has_newsserver (server):
     import nntplib
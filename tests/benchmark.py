@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Measure the check throughput of LinkChecker against a synthetic web
+site served by a local HTTP or HTTPS server.
+
+The site has a configurable number of pages, links per page, page
+size, response latency and error rate. It is generated from a random
+seed, so runs with the same parameters check the same URLs. The server
+runs in a separate process and does not count in the measured CPU
+time and memory.
+
+Run it from the source directory after "make localbuild":
+
+    env PYTHONPATH=. python tests/benchmark.py --pages=2000 --latency=exp:20
+
+The results are written as one JSON object.
+"""
+import argparse
+import BaseHTTPServer
+import SocketServer
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+import linkcheck.configuration
+import linkcheck.director
+from linkcheck import checker
+
+
+class Latency (object):
+    """Random response latency. The latency of an URL is the same
+    in every run."""
+
+    def __init__ (self, spec, seed):
+        """Parse latency specification.
+        @param spec: "const:MS", "uniform:MINMS:MAXMS" or "exp:MEANMS"
+        @ptype spec: string
+        @param seed: random seed
+        @ptype seed: int
+        @raises: ValueError for invalid specifications
+        """
+        parts = spec.split(":")
+        self.kind = parts[0]
+        try:
+            self.args = [float(x) / 1000 for x in parts[1:]]
+        except ValueError:
+            raise ValueError("invalid latency %r" % spec)
+        numargs = {"const": 1, "uniform": 2, "exp": 1}.get(self.kind)
+        if numargs != len(self.args) or min(self.args) < 0:
+            raise ValueError("invalid latency %r" % spec)
+        self.seed = seed
+
+    def get (self, path):
+        """Return latency in seconds for given URL path."""
+        if self.kind == "const":
+            return self.args[0]
+        rand = random.Random("%d:%s" % (self.seed, path))
+        if self.kind == "uniform":
+            return rand.uniform(*self.args)
+        if not self.args[0]:
+            return 0.0
+        return rand.expovariate(1 / self.args[0])
+
+
+class Site (object):
+    """Synthetic site of HTML pages. The pages form a tree reaching
+    all valid pages, and the remaining links of each page point to
+    random pages. Error pages are only linked, never parsed."""
+
+    def __init__ (self, pages, fanout, size, errorrate, seed):
+        """Generate the links of all pages.
+        @param pages: number of pages, including error pages
+        @ptype pages: int
+        @param fanout: number of links per page
+        @ptype fanout: int
+        @param size: minimal page size in bytes
+        @ptype size: int
+        @param errorrate: fraction of pages answering with an error
+        @ptype errorrate: float
+        @param seed: random seed
+        @ptype seed: int
+        """
+        rand = random.Random(seed)
+        ids = range(1, pages)
+        self.errors = set(rand.sample(ids, int(len(ids) * errorrate)))
+        valid = [0] + [i for i in ids if i not in self.errors]
+        # mapping {page -> list of linked pages}
+        self.links = {}
+        for pos, page in enumerate(valid):
+            start = pos * fanout + 1
+            self.links[page] = valid[start:start + fanout]
+        for page in sorted(self.errors):
+            self.links[rand.choice(valid)].append(page)
+        for page in valid:
+            links = self.links[page]
+            while len(links) < fanout:
+                links.append(rand.randrange(pages))
+        self.filler = "<p>%s</p>\n" % ("x" * max(0, size - 40))
+        self.size = size
+
+    def get_page (self, page):
+        """Return (status, content) of the page with given number."""
+        if page in self.errors:
+            return (500 if page % 2 else 404), "error\n"
+        lines = ["<html><head><title>Page %d</title></head><body>\n" % page]
+        for link in self.links[page]:
+            lines.append('<a href="/page/%d.html">%d</a>\n' % (link, link))
+        content = "".join(lines)
+        if len(content) < self.size:
+            content += self.filler[:self.size - len(content)]
+        return 200, content + "</body></html>\n"
+
+
+class SiteHttpRequestHandler (BaseHTTPServer.BaseHTTPRequestHandler, object):
+    """Serve the pages of the synthetic site with keep-alive
+    connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET (self):
+        """Send page after the configured latency."""
+        self.send_page(True)
+
+    def do_HEAD (self):
+        """Send page headers after the configured latency."""
+        self.send_page(False)
+
+    def send_page (self, body):
+        """Send headers and optional content of requested page."""
+        time.sleep(self.server.latency.get(self.path))
+        content_type = "text/html"
+        if self.path == "/robots.txt":
+            status, content = 200, "User-agent: *\nDisallow:\n"
+            content_type = "text/plain"
+        elif self.path.startswith("/page/") and self.path.endswith(".html"):
+            try:
+                page = int(self.path[6:-5])
+            except ValueError:
+                page = -1
+            if 0 <= page < self.server.pages:
+                status, content = self.server.site.get_page(page)
+            else:
+                status, content = 404, "not found\n"
+        else:
+            status, content = 404, "not found\n"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+    def log_message (self, format, *args):
+        """Logging is disabled."""
+        pass
+
+
+class SiteHttpServer (SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded HTTP server of the synthetic site."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__ (self, site, pages, latency, certfile=None):
+        """Listen on a free port of localhost, with TLS if a certificate
+        file is given."""
+        BaseHTTPServer.HTTPServer.__init__(self, ('localhost', 0),
+                                           SiteHttpRequestHandler)
+        self.site = site
+        self.pages = pages
+        self.latency = latency
+        self.certfile = certfile
+
+    def get_request (self):
+        """Wrap accepted socket with TLS if configured."""
+        sock, addr = self.socket.accept()
+        if self.certfile is not None:
+            sock = ssl.wrap_socket(sock, certfile=self.certfile,
+                                   server_side=True,
+                                   do_handshake_on_connect=False)
+        return sock, addr
+
+    def handle_error (self, request, client_address):
+        """Ignore connections closed by the client."""
+        pass
+
+
+def serve (options, pipe):
+    """Serve the synthetic site and send the port number into the pipe.
+    Runs in a separate process."""
+    site = Site(options.pages, options.fanout, options.size,
+                options.errorrate, options.seed)
+    latency = Latency(options.latency, options.seed)
+    server = SiteHttpServer(site, options.pages, latency, options.certfile)
+    pipe.send(server.server_port)
+    server.serve_forever()
+
+
+def make_certificate (tmpdir):
+    """Create a self-signed certificate with the openssl program.
+    @return: filename with the certificate and its private key
+    @rtype: string
+    """
+    keyfile = os.path.join(tmpdir, "key.pem")
+    certfile = os.path.join(tmpdir, "cert.pem")
+    subprocess.check_call(["openssl", "req", "-x509", "-newkey", "rsa:2048",
+        "-nodes", "-days", "1", "-subj", "/CN=localhost",
+        "-keyout", keyfile, "-out", certfile],
+        stdout=open(os.devnull, "w"), stderr=subprocess.STDOUT)
+    with open(certfile, "a") as fd:
+        with open(keyfile) as key:
+            fd.write(key.read())
+    return certfile
+
+
+def get_cpu_time ():
+    """Return user and system CPU seconds of this process."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def get_peak_rss ():
+    """Return peak resident set size of this process in bytes."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, Mac OS X bytes
+    if sys.platform == "darwin":
+        return maxrss
+    return maxrss * 1024
+
+
+def check_site (url, threads):
+    """Check all URLs of the site with given start URL.
+    @return: benchmark results
+    @rtype: dict
+    """
+    config = linkcheck.configuration.Configuration()
+    config.init_logging(None)
+    config["recursionlevel"] = -1
+    config["threads"] = threads
+    config["status"] = False
+    config["sslverify"] = False
+    config["logger"] = config.logger_new("none")
+    config.sanitize()
+    aggregate = linkcheck.director.get_aggregate(config)
+    aggregate.urlqueue.put(checker.get_url_from(url, 0, aggregate,
+                                                extern=(0, 0)))
+    cpu_time = get_cpu_time()
+    start = time.time()
+    linkcheck.director.check_urls(aggregate)
+    seconds = time.time() - start
+    cpu_time = get_cpu_time() - cpu_time
+    stats = aggregate.logger.statistics
+    return dict(
+        urls=stats.number,
+        valid=stats.valid,
+        warnings=stats.warnings,
+        errors=stats.errors,
+        seconds=seconds,
+        urls_per_second=stats.number / seconds if seconds else None,
+        cpu_seconds=cpu_time,
+        peak_rss_bytes=get_peak_rss(),
+        checktime_p50=stats.checktime.quantile(0.5),
+        checktime_p99=stats.checktime.quantile(0.99),
+        dltime_p50=stats.dltime.quantile(0.5),
+        dltime_p99=stats.dltime.quantile(0.99),
+    )
+
+
+def run (options):
+    """Start the server process, check the site and return the
+    parameters and results."""
+    tmpdir = tempfile.mkdtemp()
+    try:
+        if options.https and options.certfile is None:
+            options.certfile = make_certificate(tmpdir)
+        elif not options.https:
+            options.certfile = None
+        parent, child = multiprocessing.Pipe()
+        server = multiprocessing.Process(target=serve, args=(options, child))
+        server.daemon = True
+        server.start()
+        try:
+            port = parent.recv()
+            scheme = "https" if options.https else "http"
+            url = u"%s://localhost:%d/page/0.html" % (scheme, port)
+            results = check_site(url, options.threads)
+        finally:
+            server.terminate()
+            server.join()
+    finally:
+        shutil.rmtree(tmpdir)
+    params = dict((name, getattr(options, name)) for name in
+                  ("pages", "fanout", "size", "latency", "errorrate",
+                   "seed", "threads", "https"))
+    return dict(
+        version=linkcheck.configuration.Version,
+        python=sys.version.split()[0],
+        params=params,
+        results=results,
+    )
+
+
+def get_argparser ():
+    """Return parser of the commandline options."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=1000,
+        help="number of pages of the site (default %(default)s)")
+    parser.add_argument("--fanout", type=int, default=10,
+        help="number of links per page (default %(default)s)")
+    parser.add_argument("--size", type=int, default=10000,
+        help="page size in bytes (default %(default)s)")
+    parser.add_argument("--latency", default="const:0",
+        help="response latency in milliseconds as const:MS, uniform:MIN:MAX"
+             " or exp:MEAN (default %(default)s)")
+    parser.add_argument("--error-rate", dest="errorrate", type=float,
+        default=0.0, help="fraction of error pages (default %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+        help="random seed of the site (default %(default)s)")
+    parser.add_argument("--threads", type=int, default=10,
+        help="number of checker threads (default %(default)s)")
+    parser.add_argument("--https", action="store_true",
+        help="serve the site with HTTPS")
+    parser.add_argument("--certfile",
+        help="PEM file with certificate and key for HTTPS; per default"
+             " a self-signed certificate is created with openssl")
+    parser.add_argument("-o", "--output",
+        help="write JSON results to this file instead of stdout")
+    return parser
+
+
+def main (args=None):
+    """Run the benchmark with the given commandline arguments."""
+    parser = get_argparser()
+    options = parser.parse_args(args)
+    if options.pages < 1 or options.fanout < 1:
+        parser.error("--pages and --fanout must be positive")
+    if not 0 <= options.errorrate < 1:
+        parser.error("--error-rate must be between 0 and 1")
+    try:
+        Latency(options.latency, options.seed)
+    except ValueError as msg:
+        parser.error(str(msg))
+    result = run(options)
+    data = json.dumps(result, indent=2, sort_keys=True,
+                      separators=(",", ": ")) + "\n"
+    if options.output:
+        with open(options.output, "w") as fd:
+            fd.write(data)
+    else:
+        sys.stdout.write(data)
+
+
+if __name__ == '__main__':
+    main()
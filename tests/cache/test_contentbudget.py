@@ -0,0 +1,69 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the content memory budget.
+"""
+import threading
+import unittest
+from linkcheck.cache.contentbudget import ContentBudget
+
+
+class TestContentBudget (unittest.TestCase):
+    """Test content budget accounting."""
+
+    def test_accounting (self):
+        budget = ContentBudget(100)
+        reserved = budget.acquire(60)
+        reserved = budget.resize(reserved, 80)
+        self.assertEqual(budget.status(), (80, 80))
+        budget.release(reserved)
+        self.assertEqual(budget.status(), (0, 80))
+
+    def test_oversized (self):
+        # a single download larger than the budget is allowed
+        budget = ContentBudget(10)
+        budget.acquire(50)
+        self.assertEqual(budget.status(), (50, 50))
+
+    def test_wait (self):
+        budget = ContentBudget(100)
+        budget.acquire(90)
+        acquired = threading.Event()
+        def acquire ():
+            budget.acquire(20)
+            acquired.set()
+        t = threading.Thread(target=acquire)
+        t.start()
+        self.assertFalse(acquired.wait(0.2))
+        budget.release(90)
+        self.assertTrue(acquired.wait(5))
+        t.join()
+        self.assertEqual(budget.status(), (20, 90))
+
+    def test_unknown_size (self):
+        budget = ContentBudget(100)
+        self.assertEqual(budget.get_reservation(30, 1000), 30)
+        self.assertEqual(budget.get_reservation(0, 1000), 0)
+        self.assertEqual(budget.get_reservation(-1, 1000), 100)
+        self.assertEqual(budget.get_reservation(-1, 50), 50)
+        self.assertEqual(ContentBudget(0).get_reservation(-1, 50), 0)
+
+    def test_unlimited (self):
+        budget = ContentBudget(0)
+        budget.acquire(10)
+        budget.acquire(10)
+        self.assertEqual(budget.status(), (20, 20))
@@ -0,0 +1,50 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test detection of duplicate content.
+"""
+import unittest
+from linkcheck.cache.duplicates import DuplicateContent
+
+
+class TestDuplicateContent (unittest.TestCase):
+    """Test the content digest map."""
+
+    def test_original (self):
+        duplicates = DuplicateContent()
+        page = u"http://example.org/a/page.html"
+        self.assertEqual(duplicates.get_original("1", page, 1), None)
+        # session ID variants
+        self.assertEqual(duplicates.get_original("1", page + u"?sid=2", 1),
+                         page)
+        self.assertEqual(duplicates.get_original("1", page + u"?sid=3", 2),
+                         page)
+        # relative query-only links of a print view resolve to other URLs
+        self.assertEqual(duplicates.get_original("1",
+            u"http://example.org/a/print.html", 1), None)
+        # the same URL is parsed again
+        self.assertEqual(duplicates.get_original("1", page, 1), None)
+        # links of a mirror at another path resolve to other URLs
+        self.assertEqual(duplicates.get_original("1",
+            u"http://example.org/b/page.html", 1), None)
+        # links of the original were queued with a higher level
+        self.assertEqual(duplicates.get_original("1", page + u"?sid=4", 0),
+                         None)
+        self.assertEqual(duplicates.get_original("2",
+            u"http://example.org/a/index.html", 0), None)
+        self.assertEqual(len(duplicates), 2)
+        self.assertEqual(duplicates.hits, 2)
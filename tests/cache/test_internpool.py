@@ -0,0 +1,42 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the string intern pool.
+"""
+import unittest
+from linkcheck.cache.internpool import InternPool
+
+
+class TestInternPool (unittest.TestCase):
+    """Test string interning."""
+
+    def test_intern (self):
+        pool = InternPool()
+        s1 = u"".join([u"http://example.com/", u"a"])
+        s2 = u"".join([u"http://example.com/", u"a"])
+        self.assertFalse(s1 is s2)
+        self.assertTrue(pool.intern(s1) is s1)
+        self.assertTrue(pool.intern(s2) is s1)
+        self.assertTrue(pool.intern(None) is None)
+        self.assertEqual((pool.hits, pool.misses), (1, 1))
+        self.assertEqual(len(pool), 1)
+
+    def test_tuple (self):
+        pool = InternPool()
+        item = (u"tag", u"message")
+        self.assertTrue(pool.intern((u"tag", u"message")) is not item)
+        self.assertTrue(pool.intern(item) is not item)
@@ -0,0 +1,97 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the link graph store for incremental checking.
+"""
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import linkcheck.director
+from linkcheck.cache.linkgraph import LinkGraph
+from ..checker import get_test_aggregate
+from .. import need_sqlite
+
+
+class TestLinkGraph (unittest.TestCase):
+    """Test storing and reusing links of parsed pages."""
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "linkgraph.sqlite")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    @need_sqlite
+    def test_store (self):
+        links = [(u"a.html", 1, 2, u"a", None, None),
+                 (u"b.html", 3, 4, u"", u"http://example.com/", u"2014")]
+        graph = LinkGraph(self.filename)
+        self.assertEqual(graph.get_page(u"http://example.com/"), None)
+        graph.store_page(u"http://example.com/", u"123", u"etag:1", links)
+        graph.close()
+        graph = LinkGraph(self.filename)
+        self.assertEqual(tuple(graph.get_page(u"http://example.com/")),
+                         (u"123", u"etag:1"))
+        self.assertEqual([tuple(x) for x in
+                          graph.get_links(u"http://example.com/")], links)
+        graph.store_page(u"http://example.com/", u"456", None, links[:1])
+        self.assertEqual(len(graph.get_links(u"http://example.com/")), 1)
+        self.assertEqual((graph.hits, graph.misses), (2, 1))
+        graph.close()
+
+    @need_sqlite
+    def test_recrawl (self):
+        datadir = os.path.join(os.path.dirname(__file__), "..", "checker", "data")
+        url = os.path.join(datadir, "file.html")
+        results = []
+        for i in range(2):
+            confargs = {"incremental": self.filename}
+            aggregate = get_test_aggregate(confargs, {'expected': []})
+            url_data = linkcheck.checker.get_url_from(url, 0, aggregate)
+            aggregate.urlqueue.put(url_data)
+            linkcheck.director.check_urls(aggregate)
+            graph = aggregate.linkgraph
+            results.append((graph.hits, graph.misses,
+                            aggregate.config['logger'].result))
+        self.assertEqual(results[0][:2], (0, 1))
+        self.assertEqual(results[1][:2], (1, 0))
+        # the same URLs are checked, the page is marked as unchanged
+        info = u"info Content is unchanged, using stored links."
+        self.assertTrue(info in results[1][2])
+        self.assertEqual([x for x in results[1][2] if x != info],
+                         results[0][2])
+
+    @need_sqlite
+    def test_recrawl_content_check (self):
+        datadir = os.path.join(os.path.dirname(__file__), "..", "checker", "data")
+        url = os.path.join(datadir, "file.html")
+        results = []
+        for i in range(2):
+            confargs = {"incremental": self.filename,
+                        "warningregex": re.compile("bad anchor")}
+            aggregate = get_test_aggregate(confargs, {'expected': []})
+            url_data = linkcheck.checker.get_url_from(url, 0, aggregate)
+            aggregate.urlqueue.put(url_data)
+            linkcheck.director.check_urls(aggregate)
+            results.append(aggregate.config['logger'].result)
+        self.assertEqual(aggregate.linkgraph.hits, 1)
+        # the content of the unchanged page is still checked
+        info = u"info Content is unchanged, using stored links."
+        self.assertEqual([x for x in results[1] if x != info], results[0])
@@ -0,0 +1,96 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the persistent result cache.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from linkcheck.checker import get_url_from
+from linkcheck.cache.results import ResultCache
+from ..checker import get_test_aggregate
+from .. import need_sqlite
+
+
+class TestResultCache (unittest.TestCase):
+    """Test storing and loading check results."""
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "results.sqlite")
+        self.aggregate = get_test_aggregate({}, {'expected': []})
+        datadir = os.path.join(os.path.dirname(__file__), "..", "checker", "data")
+        self.url = u"file://%s/file.txt" % os.path.abspath(datadir)
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def get_url_data (self, extern=(1, 0)):
+        """Return new URL object for the test file."""
+        return get_url_from(self.url, 0, self.aggregate, extern=extern)
+
+    @need_sqlite
+    def test_store_load (self):
+        cache = ResultCache(self.filename, {"valid": 60})
+        url_data = self.get_url_data()
+        url_data.check()
+        self.assertTrue(url_data.valid)
+        cache.store(url_data)
+        cache.close()
+        # another process opens the same file
+        cache = ResultCache(self.filename, {"valid": 60})
+        url_data = self.get_url_data()
+        self.assertTrue(cache.load(url_data))
+        self.assertTrue(url_data.has_result)
+        self.assertTrue(url_data.valid)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        cache.close()
+
+    @need_sqlite
+    def test_ttl (self):
+        cache = ResultCache(self.filename, {"valid": 60, "file.valid": 0})
+        url_data = self.get_url_data()
+        url_data.check()
+        cache.store(url_data)
+        self.assertFalse(cache.load(self.get_url_data()))
+        cache.close()
+
+    @need_sqlite
+    def test_intern (self):
+        cache = ResultCache(self.filename, {"valid": 60})
+        url_data = self.get_url_data(extern=(0, 0))
+        url_data.check()
+        cache.store(url_data)
+        self.assertFalse(cache.load(self.get_url_data(extern=(0, 0))))
+        cache.close()
+
+    @need_sqlite
+    def test_batch (self):
+        cache = ResultCache(self.filename, {"valid": 60})
+        url_data = self.get_url_data()
+        url_data.check()
+        cache.store(url_data)
+        # the result is not written yet, but can be loaded
+        other = ResultCache(self.filename, {"valid": 60})
+        self.assertFalse(other.load(self.get_url_data()))
+        self.assertTrue(cache.load(self.get_url_data()))
+        cache.flush()
+        self.assertEqual(cache.pending, {})
+        self.assertTrue(other.load(self.get_url_data()))
+        other.close()
+        cache.close()
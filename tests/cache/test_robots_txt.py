@@ -0,0 +1,113 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the robots.txt cache and store.
+"""
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import urllib2
+from linkcheck import robotparser2
+from linkcheck.cache.robots_txt import RobotsTxt, RobotsTxtStore
+from .. import need_sqlite
+
+RobotsUrl = "http://example.com/robots.txt"
+
+
+def get_parser ():
+    """Return parser with some parsed rules."""
+    rp = robotparser2.RobotFileParser()
+    rp.set_url(RobotsUrl)
+    rp.parse([
+        "User-agent: *",
+        "Disallow: /private",
+        "Sitemap: http://example.com/sitemap.xml",
+    ])
+    rp.fetched = True
+    return rp
+
+
+class TestRobotsTxt (unittest.TestCase):
+    """Test robots.txt caching."""
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "robots.sqlite")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_max_age (self):
+        get_max_age = robotparser2.get_max_age
+        self.assertEqual(get_max_age({}), None)
+        self.assertEqual(get_max_age(None), None)
+        self.assertEqual(get_max_age({"Cache-Control": "public, max-age=60"}), 60)
+        self.assertEqual(get_max_age({"Cache-Control": "no-cache"}), 0)
+        self.assertEqual(get_max_age({"Expires": "invalid"}), 0)
+        self.assertEqual(get_max_age({"Expires": "Thu, 01 Dec 1994 16:00:00 GMT"}), 0)
+
+    @need_sqlite
+    def test_store (self):
+        store = RobotsTxtStore(self.filename)
+        rp = get_parser()
+        store.save(rp, time.time() + 60)
+        store.close()
+        store = RobotsTxtStore(self.filename)
+        rp2 = robotparser2.RobotFileParser()
+        rp2.set_url(RobotsUrl)
+        self.assertTrue(store.load(rp2))
+        self.assertEqual(str(rp2), str(rp))
+        self.assertEqual(rp2.sitemap_urls, rp.sitemap_urls)
+        self.assertEqual(rp2.mtime(), rp.mtime())
+        # expired entries are not loaded
+        store.save(rp, time.time() - 1)
+        store.save(rp, time.time() + 0.01)
+        time.sleep(0.02)
+        self.assertFalse(store.load(rp2))
+        store.close()
+
+    @need_sqlite
+    def test_stored_hits (self):
+        store = RobotsTxtStore(self.filename)
+        store.save(get_parser(), time.time() + 60)
+        robots_txt = RobotsTxt(size=10, store=store)
+        sitemaps = []
+        def sitemap_callback (roboturl, urls):
+            sitemaps.extend(urls)
+        url = "http://example.com/private/a.html"
+        self.assertFalse(robots_txt.allows_url(RobotsUrl, url, None, None,
+            None, sitemap_callback=sitemap_callback))
+        self.assertTrue(robots_txt.allows_url(RobotsUrl,
+            "http://example.com/a.html", None, None, None))
+        self.assertEqual(sitemaps, [("http://example.com/sitemap.xml", 3)])
+        self.assertEqual((robots_txt.hits, robots_txt.misses,
+                          robots_txt.stored_hits), (1, 0, 1))
+        robots_txt.close()
+
+    def test_fetched (self):
+        # only lasting answers are stored
+        for code, fetched in ((404, True), (403, True), (429, False),
+                              (500, False), (503, False)):
+            rp = robotparser2.RobotFileParser()
+            rp.set_url(RobotsUrl)
+            def read_content (req):
+                raise urllib2.HTTPError(RobotsUrl, code, "error", {}, None)
+            rp._read_content = read_content
+            rp.read()
+            self.assertEqual(rp.fetched, fetched, code)
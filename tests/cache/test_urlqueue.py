@@ -0,0 +1,121 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the URL queue with pending URLs.
+"""
+import unittest
+from linkcheck import get_link_pat
+from linkcheck.checker import PendingUrl
+from linkcheck.cache.urlqueue import Empty
+from ..checker import get_test_aggregate
+
+
+class BrokenUrl (PendingUrl):
+    """Pending URL failing to create its URL object."""
+
+    def get_url_data (self):
+        """Raise an error."""
+        raise ValueError("broken")
+
+
+class TestUrlQueue (unittest.TestCase):
+    """Test pending URL handling of the URL queue."""
+
+    def setUp (self):
+        self.aggregate = get_test_aggregate({}, {'expected': []})
+        self.urlqueue = self.aggregate.urlqueue
+
+    def put_pending (self, url, parent_url=u"http://example.com/"):
+        """Queue a pending URL."""
+        self.urlqueue.put(PendingUrl(url, 1, self.aggregate,
+            parent_url=parent_url))
+
+    def test_pending_dedup (self):
+        self.put_pending(u"http://example.com/a")
+        self.put_pending(u"http://example.com/a")
+        self.put_pending(u"a")
+        self.put_pending(u"../a", parent_url=u"http://example.com/b/c#x")
+        self.put_pending(u"b")
+        self.assertEqual(self.urlqueue.qsize(), 2)
+        self.assertEqual(self.urlqueue.pending_seen,
+                         set([u"http://example.com/a", u"http://example.com/b"]))
+
+    def test_allowed_puts (self):
+        self.urlqueue.allowed_puts = 2
+        self.put_pending(u"http://example.com/a")
+        self.put_pending(u"a")
+        self.put_pending(u"http://example.com/b")
+        self.put_pending(u"http://example.com/c")
+        self.assertEqual(self.urlqueue.qsize(), 2)
+        self.assertEqual(self.urlqueue.allowed_puts, 0)
+
+    def test_strict_extern (self):
+        self.aggregate.config["externlinks"].append(
+            get_link_pat(u"/ignored", strict=True))
+        url_data = PendingUrl(u"ignored/a", 1, self.aggregate,
+                              parent_url=u"http://example.com/")
+        self.assertTrue(url_data.is_strict_extern())
+        url_data = PendingUrl(u"a", 1, self.aggregate,
+                              parent_url=u"http://example.com/")
+        self.assertFalse(url_data.is_strict_extern())
+
+    def test_materialize (self):
+        self.put_pending(u"http://example.com/a", parent_url=None)
+        url_data = self.urlqueue.get(timeout=0)
+        self.assertFalse(url_data.pending)
+        self.assertEqual(url_data.url, u"http://example.com/a")
+        self.assertTrue(url_data.cache_url_key in self.urlqueue.in_progress)
+        self.urlqueue.task_done(url_data)
+        self.assertTrue(self.urlqueue.empty())
+
+    def test_materialize_duplicate (self):
+        # different pending keys resolve to the same URL
+        self.urlqueue.allowed_puts = 10
+        self.put_pending(u"http://example.com/a")
+        self.put_pending(u"http://EXAMPLE.com/a")
+        url_data = self.urlqueue.get(timeout=0)
+        self.urlqueue.task_done(url_data)
+        self.assertEqual(self.urlqueue.unfinished_tasks, 1)
+        self.assertRaises(Empty, self.urlqueue.get, timeout=0)
+        self.assertEqual(self.urlqueue.unfinished_tasks, 0)
+        # the skipped duplicate does not count as allowed put
+        self.assertEqual(self.urlqueue.allowed_puts, 9)
+
+    def test_alias_after_queueing (self):
+        # like for other URLs, aliases seen after queueing are ignored
+        self.put_pending(u"http://example.com/a")
+        self.put_pending(u"http://example.com/b")
+        url_data = self.urlqueue.get(timeout=0)
+        url_data.aliases = [u"http://example.com/b"]
+        self.urlqueue.task_done(url_data)
+        url_data = self.urlqueue.get(timeout=0)
+        self.assertEqual(url_data.url, u"http://example.com/b")
+        self.urlqueue.task_done(url_data)
+        # URLs queued after the alias are duplicates
+        self.put_pending(u"http://EXAMPLE.com/b")
+        self.assertRaises(Empty, self.urlqueue.get, timeout=0)
+        self.assertEqual(self.urlqueue.unfinished_tasks, 0)
+
+    def test_materialize_error (self):
+        # the task of an URL which could not be created is finished
+        self.urlqueue.put(BrokenUrl(u"http://example.com/a", 1,
+                                    self.aggregate))
+        self.put_pending(u"http://example.com/b")
+        url_data = self.urlqueue.get(timeout=0)
+        self.assertEqual(url_data.url, u"http://example.com/b")
+        self.urlqueue.task_done(url_data)
+        self.assertEqual(self.urlqueue.unfinished_tasks, 0)
@@ -0,0 +1,128 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test checkpoints and resuming of interrupted checks.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import linkcheck.director
+from linkcheck.checker import get_url_from
+from linkcheck.director import checkpoint
+from linkcheck.director.logger import CheckpointMarker
+from linkcheck.logger.csvlog import CSVLogger
+from . import LinkCheckTest, get_test_aggregate
+
+
+class TestCheckpoint (LinkCheckTest):
+    """Test checkpoint writing and resuming."""
+
+    def setUp (self):
+        super(TestCheckpoint, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.statedir = os.path.join(self.tmpdir, "state")
+        self.url = os.path.join(os.path.dirname(__file__), "data", "file.html")
+        self.loggers = []
+
+    def tearDown (self):
+        # stop writer threads of interrupted checks
+        for logger in self.loggers:
+            if logger.writer is not None and logger.writer.is_alive():
+                logger.records.put(None)
+                logger.writer.join()
+        shutil.rmtree(self.tmpdir)
+        super(TestCheckpoint, self).tearDown()
+
+    def get_aggregate (self, filename, resume=False):
+        """Get aggregate with checkpoints and CSV output to filename."""
+        csvlogger = CSVLogger(fileoutput=1, filename=filename,
+                              parts=["urlname", "url"])
+        confargs = {"checkpoint": self.statedir, "resume": resume,
+                    "fileoutput": [csvlogger]}
+        aggregate = get_test_aggregate(confargs, {'expected': []})
+        self.loggers.append(aggregate.logger)
+        return aggregate
+
+    def get_output (self, filename):
+        """Return sorted lines of CSV output file."""
+        with open(filename) as fd:
+            return sorted(fd.read().splitlines())
+
+    def check_one (self, aggregate):
+        """Check and log the next URL of the queue."""
+        url_data = aggregate.urlqueue.get(timeout=0)
+        try:
+            if not url_data.has_result:
+                url_data.check()
+            aggregate.logger.log_url(url_data)
+        finally:
+            aggregate.urlqueue.task_done(url_data)
+
+    def test_resume (self):
+        # complete check for comparison
+        filename = os.path.join(self.tmpdir, "complete.csv")
+        aggregate = self.get_aggregate(filename)
+        aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+        linkcheck.director.check_urls(aggregate)
+        expected = self.get_output(filename)
+        statefile = os.path.join(self.statedir, checkpoint.CheckpointFile)
+        self.assertFalse(os.path.exists(statefile))
+        # interrupted check
+        filename = os.path.join(self.tmpdir, "resumed.csv")
+        aggregate = self.get_aggregate(filename)
+        aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+        aggregate.logger.start_log_output()
+        self.check_one(aggregate)
+        aggregate.checkpoint.write()
+        self.assertTrue(os.path.exists(statefile))
+        # this URL is logged after the checkpoint
+        self.check_one(aggregate)
+        aggregate.logger.loggers[1].flush()
+        # resume, the URL given again is not checked twice
+        aggregate = self.get_aggregate(filename, resume=True)
+        aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+        linkcheck.director.check_urls(aggregate)
+        self.assertEqual(self.get_output(filename), expected)
+        self.assertFalse(os.path.exists(statefile))
+
+    def test_no_stall (self):
+        # a checkpoint waiting for the log writer does not block checking
+        filename = os.path.join(self.tmpdir, "output.csv")
+        aggregate = self.get_aggregate(filename)
+        aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+        logger = aggregate.logger
+        logger.start_log_output()
+        logger.write_lock.acquire()
+        try:
+            self.check_one(aggregate)
+            t = threading.Thread(target=aggregate.checkpoint.write)
+            t.start()
+            # wait for the queued checkpoint marker
+            while not any(isinstance(record, CheckpointMarker)
+                          for record in list(logger.records.queue)):
+                time.sleep(0.01)
+            self.check_one(aggregate)
+            logger.log_internal_error()
+            self.assertTrue(t.is_alive())
+        finally:
+            logger.write_lock.release()
+        t.join()
+        statefile = os.path.join(self.statedir, checkpoint.CheckpointFile)
+        self.assertTrue(os.path.exists(statefile))
+        logger.end_log_output()
@@ -0,0 +1,119 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test distributed checking with a coordinator and worker processes.
+"""
+import os
+import shutil
+import tempfile
+import multiprocessing
+import linkcheck.director
+from linkcheck.checker import get_url_from
+from linkcheck.director import distributed
+from linkcheck.logger.csvlog import CSVLogger
+from . import LinkCheckTest, get_test_aggregate
+
+
+def run_worker (port):
+    """Check URLs of the coordinator listening on given port."""
+    aggregate = get_test_aggregate({"worker": ("localhost", port),
+                                    "threads": 2}, {'expected': []})
+    linkcheck.director.check_urls(aggregate)
+
+
+class TestDistributed (LinkCheckTest):
+    """Test leasing URLs to workers."""
+
+    def setUp (self):
+        super(TestDistributed, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.url = os.path.join(os.path.dirname(__file__), "data", "file.html")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+        super(TestDistributed, self).tearDown()
+
+    def get_aggregate (self, filename, confargs):
+        """Get aggregate with CSV output to filename."""
+        csvlogger = CSVLogger(fileoutput=1, filename=filename,
+                              parts=["urlname", "url", "valid"])
+        confargs["fileoutput"] = [csvlogger]
+        return get_test_aggregate(confargs, {'expected': []})
+
+    def get_output (self, filename):
+        """Return sorted lines of CSV output file."""
+        with open(filename) as fd:
+            return sorted(fd.read().splitlines())
+
+    def test_parse_address (self):
+        self.assertEqual(distributed.parse_address("localhost:8000"),
+                         ("localhost", 8000))
+        self.assertEqual(distributed.parse_address(":8000"), ("", 8000))
+        self.assertRaises(ValueError, distributed.parse_address, "localhost")
+        self.assertRaises(ValueError, distributed.parse_address, "a:b")
+
+    def test_lease_expiry (self):
+        filename = os.path.join(self.tmpdir, "expiry.csv")
+        aggregate = self.get_aggregate(filename,
+            {"coordinator": ("localhost", 0), "leaseseconds": 1})
+        coordinator = aggregate.coordinator
+        try:
+            aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+            request = dict(version=distributed.ProtocolVersion,
+                           worker="a", size=5, results=[])
+            response = coordinator.handle_lease(request)
+            self.assertFalse(response["done"])
+            [(lease, entry)] = response["leases"]
+            # nothing left to lease
+            request["worker"] = "b"
+            self.assertEqual(coordinator.handle_lease(request)["leases"], [])
+            # the lease of the dead worker expires
+            coordinator.leases[lease] = coordinator.leases[lease][:2] + (0,)
+            coordinator.expire_leases()
+            [(lease2, entry2)] = coordinator.handle_lease(request)["leases"]
+            self.assertNotEqual(lease, lease2)
+            self.assertEqual(entry, entry2)
+            # a late result of the expired lease is ignored
+            coordinator.add_result(dict(lease=lease, links=[], result=None))
+            self.assertEqual(aggregate.urlqueue.status(), (0, 1, 0))
+        finally:
+            coordinator.server.server_close()
+
+    def test_workers (self):
+        # local check for comparison
+        filename = os.path.join(self.tmpdir, "local.csv")
+        aggregate = self.get_aggregate(filename, {})
+        aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+        linkcheck.director.check_urls(aggregate)
+        expected = self.get_output(filename)
+        # check with two worker processes
+        filename = os.path.join(self.tmpdir, "distributed.csv")
+        aggregate = self.get_aggregate(filename,
+            {"coordinator": ("localhost", 0)})
+        aggregate.urlqueue.put(get_url_from(self.url, 0, aggregate))
+        port = aggregate.coordinator.server.server_address[1]
+        workers = [multiprocessing.Process(target=run_worker, args=(port,))
+                   for dummy in range(2)]
+        for worker in workers:
+            worker.start()
+        try:
+            linkcheck.director.check_urls(aggregate)
+        finally:
+            for worker in workers:
+                worker.join(30)
+        self.assertEqual([worker.exitcode for worker in workers], [0, 0])
+        self.assertEqual(self.get_output(filename), expected)
@@ -0,0 +1,76 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test reading URLs from an input file while checking.
+"""
+import os
+from cStringIO import StringIO
+import linkcheck.director
+from . import LinkCheckTest, get_test_aggregate
+
+
+class TestFeeder (LinkCheckTest):
+    """
+    Test URL input feeding.
+    """
+
+    def feeder_test (self, data, inputformat, resultlines, threads=0):
+        """Check URLs read from data with expected result."""
+        confargs = {'recursionlevel': 0, 'threads': threads,
+                    'inputqueuesize': 1}
+        logargs = {'expected': resultlines}
+        aggregate = get_test_aggregate(confargs, logargs)
+        aggregate.add_input(StringIO(data), inputformat=inputformat)
+        linkcheck.director.check_urls(aggregate)
+        diff = aggregate.config['logger'].diff
+        if diff:
+            l = [u"Differences found testing %s input" % inputformat]
+            l.extend(x.rstrip() for x in diff[2:])
+            self.fail_unicode(unicode(os.linesep).join(l))
+
+    def test_text (self):
+        attrs = self.get_attrs()
+        data = ("%(datadir)s/file.txt\n"
+                "%(datadir)s/file.txt %(datadir)s/file.asc\n") % attrs
+        resultlines = []
+        for name in ("file.txt", "file.asc"):
+            url = u"file://%(curdir)s/%(datadir)s/" % attrs + name
+            resultlines.extend([
+                u"url %s" % url,
+                u"cache key %s" % url,
+                u"real url %s" % url,
+                u"name %s/%s" % (attrs["datadir"], name),
+                u"valid",
+            ])
+        self.feeder_test(data, "text", resultlines)
+
+    def test_ndjson (self):
+        attrs = self.get_attrs()
+        parent = u"file://%(curdir)s/%(datadir)s/file.html" % attrs
+        url = u"file://%(curdir)s/%(datadir)s/file.txt" % attrs
+        data = ('{"url": "file.txt", "parent": "%s", "line": 3, '
+                '"name": "bla"}\n'
+                'no json\n'
+                '{"url": "file.txt", "parent": "%s"}\n') % (parent, parent)
+        resultlines = [
+            u"url file.txt",
+            u"cache key %s" % url,
+            u"real url %s" % url,
+            u"name bla",
+            u"valid",
+        ]
+        self.feeder_test(data, "ndjson", resultlines, threads=2)
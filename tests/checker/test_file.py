@@ -70,6 +70,9 @@ class TestFile (LinkCheckTest):
     def test_urllist (self):
         self.file_test("urllist.txt")
 
+    def test_sitemap (self):
+        self.file_test("sitemap.xml")
+
     def test_directory_listing (self):
         # unpack non-unicode filename which cannot be stored
         # in the SF subversion repository
@@ -17,7 +17,9 @@
 """
 Test http checking.
 """
+from linkcheck.checker import get_url_from
 from .httpserver import HttpServerTest, CookieRedirectHttpRequestHandler
+from . import get_test_aggregate
 
 class TestHttp (HttpServerTest):
     """Test http:// link checking."""
@@ -59,3 +61,12 @@ class TestHttp (HttpServerTest):
         resultlines.append(result)
         self.direct(url, resultlines, recursionlevel=0)
 
+    def test_sitemap_recursion (self):
+        # sitemap content is only downloaded if the URL is recursed into
+        url = self.get_url("sitemap.xml")
+        for level, downloaded in ((0, False), (1, True)):
+            aggregate = get_test_aggregate({"recursionlevel": level},
+                                           {"expected": []})
+            url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+            url_data.check()
+            self.assertEqual(url_data.dltime != -1, downloaded)
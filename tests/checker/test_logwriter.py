@@ -0,0 +1,67 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test writing checked URLs to the loggers in the writer thread.
+"""
+import os
+from linkcheck.checker import get_url_from
+from . import LinkCheckTest, get_test_aggregate
+
+
+class TestLogWriter (LinkCheckTest):
+
+    def setUp (self):
+        super(TestLogWriter, self).setUp()
+        self.url = os.path.join(os.path.dirname(__file__), "data", "file.html")
+
+    def get_aggregate (self, confargs):
+        """Get aggregate with a test logger counting flushes."""
+        aggregate = get_test_aggregate(confargs, {'expected': []})
+        logger = aggregate.logger.loggers[0]
+        logger.flushes = 0
+        def flush ():
+            logger.flushes += 1
+        logger.flush = flush
+        return aggregate
+
+    def log_urls (self, aggregate, num):
+        """Log num URLs and return them."""
+        urls = [get_url_from(u"%s?%d" % (self.url, i), 0, aggregate)
+                for i in range(num)]
+        aggregate.logger.start_log_output()
+        for url_data in urls:
+            aggregate.logger.log_url(url_data)
+        aggregate.gather_statistics()
+        aggregate.logger.end_log_output()
+        return urls
+
+    def test_log_order (self):
+        aggregate = self.get_aggregate({"outputqueuesize": 2})
+        urls = self.log_urls(aggregate, 10)
+        logger = aggregate.logger.loggers[0]
+        self.assertTrue(all(url_data.logged for url_data in urls))
+        expected = [u"url %s" % url_data.base_url for url_data in urls]
+        self.assertEqual([x for x in logger.result if x.startswith(u"url ")],
+                         expected)
+        self.assertEqual(aggregate.logger.statistics.number, 10)
+        self.assertIsNone(aggregate.logger.writer)
+
+    def test_flush_interval (self):
+        aggregate = self.get_aggregate({"flushseconds": 60})
+        self.log_urls(aggregate, 10)
+        # flushed once at the end of output, not after every URL
+        self.assertEqual(aggregate.logger.loggers[0].flushes, 1)
@@ -0,0 +1,114 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the metrics endpoint.
+"""
+import httplib
+import json
+import os
+from linkcheck.checker import get_url_from
+from linkcheck.director import checkpoint
+from linkcheck.director.metrics import quote_label
+from . import LinkCheckTest, get_test_aggregate
+
+
+class TestMetrics (LinkCheckTest):
+
+    def setUp (self):
+        super(TestMetrics, self).setUp()
+        confargs = {"metrics": ("localhost", 0)}
+        self.aggregate = get_test_aggregate(confargs, {'expected': []})
+        self.aggregate.metrics.start()
+
+    def tearDown (self):
+        self.aggregate.metrics.stop()
+        self.aggregate.metrics.join()
+
+    def get (self, path):
+        """Return status, content type and body of a metrics request."""
+        host, port = self.aggregate.metrics.server.server_address
+        conn = httplib.HTTPConnection(host, port, timeout=10)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            return (response.status, response.getheader("Content-Type"),
+                    response.read())
+        finally:
+            conn.close()
+
+    def test_metrics (self):
+        url = os.path.join(os.path.dirname(__file__), "data", "file.html")
+        url_data = get_url_from(url, 0, self.aggregate)
+        self.aggregate.urlqueue.put(url_data)
+        status, ctype, data = self.get("/metrics")
+        self.assertEqual(status, 200)
+        self.assertTrue(ctype.startswith("text/plain; version=0.0.4"))
+        lines = data.splitlines()
+        self.assertTrue("# TYPE linkchecker_urls_total counter" in lines)
+        self.assertTrue('linkchecker_urls_total{result="valid"} 0' in lines)
+        self.assertTrue("linkchecker_urls_queued 1" in lines, data)
+        self.assertTrue('linkchecker_cache_hits_total{cache="internpool"} 0'
+                        in lines, data)
+        url_data = self.aggregate.urlqueue.get()
+        url_data.check()
+        logger = self.aggregate.logger
+        logger.start_log_output()
+        try:
+            logger.log_url(url_data)
+            logger.wait_written()
+        finally:
+            self.aggregate.urlqueue.task_done(url_data)
+            self.aggregate.gather_statistics()
+            logger.end_log_output()
+        data = self.get("/metrics")[2]
+        lines = data.splitlines()
+        self.assertTrue('linkchecker_urls_total{result="valid"} 1' in lines,
+                        data)
+        # the parsed links of the file are queued
+        queued = self.aggregate.urlqueue.qsize()
+        self.assertTrue(queued > 0)
+        self.assertTrue("linkchecker_urls_queued %d" % queued in lines)
+
+    def test_worker (self):
+        self.aggregate.metrics.stop()
+        self.aggregate.metrics.join()
+        confargs = {"metrics": ("localhost", 0), "worker": ("localhost", 1)}
+        self.aggregate = get_test_aggregate(confargs, {'expected': []})
+        self.aggregate.metrics.start()
+        url = u"http://www.example.com/"
+        entry = checkpoint.get_entry(get_url_from(url, 0, self.aggregate))
+        # leases are sent as JSON by the coordinator
+        entry = json.loads(json.dumps(entry))
+        # a URL leased from the coordinator is being checked
+        urlqueue = self.aggregate.urlqueue
+        urlqueue.leased.append((1, entry))
+        url_data = urlqueue.get()
+        status, ctype, data = self.get("/metrics")
+        self.assertEqual(status, 200)
+        lines = data.splitlines()
+        self.assertTrue("linkchecker_urls_in_progress 1" in lines, data)
+        self.assertTrue('linkchecker_host_requests_in_progress'
+                        '{host="www.example.com"} 1' in lines, data)
+        url_data.logged = False
+        urlqueue.task_done(url_data)
+        self.assertEqual(urlqueue.status(), (1, 0, 0))
+
+    def test_not_found (self):
+        self.assertEqual(self.get("/")[0], 404)
+
+    def test_quote_label (self):
+        self.assertEqual(quote_label('a"b\\c\nd'), 'a\\"b\\\\c\\nd')
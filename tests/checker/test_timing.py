@@ -0,0 +1,53 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the check phase timing of URLs.
+"""
+from linkcheck.checker import get_url_from
+from .httpserver import HttpServerTest, CookieRedirectHttpRequestHandler
+from . import get_test_aggregate
+
+
+class TestTiming (HttpServerTest):
+    """Test the timing of http:// link checks."""
+
+    def __init__ (self, methodName='runTest'):
+        super(TestTiming, self).__init__(methodName=methodName)
+        self.handler = CookieRedirectHttpRequestHandler
+
+    def check_url (self, url):
+        """Check given URL and return its check phase timing."""
+        aggregate = get_test_aggregate({}, {'expected': []})
+        url_data = get_url_from(url, 0, aggregate)
+        url_data.check()
+        timing = url_data.to_wire().timing
+        for phase, seconds in timing.items():
+            self.assertTrue(seconds >= 0, "%s: %r" % (phase, seconds))
+        return timing
+
+    def test_timing (self):
+        timing = self.check_url(self.get_url("http.html"))
+        for phase in ("dns", "connect", "firstbyte", "robotstxt",
+                      "poolwait", "parse"):
+            self.assertTrue(phase in timing, phase)
+        self.assertFalse("redirect" in timing)
+        self.assertFalse("tls" in timing)
+
+    def test_redirect (self):
+        url = u"http://localhost:%d/redirect1" % self.port
+        timing = self.check_url(url)
+        self.assertTrue("redirect" in timing)
@@ -0,0 +1,93 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test warning regex scanning.
+"""
+
+import re
+import unittest
+from linkcheck.checker.warningregex import (WarningRegex,
+    WarningRegexScanner, LineIndex)
+
+
+def get_scanner (maxmatches=5):
+    """Return scanner with some test patterns."""
+    patterns = [
+        WarningRegex(None, re.compile("Oracle DB Error")),
+        WarningRegex(u"mixed", re.compile(r'src="http://'),
+                     contenttypes=["text/html"]),
+        WarningRegex(u"oldhost", re.compile(r"old\.example\.com"),
+                     scope="intern"),
+        WarningRegex(u"repeat", re.compile(r"(a)\1")),
+    ]
+    return WarningRegexScanner(patterns, maxmatches)
+
+
+class TestWarningRegex (unittest.TestCase):
+    """Test warning regex scanning."""
+
+    def test_line_index (self):
+        lines = LineIndex("a\nb\n\nc")
+        self.assertEqual(lines.line(0), 1)
+        self.assertEqual(lines.line(1), 1)
+        self.assertEqual(lines.line(2), 2)
+        self.assertEqual(lines.line(4), 3)
+        self.assertEqual(lines.line(5), 4)
+
+    def test_applies (self):
+        scanner = get_scanner()
+        self.assertEqual(scanner.get_patterns("text/html", False, True),
+                         (0, 1, 2, 3))
+        self.assertEqual(scanner.get_patterns("text/html", True, True),
+                         (0, 1, 3))
+        self.assertEqual(scanner.get_patterns("text/css", False, True),
+                         (0, 2, 3))
+        self.assertEqual(scanner.get_patterns("text/html", True, False),
+                         (1,))
+        self.assertTrue(WarningRegex(u"x", re.compile("x"),
+            contenttypes=["text/*"]).applies("text/plain", False, False))
+
+    def test_scan (self):
+        scanner = get_scanner()
+        content = ('<img src="http://old.example.com/">\n'
+                   'Oracle DB Error\naa\n'
+                   'Oracle DB Error')
+        indices = scanner.get_patterns("text/html", False, True)
+        found = [(p.name, match, line) for p, match, line in
+                 scanner.scan(content, indices)]
+        self.assertEqual(found, [
+            (u"mixed", 'src="http://', 1),
+            (u"oldhost", 'old.example.com', 1),
+            (None, "Oracle DB Error", 2),
+            (u"repeat", "aa", 3),
+            (None, "Oracle DB Error", 4),
+        ])
+
+    def test_scan_max (self):
+        scanner = get_scanner(maxmatches=2)
+        content = "Oracle DB Error\n" * 5 + "aaaaaa"
+        indices = scanner.get_patterns("text/plain", False, True)
+        found = [(p.name, line) for p, match, line in
+                 scanner.scan(content, indices)]
+        self.assertEqual(found, [(None, 1), (None, 2),
+                                 (u"repeat", 6), (u"repeat", 6)])
+
+    def test_scan_nomatch (self):
+        scanner = get_scanner()
+        indices = scanner.get_patterns("text/html", False, True)
+        self.assertEqual(scanner.scan("nothing here", indices), [])
+        self.assertEqual(scanner.scan("Oracle DB Error", ()), [])
@@ -45,6 +45,19 @@ class TestConfig (unittest.TestCase):
         self.assertEqual(config["recursionlevel"], 1)
         self.assertEqual(config["warningregex"].pattern, "Oracle DB Error")
         self.assertEqual(config["warnsizebytes"], 2000)
+        self.assertEqual(len(config["warningregexes"]), 1)
+        entry = config["warningregexes"][0]
+        self.assertEqual(entry["name"], "mixed")
+        self.assertEqual(entry["pattern"].pattern, 'src="http://')
+        self.assertEqual(entry["contenttypes"],
+                         ["text/html", "application/xhtml+xml"])
+        self.assertEqual(entry["scope"], "intern")
+        self.assertEqual(config["checkpoint"], "/tmp/checkpoint")
+        self.assertEqual(config["checkpointseconds"], 60)
+        self.assertEqual(config["leaseseconds"], 120)
+        self.assertEqual(config["resultcache"], "/tmp/results.sqlite")
+        self.assertEqual(config["resultcachettl"],
+            {"valid": 86400, "invalid": 60, "http.valid": 604800})
         self.assertEqual(config["nntpserver"], "example.org")
         self.assertTrue(config["sendcookies"])
         self.assertTrue(config["storecookies"])
@@ -52,6 +65,7 @@ class TestConfig (unittest.TestCase):
         self.assertEqual(config["useragent"], "Example/0.0")
         self.assertEqual(config["wait"], 99)
         self.assertEqual(config["debugmemory"], 1)
+        self.assertTrue(config["debuglocks"])
         self.assertEqual(config["localwebroot"], "foo")
         self.assertEqual(config["sslverify"], "/path/to/cacerts.crt")
         self.assertEqual(config["warnsslcertdaysvalid"], 99)
@@ -83,6 +97,8 @@ class TestConfig (unittest.TestCase):
         self.assertTrue(config["verbose"])
         self.assertTrue(config["complete"])
         self.assertTrue(config["warnings"])
+        self.assertEqual(config["flushseconds"], 5)
+        self.assertEqual(config["outputqueuesize"], 50)
         self.assertFalse(config["quiet"])
         self.assertEqual(len(config["fileoutput"]), 8)
         # text logger section
@@ -0,0 +1,111 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the blacklist logger.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+from linkcheck.logger.blacklist import BlacklistLogger, BlacklistStore
+from tests import need_sqlite
+
+
+class UrlData (object):
+    """Minimal URL data for the blacklist logger."""
+
+    def __init__ (self, cache_url_key, valid):
+        """Store URL values."""
+        self.cache_url_key = cache_url_key
+        self.valid = valid
+
+
+class TestBlacklistLogger (unittest.TestCase):
+    """Test blacklist updates."""
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "blacklist")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def log_run (self, urls, **kwargs):
+        """Log one check run with given (key, valid) tuples."""
+        logger = BlacklistLogger(**kwargs)
+        logger.start_output()
+        for key, valid in urls:
+            logger.log_url(UrlData(key, valid))
+        logger.end_output()
+
+    @need_sqlite
+    def test_runs (self):
+        kwargs = dict(fileoutput=1, filename=self.filename)
+        self.log_run([(u"http://a/", False), (u"http://b/", False)], **kwargs)
+        self.log_run([(u"http://a/", False), (u"http://b/", True)], **kwargs)
+        store = BlacklistStore(self.filename)
+        try:
+            self.assertEqual(store.get(u"http://a/"), 2)
+            self.assertEqual(store.get(u"http://b/"), 0)
+            self.assertEqual(list(store.get_failing(2)), [(u"http://a/", 2)])
+            self.assertEqual(list(store.get_failing(3)), [])
+        finally:
+            store.close()
+
+    @need_sqlite
+    def test_resume (self):
+        kwargs = dict(fileoutput=1, filename=self.filename)
+        logger = BlacklistLogger(**kwargs)
+        logger.CommitInterval = 1
+        logger.start_output()
+        logger.log_url(UrlData(u"http://a/", False))
+        state = logger.get_checkpoint()
+        logger.log_url(UrlData(u"http://a/", False))
+        logger.log_url(UrlData(u"http://b/", False))
+        # interrupt the check, uncommitted changes are lost
+        logger.blacklist.conn.close()
+        logger = BlacklistLogger(**kwargs)
+        logger.start_resumed_output(state)
+        logger.log_url(UrlData(u"http://a/", False))
+        logger.log_url(UrlData(u"http://b/", False))
+        logger.end_output()
+        store = BlacklistStore(self.filename)
+        try:
+            self.assertEqual(list(store.get_failing()),
+                             [(u"http://a/", 2), (u"http://b/", 1)])
+        finally:
+            store.close()
+
+    @need_sqlite
+    def test_convert (self):
+        with open(self.filename, "w") as fd:
+            fd.write("# old blacklist\n3 http://a/\n1 http://b/\n")
+        kwargs = dict(fileoutput=1, filename=self.filename)
+        self.log_run([(u"http://b/", False)], **kwargs)
+        store = BlacklistStore(self.filename)
+        try:
+            self.assertEqual(list(store.get_failing()),
+                             [(u"http://a/", 3), (u"http://b/", 2)])
+        finally:
+            store.close()
+
+    @need_sqlite
+    def test_output (self):
+        fd = StringIO()
+        self.log_run([(u"http://a/", False)], fd=fd)
+        self.assertEqual(fd.getvalue(), u"1 http://a/%s" % os.linesep)
@@ -0,0 +1,108 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test compressed file output.
+"""
+import bz2
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from linkcheck.logger import get_compression
+from linkcheck.logger.csvlog import CSVLogger
+from linkcheck.logger.text import TextLogger
+
+
+class TestCompress (unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_compression (self):
+        self.assertEqual(get_compression("out.txt.gz"), "gzip")
+        self.assertEqual(get_compression("out.csv.BZ2"), "bz2")
+        self.assertEqual(get_compression("out.xml.zst"), "zstd")
+        self.assertEqual(get_compression("out.txt"), None)
+        self.assertEqual(get_compression("out.txt", "gzip"), "gzip")
+        self.assertEqual(get_compression("out.txt.gz", "none"), None)
+        self.assertRaises(ValueError, get_compression, "out.txt", "rar")
+
+    def test_gzip_suffix (self):
+        filename = os.path.join(self.tmpdir, "out.txt.gz")
+        logger = TextLogger(fileoutput=1, filename=filename,
+                            parts=["intro"], encoding="utf-8")
+        logger.start_output()
+        logger.close_fileoutput()
+        with gzip.open(filename) as fd:
+            self.assertTrue(fd.read().startswith("LinkChecker"))
+
+    def test_compress_option (self):
+        filename = os.path.join(self.tmpdir, "out.csv")
+        logger = CSVLogger(fileoutput=1, filename=filename,
+                           parts=["intro"], compress="bz2")
+        logger.start_output()
+        logger.end_output()
+        fd = bz2.BZ2File(filename)
+        try:
+            self.assertTrue(fd.read().startswith("# created by"))
+        finally:
+            fd.close()
+
+    def test_resume (self):
+        for compress in ("gzip", "bz2"):
+            self.resume(compress)
+
+    def resume (self, compress):
+        """Resume compressed output at a checkpoint."""
+        filename = os.path.join(self.tmpdir, "out.txt")
+        args = dict(fileoutput=1, filename=filename, parts=["intro"],
+                    encoding="utf-8", compress=compress)
+        logger = TextLogger(**args)
+        logger.start_output()
+        logger.writeln(u"before")
+        state = logger.get_checkpoint()
+        # output after the checkpoint is dropped on resume
+        logger.writeln(u"after")
+        logger.close_fileoutput()
+        logger = TextLogger(**args)
+        logger.start_resumed_output(state)
+        logger.writeln(u"resumed")
+        logger.close_fileoutput()
+        lines = decompress(filename, compress).splitlines()
+        # the intro is not written again
+        self.assertTrue(lines[0].startswith("LinkChecker"))
+        self.assertEqual(len([x for x in lines if x.startswith("Start")]), 1)
+        self.assertEqual(lines[-2:], ["before", "resumed"])
+
+
+def decompress (filename, compress):
+    """Decompress all members of a gzip or bz2 file."""
+    if compress == "gzip":
+        with gzip.open(filename) as fd:
+            return fd.read()
+    with open(filename, "rb") as fd:
+        data = fd.read()
+    result = []
+    while data:
+        decompressor = bz2.BZ2Decompressor()
+        result.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return "".join(result)
@@ -0,0 +1,72 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test graph output of nodes and edges.
+"""
+import unittest
+from StringIO import StringIO
+from linkcheck.logger.gml import GMLLogger
+from linkcheck.logger import graph
+
+
+class UrlData (object):
+    """Minimal URL data for graph loggers."""
+
+    def __init__ (self, url, parent_url, name):
+        """Store URL values."""
+        self.url = url
+        self.parent_url = parent_url
+        self.name = name
+        self.title = None
+        self.extern = (0, 0)
+        self.checktime = 0
+        self.dlsize = -1
+        self.dltime = -1
+        self.valid = True
+
+
+class TestGraphLogger (unittest.TestCase):
+    """Test streaming graph output."""
+
+    def get_edges (self):
+        """Log some URLs with a child before its parent and return the
+        written GML edges as (source, target) tuples."""
+        fd = StringIO()
+        logger = GMLLogger(fd=fd, parts=["result"])
+        logger.start_output()
+        logger.log_url(UrlData(u"http://example.com/", None, u"root"))
+        logger.log_url(UrlData(u"http://example.com/b", u"http://example.com/a", u"b"))
+        logger.log_url(UrlData(u"http://example.com/a", u"http://example.com/", u"a"))
+        logger.log_url(UrlData(u"http://example.com/a", u"http://example.com/", u"a"))
+        self.assertEqual(logger.nodeid, 3)
+        logger.end_output()
+        lines = [line.strip() for line in fd.getvalue().splitlines()]
+        sources = [int(line.split()[1]) for line in lines if line.startswith("source")]
+        targets = [int(line.split()[1]) for line in lines if line.startswith("target")]
+        return zip(sources, targets)
+
+    def test_edges (self):
+        # edge 0->2 is written immediately, edge 2->1 at the end
+        self.assertEqual(self.get_edges(), [(0, 2), (2, 1)])
+
+    def test_edges_memory (self):
+        has_sqlite = graph.has_sqlite
+        graph.has_sqlite = False
+        try:
+            self.assertEqual(self.get_edges(), [(0, 2), (2, 1)])
+        finally:
+            graph.has_sqlite = has_sqlite
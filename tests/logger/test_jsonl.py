@@ -0,0 +1,67 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test JSON Lines output.
+"""
+import datetime
+import json
+import unittest
+from StringIO import StringIO
+from linkcheck.checker.urlbase import urlDataAttr, CompactUrlData
+from linkcheck.logger.jsonl import JSONLLogger
+
+
+def get_url_data (url, **kwargs):
+    """Return transport object of a checked URL."""
+    wire = dict.fromkeys(urlDataAttr, None)
+    wire.update(url=url, base_url=url, valid=True, warnings=[], info=[])
+    wire.update(kwargs)
+    return CompactUrlData(wire)
+
+
+class TestJSONLLogger (unittest.TestCase):
+
+    def log_urls (self, urls, **kwargs):
+        """Return decoded output lines of given URLs."""
+        fd = StringIO()
+        logger = JSONLLogger(fd=fd, **kwargs)
+        logger.start_output()
+        for url_data in urls:
+            logger.log_url(url_data)
+        logger.end_output()
+        return [json.loads(line) for line in fd.getvalue().splitlines()]
+
+    def test_all (self):
+        modified = datetime.datetime(2014, 1, 2, 3, 4, 5)
+        urls = [
+            get_url_data(u"http://example.com/", modified=modified),
+            get_url_data(u"http://example.com/\xe4", valid=False,
+                         warnings=[(u"http-moved", u"moved")]),
+        ]
+        lines = self.log_urls(urls)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(sorted(lines[0]), sorted(urlDataAttr))
+        self.assertEqual(lines[0]["modified"], u"2014-01-02T03:04:05.000000Z")
+        self.assertEqual(lines[1]["url"], u"http://example.com/\xe4")
+        self.assertFalse(lines[1]["valid"])
+        self.assertEqual(lines[1]["warnings"], [[u"http-moved", u"moved"]])
+
+    def test_parts (self):
+        urls = [get_url_data(u"http://example.com/")]
+        lines = self.log_urls(urls, parts=["url", "valid"])
+        self.assertEqual(lines, [{u"url": u"http://example.com/",
+                                  u"valid": True}])
@@ -0,0 +1,176 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test SQL output.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from StringIO import StringIO
+from linkcheck.logger.sql import SQLLogger, get_placeholders, Columns
+from .. import need_sqlite
+
+CreateSql = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                         "config", "create.sql")
+
+
+class UrlData (object):
+    """Minimal URL data for the SQL logger."""
+
+    def __init__ (self, url, parent_url, valid):
+        """Store URL values."""
+        self.base_url = self.url = url
+        self.parent_url = parent_url
+        self.base_ref = None
+        self.valid = valid
+        self.result = u"200 OK" if valid else u"404 Not Found"
+        self.warnings = []
+        self.info = [u"it's here"]
+        self.line = 1
+        self.column = 2
+        self.name = u"name"
+        self.checktime = 0
+        self.dltime = -1
+        self.dlsize = -1
+        self.level = 1
+        self.modified = None
+
+
+def get_urls ():
+    """Return some checked URLs."""
+    return [
+        UrlData(u"http://example.com/", None, True),
+        UrlData(u"http://example.com/a", u"http://example.com/", True),
+        UrlData(u"http://example.com/b", u"http://example.com/", False),
+    ]
+
+
+class TestSQLLogger (unittest.TestCase):
+    """Test SQL statement and database output."""
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "links.sqlite")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_placeholders (self):
+        columns = ("a", "b")
+        self.assertEqual(get_placeholders("qmark", columns), u"?,?")
+        self.assertEqual(get_placeholders("numeric", columns), u":1,:2")
+        self.assertEqual(get_placeholders("named", columns), u":a,:b")
+        self.assertEqual(get_placeholders("format", columns), u"%s,%s")
+        self.assertEqual(get_placeholders("pyformat", columns),
+                         u"%(a)s,%(b)s")
+        self.assertRaises(ValueError, get_placeholders, "unknown", columns)
+
+    @need_sqlite
+    def test_text (self):
+        fd = StringIO()
+        logger = SQLLogger(fd=fd, parts=["url"])
+        logger.start_output()
+        for url_data in get_urls():
+            logger.log_url(url_data)
+        logger.end_output()
+        conn = sqlite3.connect(self.filename)
+        # the create statement without the preceding drop statement
+        with open(CreateSql) as f:
+            conn.execute(f.read().split(";")[1])
+        conn.executescript(fd.getvalue())
+        self.assertEqual(conn.execute("select count(*) from linksdb").fetchone()[0], 3)
+        conn.close()
+
+    @need_sqlite
+    def test_database (self):
+        logger = SQLLogger(fd=StringIO(), database=self.filename,
+                           batchsize=2)
+        logger.start_output()
+        for url_data in get_urls():
+            logger.log_url(url_data)
+        # the first batch has been committed
+        self.assertEqual(len(logger.rows), 1)
+        logger.end_output()
+        self.assertTrue(logger.conn is None)
+        conn = sqlite3.connect(self.filename)
+        rows = conn.execute("select urlname, parentname, valid, info "
+                            "from linksdb order by urlname").fetchall()
+        self.assertEqual(rows, [
+            (u"http://example.com/", None, 1, u"it's here"),
+            (u"http://example.com/a", u"http://example.com/", 1, u"it's here"),
+            (u"http://example.com/b", u"http://example.com/", 0, u"it's here"),
+        ])
+        columns = [x[1] for x in conn.execute("pragma table_info(linksdb)")]
+        self.assertEqual(tuple(columns), Columns)
+        indexes = [x[1] for x in conn.execute("pragma index_list(linksdb)")]
+        self.assertEqual(sorted(indexes), ["linksdb_parentname",
+                                           "linksdb_url", "linksdb_valid"])
+        conn.close()
+        # output to an existing database appends rows
+        logger = SQLLogger(fd=StringIO(), database=self.filename)
+        logger.start_output()
+        logger.log_url(get_urls()[0])
+        logger.end_output()
+        conn = sqlite3.connect(self.filename)
+        self.assertEqual(conn.execute("select count(*) from linksdb").fetchone()[0], 4)
+        conn.close()
+
+    @need_sqlite
+    def test_resume (self):
+        urls = get_urls()
+        logger = SQLLogger(fd=StringIO(), database=self.filename,
+                           batchsize=1)
+        logger.start_output()
+        logger.log_url(urls[0])
+        state = logger.get_checkpoint()
+        # this row is inserted after the checkpoint
+        logger.log_url(urls[1])
+        logger.close_database()
+        logger = SQLLogger(fd=StringIO(), database=self.filename,
+                           batchsize=1)
+        logger.start_resumed_output(state)
+        logger.log_url(urls[1])
+        logger.log_url(urls[2])
+        logger.end_output()
+        conn = sqlite3.connect(self.filename)
+        rows = conn.execute("select urlname from linksdb "
+                            "order by urlname").fetchall()
+        self.assertEqual(rows, [(u"http://example.com/",),
+            (u"http://example.com/a",), (u"http://example.com/b",)])
+        conn.close()
+
+    @need_sqlite
+    def test_failed_batch (self):
+        logger = SQLLogger(fd=StringIO(), database=self.filename,
+                           batchsize=2)
+        logger.start_output()
+        insert = logger.insert
+        logger.insert = insert.replace(u"linksdb", u"nosuchtable")
+        urls = get_urls()
+        logger.log_url(urls[0])
+        logger.log_url(urls[1])
+        # the failed batch is dropped instead of being retried
+        self.assertEqual(logger.rows, [])
+        logger.insert = insert
+        logger.log_url(urls[2])
+        logger.end_output()
+        conn = sqlite3.connect(self.filename)
+        rows = conn.execute("select urlname from linksdb").fetchall()
+        self.assertEqual(rows, [(u"http://example.com/b",)])
+        conn.close()
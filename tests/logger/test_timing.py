@@ -0,0 +1,74 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test check phase timing output.
+"""
+import unittest
+from StringIO import StringIO
+from linkcheck.checker.urlbase import urlDataAttr, CompactUrlData
+from linkcheck.logger.csvlog import CSVLogger
+from linkcheck.logger.customxml import CustomXMLLogger
+from linkcheck.logger.text import TextLogger
+
+
+def get_url_data (url, **kwargs):
+    """Return transport object of a checked URL."""
+    wire = dict.fromkeys(urlDataAttr, None)
+    wire.update(url=url, base_url=url, valid=True, warnings=[], info=[],
+                name=u"", parent_url=u"", base_ref=u"", result=u"",
+                extern=False, checktime=0, dltime=-1, dlsize=-1, level=0,
+                line=-1, column=-1)
+    wire.update(kwargs)
+    return CompactUrlData(wire)
+
+
+class TestTimingOutput (unittest.TestCase):
+
+    def setUp (self):
+        timing = {"parse": 0.25, "dns": 0.0125, "connect": 0.5}
+        self.url_data = get_url_data(u"http://example.com/", timing=timing)
+
+    def log_url (self, logclass, **kwargs):
+        """Return output of given logger class for the URL."""
+        fd = StringIO()
+        logger = logclass(fd=fd, encoding="ascii", **kwargs)
+        logger.start_output()
+        logger.log_url(self.url_data)
+        return fd.getvalue()
+
+    def test_default (self):
+        for logclass in (TextLogger, CSVLogger, CustomXMLLogger):
+            self.assertFalse("dns" in self.log_url(logclass))
+
+    def test_text (self):
+        output = self.log_url(TextLogger, parts=["url", "timing"])
+        lines = [line.split(None, 1) for line in output.splitlines()]
+        expected = u"dns 0.013s, connect 0.500s, parse 0.250s"
+        self.assertTrue([u"Timing", expected] in lines, output)
+
+    def test_csv (self):
+        output = self.log_url(CSVLogger, parts=["url", "timing"])
+        self.assertEqual(output.splitlines(), [
+            "url;timing",
+            "http://example.com/;dns 0.013s, connect 0.500s, parse 0.250s",
+        ])
+
+    def test_xml (self):
+        output = self.log_url(CustomXMLLogger, parts=["timing"])
+        self.assertTrue(u'<phase name="dns">0.012500</phase>' in output,
+                        output)
+        self.assertTrue(output.index(u'"connect"') < output.index(u'"parse"'))
@@ -0,0 +1,69 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the synthetic site of the benchmark.
+"""
+import unittest
+from .benchmark import Site, Latency, get_argparser, run
+
+
+class TestBenchmark (unittest.TestCase):
+
+    def test_site (self):
+        site = Site(100, 3, 500, 0.1, 42)
+        self.assertEqual(len(site.errors), 9)
+        self.assertNotIn(0, site.errors)
+        # all pages are linked from the start page
+        seen = set([0])
+        todo = [0]
+        while todo:
+            page = todo.pop()
+            if page in site.errors:
+                continue
+            self.assertTrue(len(site.links[page]) >= 3)
+            for link in site.links[page]:
+                if link not in seen:
+                    seen.add(link)
+                    todo.append(link)
+        self.assertEqual(seen, set(range(100)))
+        status, content = site.get_page(0)
+        self.assertEqual(status, 200)
+        self.assertTrue(len(content) >= 500)
+        self.assertIn(site.get_page(min(site.errors))[0], (404, 500))
+        self.assertEqual(Site(100, 3, 500, 0.1, 42).links, site.links)
+
+    def test_latency (self):
+        self.assertEqual(Latency("const:20", 0).get("/"), 0.02)
+        latency = Latency("uniform:10:20", 0)
+        self.assertTrue(0.01 <= latency.get("/a") <= 0.02)
+        self.assertEqual(latency.get("/a"),
+                         Latency("uniform:10:20", 0).get("/a"))
+        self.assertTrue(Latency("exp:10", 0).get("/") >= 0)
+        self.assertRaises(ValueError, Latency, "exp:1:2", 0)
+        self.assertRaises(ValueError, Latency, "normal:1", 0)
+        self.assertRaises(ValueError, Latency, "const:x", 0)
+
+    def test_run (self):
+        options = get_argparser().parse_args(["--pages=20", "--fanout=3",
+                                              "--error-rate=0.1"])
+        result = run(options)
+        results = result["results"]
+        self.assertEqual(results["urls"], 20)
+        self.assertEqual(results["errors"], 1)
+        self.assertTrue(results["urls_per_second"] > 0)
+        self.assertTrue(results["peak_rss_bytes"] > 0)
+        self.assertTrue(results["checktime_p99"] >= results["checktime_p50"])
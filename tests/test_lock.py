@@ -0,0 +1,120 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test lock statistics.
+"""
+import threading
+import time
+import unittest
+from linkcheck import lock
+from linkcheck.decorators import synchronized
+
+
+class TestLockStatistics (unittest.TestCase):
+
+    def setUp (self):
+        lock.enable_stats()
+
+    def tearDown (self):
+        lock.disable_stats()
+
+    def test_disabled (self):
+        lock.disable_stats()
+        l = lock.get_lock("test")
+        with l:
+            pass
+        self.assertIsNone(lock.get_stats())
+        self.assertEqual(l.acquired, {})
+
+    def test_acquire (self):
+        l = lock.get_lock("test")
+        @synchronized(l)
+        def f ():
+            pass
+        for i in range(3):
+            f()
+        self.assertTrue(l.acquire(0))
+        # failed non-blocking acquires are not counted
+        self.assertFalse(l.acquire(0))
+        l.release()
+        counter = lock.get_stats().counters["test"]
+        self.assertEqual(counter.acquires, 4)
+        self.assertEqual(counter.contended, 0)
+        self.assertEqual(sum(counter.wait_histogram), 4)
+        self.assertEqual(sum(counter.hold_histogram), 4)
+
+    def test_contended (self):
+        l = lock.get_lock("test")
+        l.acquire()
+        def run ():
+            with l:
+                pass
+        t = threading.Thread(target=run)
+        t.start()
+        time.sleep(0.1)
+        l.release()
+        t.join()
+        counter = lock.get_stats().counters["test"]
+        self.assertEqual(counter.acquires, 2)
+        self.assertEqual(counter.contended, 1)
+        self.assertTrue(counter.wait >= 0.05, counter.wait)
+        self.assertTrue(counter.hold_max >= 0.05, counter.hold_max)
+
+    def test_condition (self):
+        l = lock.get_lock("test")
+        condition = threading.Condition(l)
+        with condition:
+            condition.notify()
+            condition.wait(0.01)
+        self.assertEqual(lock.get_stats().counters["test"].acquires, 2)
+
+    def test_reentrant (self):
+        l = lock.get_rlock("test")
+        with l:
+            with l:
+                pass
+            time.sleep(0.05)
+        counter = lock.get_stats().counters["test"]
+        self.assertEqual(counter.acquires, 2)
+        # the outer hold is recorded once
+        self.assertEqual(sum(counter.hold_histogram), 1)
+        self.assertTrue(counter.hold_max >= 0.05, counter.hold_max)
+        self.assertEqual(l.acquired, {})
+
+    def test_semaphore (self):
+        # semaphores released by another thread record no hold times
+        l = lock.get_semaphore("test", 1)
+        l.acquire()
+        t = threading.Thread(target=l.release)
+        t.start()
+        t.join()
+        with l:
+            pass
+        counter = lock.get_stats().counters["test"]
+        self.assertEqual(counter.acquires, 2)
+        self.assertEqual(sum(counter.hold_histogram), 0)
+        self.assertEqual(l.acquired, {})
+
+    def test_report (self):
+        for name in ("a", "b"):
+            with lock.get_semaphore(name, 2):
+                pass
+        lines = lock.get_stats().get_report()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith(u"Lock a: 1 acquires, "
+                                            u"0 contended"), lines[0])
+        self.assertEqual(lines[1], u"  wait <10us 1")
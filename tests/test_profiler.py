@@ -0,0 +1,85 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test profiling of all threads.
+"""
+import cProfile
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from linkcheck import profiler
+
+
+def busy ():
+    """Function to find in the profiles."""
+    time.sleep(0.05)
+
+
+class TestProfiler (unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown (self):
+        profiler.disable_thread_profiling()
+        shutil.rmtree(self.tmpdir)
+
+    def test_disabled (self):
+        self.assertEqual(profiler.run_profiled(lambda: 42), 42)
+
+    def test_thread_profiles (self):
+        profiler.enable_thread_profiling()
+        threads = [threading.Thread(target=profiler.run_profiled,
+                                    args=(busy,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        profile = cProfile.Profile()
+        profile.runcall(time.sleep, 0.01)
+        filename = os.path.join(self.tmpdir, "linkchecker.prof")
+        self.assertEqual(profiler.write_profile(filename, profile), 3)
+        stats = pstats.Stats(filename).stats
+        calls = [value[0] for key, value in stats.items() if key[2] == "busy"]
+        self.assertEqual(calls, [3])
+
+    def test_stack_sampler (self):
+        started = threading.Event()
+        event = threading.Event()
+        def wait_for_event ():
+            started.set()
+            event.wait()
+        t = threading.Thread(target=wait_for_event, name="Waiter-1")
+        t.start()
+        try:
+            # sample only when the thread runs wait_for_event
+            started.wait()
+            sampler = profiler.StackSampler()
+            sampler.sample()
+        finally:
+            event.set()
+            t.join()
+        filename = os.path.join(self.tmpdir, "linkchecker.stacks")
+        sampler.write(filename)
+        with open(filename) as fd:
+            lines = fd.read().splitlines()
+        waiter = [line for line in lines if line.startswith("Waiter;")]
+        self.assertEqual(len(waiter), 1)
+        self.assertTrue("wait_for_event (test_profiler.py:" in waiter[0])
+        self.assertTrue(waiter[0].endswith(" 1"))
@@ -290,3 +290,18 @@ class TestRobotsTxt (unittest.TestCase):
         self.check_url("spam", "/cgi-bin/foo/bar", False)
         self.check_url("spam", "/cgi-bin?a=1", False)
         self.check_url("spam", "/", True)
+
+    def test_sitemap (self):
+        lines = [
+            "Sitemap: http://example.com/sitemap.xml?a=%20b",
+            "User-agent: *",
+            "Disallow: /search",
+            "",
+            "sitemap: http://example.com/sitemap2.xml.gz",
+        ]
+        self.rp.parse(lines)
+        self.assertEqual(self.rp.sitemap_urls, [
+            ("http://example.com/sitemap.xml?a=%20b", 1),
+            ("http://example.com/sitemap2.xml.gz", 5),
+        ])
+        self.assertEqual(str(self.rp), "\n".join(lines[1:3]))
@@ -0,0 +1,81 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test sitemap parsing.
+"""
+import unittest
+import gzip
+from cStringIO import StringIO
+from linkcheck import sitemapparse
+
+sitemap = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url>
+    <loc> http://example.com/ </loc>
+    <lastmod>2014-01-08T12:00:00+00:00</lastmod>
+  </url>
+  <url><loc>http://example.com/a?b=1&amp;c=2</loc></url>
+</urlset>
+"""
+
+sitemapindex = """<?xml version="1.0" encoding="UTF-8"?>
+<!-- sitemap index -->
+<sm:sitemapindex xmlns:sm="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sm:sitemap>
+    <sm:loc>http://example.com/sitemap1.xml.gz</sm:loc>
+    <sm:lastmod>2014-01-08</sm:lastmod>
+  </sm:sitemap>
+</sm:sitemapindex>
+"""
+
+
+def compress (data):
+    """Return gzip compressed data."""
+    fileobj = StringIO()
+    f = gzip.GzipFile(fileobj=fileobj, mode='wb')
+    f.write(data)
+    f.close()
+    return fileobj.getvalue()
+
+
+class TestSitemapParse (unittest.TestCase):
+    """Test sitemap parsing routines."""
+
+    def test_mimetype (self):
+        self.assertEqual(sitemapparse.guess_mimetype(sitemap),
+                         sitemapparse.SitemapMimetype)
+        self.assertEqual(sitemapparse.guess_mimetype(sitemapindex),
+                         sitemapparse.SitemapIndexMimetype)
+        self.assertEqual(sitemapparse.guess_mimetype(compress(sitemap)),
+                         sitemapparse.SitemapMimetype)
+        self.assertEqual(sitemapparse.guess_mimetype("<rss version='2.0'>"),
+                         None)
+
+    def test_sitemap (self):
+        expected = [
+            (u"http://example.com/", u"2014-01-08T12:00:00+00:00"),
+            (u"http://example.com/a?b=1&c=2", None),
+        ]
+        self.assertEqual(list(sitemapparse.parse_sitemap_data(sitemap)),
+                         expected)
+        data = compress(sitemap)
+        self.assertEqual(list(sitemapparse.parse_sitemap_data(data)),
+                         expected)
+
+    def test_sitemapindex (self):
+        self.assertEqual(list(sitemapparse.parse_sitemap_data(sitemapindex)),
+            [(u"http://example.com/sitemap1.xml.gz", u"2014-01-08")])
@@ -0,0 +1,108 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test streaming statistics.
+"""
+import unittest
+from linkcheck.statistics import (QuantileSketch, HyperLogLog, TopN,
+    StatisticsCollector)
+
+
+class UrlData (object):
+    """Minimal URL data for the statistics collector."""
+
+    def __init__ (self, url, domain, checktime, dltime=-1, dlsize=-1,
+                  valid=True, warnings=()):
+        """Store URL values."""
+        self.url = url
+        self.valid = valid
+        self.warnings = list(warnings)
+        self.domain = domain
+        self.checktime = checktime
+        self.dltime = dltime
+        self.dlsize = dlsize
+
+
+class TestStatistics (unittest.TestCase):
+    """Test statistics data structures."""
+
+    def test_quantiles (self):
+        sketch = QuantileSketch(accuracy=0.01)
+        self.assertEqual(sketch.quantile(0.5), None)
+        for i in range(1, 1001):
+            sketch.add(i)
+        for q, expected in ((0.5, 500), (0.9, 900), (0.99, 990)):
+            value = sketch.quantile(q)
+            self.assertTrue(abs(value - expected) <= expected * 0.02,
+                            "%s != %s" % (value, expected))
+        self.assertEqual(sketch.quantile(1.0), 1000)
+        self.assertEqual(sketch.average(), 500.5)
+        sketch.add(0)
+        self.assertEqual(sketch.quantile(0), 0)
+
+    def test_hyperloglog (self):
+        hll = HyperLogLog()
+        self.assertEqual(len(hll), 0)
+        for i in range(20000):
+            hll.add(u"host%d.example.com" % (i % 5000))
+        self.assertTrue(abs(len(hll) - 5000) < 5000 * 0.05, len(hll))
+
+    def test_topn (self):
+        top = TopN(2)
+        for value in (3, 1, 4, 1, 5):
+            top.add(value, str(value))
+        self.assertEqual(top.items(), [(5, "5"), (4, "4")])
+
+    def test_collector (self):
+        collector = StatisticsCollector(topn=2)
+        collector.log_url(UrlData(u"http://a.example/", u"a.example", 1.0,
+                                  dltime=0.5, dlsize=1000))
+        collector.log_url(UrlData(u"http://a.example/x", u"a.example", 3.0,
+                                  valid=False))
+        collector.log_url(UrlData(u"http://b.example/", u"b.example", 0.5,
+                                  warnings=[(u"tag", u"warning")]))
+        self.assertEqual(collector.number, 3)
+        self.assertEqual((collector.valid, collector.warnings,
+                          collector.errors), (1, 1, 1))
+        self.assertEqual(len(collector.domains), 2)
+        self.assertEqual(collector.min_url_length, 17)
+        self.assertEqual(collector.dltime.count, 1)
+        self.assertEqual([url for t, url in collector.get_slowest_urls()],
+                         [u"http://a.example/x", u"http://a.example/"])
+        self.assertEqual([host for t, host in collector.get_slowest_hosts()],
+                         [u"a.example", u"b.example"])
+
+    def test_merge (self):
+        sketch = QuantileSketch()
+        other = QuantileSketch()
+        for i in range(1, 11):
+            sketch.add(i)
+            other.add(i * 10)
+        sketch.merge(other)
+        self.assertEqual(sketch.count, 20)
+        self.assertEqual((sketch.min, sketch.max), (1, 100))
+        self.assertEqual(sketch.average(), 30.25)
+
+    def test_bounded_hosts (self):
+        collector = StatisticsCollector(topn=1)
+        for i in range(100):
+            collector.log_url(UrlData(u"http://h%d.example/" % i,
+                                      u"h%d.example" % i, i % 7 + i / 50.0))
+        self.assertEqual(len(collector.hosts), 10)
+        self.assertEqual(collector.other_hosts.checktime.count, 90)
+        # the slowest host with check time 7.94 is kept
+        self.assertEqual(collector.get_slowest_hosts()[0][1], u"h97.example")
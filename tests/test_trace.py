@@ -0,0 +1,110 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test trace event recording.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from linkcheck import trace
+from linkcheck.lock import get_lock
+
+
+class TestTraceEvents (unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "linkchecker.trace")
+
+    def tearDown (self):
+        trace.events_off()
+        shutil.rmtree(self.tmpdir)
+
+    def get_events (self):
+        """Stop tracing and return the written events."""
+        trace.events_off()
+        with open(self.filename) as fd:
+            return json.load(fd)
+
+    def test_disabled (self):
+        with trace.Span(u"check", "url"):
+            pass
+        self.assertIsNone(trace.tracer)
+
+    def test_spans (self):
+        trace.events_on(self.filename)
+        trace.tracer.batchsize = 2
+        def check ():
+            with trace.Span(u"check", "url", {"url": u"http://example.com/"}):
+                with trace.Span(u"parse", "url"):
+                    pass
+        t = threading.Thread(target=check, name="CheckThread-http://x")
+        t.start()
+        t.join()
+        with trace.Span(u"write", "logger"):
+            pass
+        events = self.get_events()
+        spans = [e for e in events if e["ph"] == "X"]
+        self.assertEqual([e["name"] for e in spans],
+                         [u"parse", u"check", u"write"])
+        check, parse = spans[1], spans[0]
+        self.assertEqual(check["args"], {u"url": u"http://example.com/"})
+        self.assertEqual(check["tid"], parse["tid"])
+        self.assertTrue(check["ts"] <= parse["ts"])
+        self.assertTrue(check["dur"] >= parse["dur"])
+        names = dict((e["tid"], e["args"]["name"]) for e in events
+                     if e["ph"] == "M")
+        self.assertEqual(names[check["tid"]], u"CheckThread")
+
+    def test_lock_wait (self):
+        trace.events_on(self.filename)
+        lock = get_lock("test")
+        def wait ():
+            with lock:
+                pass
+        lock.acquire()
+        t = threading.Thread(target=wait)
+        t.start()
+        time.sleep(0.05)
+        lock.release()
+        t.join()
+        # uncontended acquires are not recorded
+        with lock:
+            pass
+        spans = [e for e in self.get_events() if e["ph"] == "X"]
+        self.assertEqual([e["name"] for e in spans], [u"lock test"])
+        self.assertTrue(spans[0]["dur"] > 0)
+
+    def test_no_write_in_span (self):
+        # recording a span does not write while the caller holds a lock
+        trace.events_on(self.filename)
+        tracer = trace.tracer
+        tracer.batchsize = 1
+        def record ():
+            with trace.Span(u"check", "url"):
+                pass
+        with tracer.lock:
+            t = threading.Thread(target=record)
+            t.start()
+            t.join(1)
+            self.assertFalse(t.is_alive())
+        spans = [e for e in self.get_events() if e["ph"] == "X"]
+        self.assertEqual([e["name"] for e in spans], [u"check"])
@@ -565,6 +565,18 @@ class TestUrl (unittest.TestCase):
         self.assertTrue(is_dup("http://example.org/index.htm", "http://example.org"))
         self.assertTrue(is_dup("http://example.org", "http://example.org/index.htm"))
 
+    def test_same_link_base(self):
+        same = linkcheck.url.is_same_link_base
+        self.assertTrue(same("http://example.org/a/b?sid=1", "http://example.org/a/b?sid=2"))
+        self.assertTrue(same("http://example.org/a/b", "http://example.org/a/b?x#y"))
+        # links like "?page=2" resolve against the last path segment
+        self.assertFalse(same("http://example.org/a/", "http://example.org/a/index.html"))
+        self.assertFalse(same("http://example.org/a/b", "http://example.org/a/c#x"))
+        self.assertFalse(same("http://example.org/a", "http://example.org/a/"))
+        self.assertFalse(same("http://example.org/a/b", "http://example.org/c/b"))
+        self.assertFalse(same("http://example.org/a/b", "http://example.com/a/b"))
+        self.assertFalse(same("http://example.org/a/b", "https://example.org/a/b"))
+
     def test_splitport(self):
         splitport = linkcheck.url.splitport
         netloc = "hostname"